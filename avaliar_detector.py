@@ -0,0 +1,368 @@
+# ========================================
+# AVALIAÇÃO DO DETECTOR: PRECISÃO E VELOCIDADE
+# ========================================
+# Mede o modelo que vai para produção (não o do treino) no próprio dataset:
+# - roda o detector (PyTorch ou ONNX Runtime, o mesmo código dos contadores)
+#   nas imagens de valid/ e test/
+# - compara as caixas com os labels YOLO (casamento guloso por IoU) e
+#   calcula precisão, recall, mAP50 e mAP50-95
+# - mede ms por imagem para cada backend, número de threads e resolução
+# Serve para provar que um backend mais rápido, o modelo INT8 ou uma
+# entrada menor não pioraram a detecção: a primeira configuração é a
+# referência e, com --base, quedas de mAP além da tolerância falham.
+#
+# Uso:
+#   python avaliar_detector.py --modelo runs/detect/train/weights/best.pt
+#   python avaliar_detector.py --backends pytorch onnx --threads 1 4 --imgsz 640 480 320
+#   python avaliar_detector.py --modelo best_int8.onnx --backends onnx --base avaliacao.json
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from deteccao import DetectorYOLO, iou_caixas
+from quantizar_modelo import listar_imagens, pasta_do_conjunto
+
+# Limiares de IoU do mAP50-95 (0.50, 0.55, ..., 0.95), como no COCO
+LIMIARES_IOU = np.linspace(0.5, 0.95, 10)
+
+# Integral da curva (np.trapz virou np.trapezoid no NumPy 2)
+_trapezio = getattr(np, "trapezoid", None) or np.trapz
+
+# Confiança mínima para o mAP (baixa, como no YOLO.val; P e R saem do melhor F1)
+CONF_AVALIACAO = 0.001
+
+
+def pasta_dos_labels(pasta_imagens):
+    """Pasta labels/ irmã de images/ (estrutura do YOLO e do Roboflow)"""
+    pai, nome = os.path.split(os.path.normpath(pasta_imagens))
+    return os.path.join(pai, "labels") if nome == "images" else pasta_imagens
+
+
+def ler_labels(caminho, largura, altura):
+    """
+    Lê um label YOLO (classe x_centro y_centro largura altura, normalizados).
+
+    Returns:
+        tuple: (xyxy (N, 4) em pixels, classes (N,))
+    """
+    if not os.path.exists(caminho):  # Imagem sem ninguém
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.float32)
+    dados = np.loadtxt(caminho, dtype=np.float32, ndmin=2)
+    if dados.size == 0:
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.float32)
+    classes, xywh = dados[:, 0], dados[:, 1:5] * [largura, altura, largura, altura]
+    xyxy = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+    return xyxy, classes
+
+
+def carregar_conjunto(data_yaml, conjunto, limite=None):
+    """
+    Imagens (em memória, para o disco não entrar na medição) e labels de um conjunto.
+
+    Returns:
+        list: (nome, imagem BGR, xyxy dos labels, classes dos labels)
+    """
+    pasta = pasta_do_conjunto(data_yaml, conjunto)
+    labels = pasta_dos_labels(pasta)
+    amostras = []
+    for caminho in listar_imagens(pasta, limite):
+        imagem = cv2.imread(caminho)
+        if imagem is None:
+            continue
+        nome = os.path.splitext(os.path.basename(caminho))[0]
+        xyxy, classes = ler_labels(os.path.join(labels, nome + ".txt"), imagem.shape[1], imagem.shape[0])
+        amostras.append((nome, imagem, xyxy, classes))
+    return amostras
+
+
+def casar_predicoes(pred_xyxy, pred_cls, gt_xyxy, gt_cls, limiares=LIMIARES_IOU):
+    """
+    Marca quais predições são verdadeiros positivos em cada limiar de IoU.
+
+    Casamento guloso um-para-um: os pares (predição, label) da mesma classe
+    são percorridos do maior IoU para o menor e cada par entra se nem a
+    predição nem o label já foram usados. Os pares acima de um limiar são
+    um prefixo dessa ordem, então uma passada serve para todos os limiares:
+    no limiar t valem os casamentos com IoU >= t.
+
+    A passada é feita em rodadas vetorizadas: o par que vem primeiro na ordem
+    tanto para sua predição quanto para seu label é o que o guloso escolheria
+    (nenhum par antes dele usa nenhum dos dois), então todos esses pares entram
+    de uma vez e os que perderam a predição ou o label saem. Poucas rodadas
+    bastam mesmo em cenas cheias.
+
+    O YOLO.val deduplica primeiro por predição e depois por label, o que pode
+    descartar um par que o guloso mantém; em cenas cheias os números podem
+    diferir um pouco dos dele.
+
+    Returns:
+        np.ndarray: Matriz booleana (predições, limiares)
+    """
+    acertos = np.zeros((len(pred_xyxy), len(limiares)), bool)
+    if not len(pred_xyxy) or not len(gt_xyxy):
+        return acertos
+    iou = iou_caixas(pred_xyxy, gt_xyxy)
+    iou[pred_cls[:, None] != gt_cls[None, :]] = 0
+    pred, gt = np.nonzero(iou >= min(limiares))
+    ordem = np.argsort(-iou[pred, gt], kind="stable")
+    pred, gt = pred[ordem], gt[ordem]
+
+    iou_casado = np.zeros(len(pred_xyxy))  # IoU do label casado com cada predição (0 = nenhum)
+    pred_usada = np.zeros(len(pred_xyxy), bool)
+    label_usado = np.zeros(len(gt_xyxy), bool)
+    restantes = np.arange(len(pred))  # Pares ainda livres, na ordem do guloso
+    while len(restantes):
+        p, g = pred[restantes], gt[restantes]
+        # Primeira posição (na ordem) de cada predição e de cada label entre os livres
+        primeiro_pred = np.full(len(pred_xyxy), len(pred))
+        primeiro_gt = np.full(len(gt_xyxy), len(pred))
+        np.minimum.at(primeiro_pred, p, restantes)
+        np.minimum.at(primeiro_gt, g, restantes)
+        escolhidos = (primeiro_pred[p] == restantes) & (primeiro_gt[g] == restantes)
+        p, g = p[escolhidos], g[escolhidos]
+        iou_casado[p] = iou[p, g]
+        pred_usada[p] = True
+        label_usado[g] = True
+        restantes = restantes[~(pred_usada[pred[restantes]] | label_usado[gt[restantes]])]
+    acertos[:] = iou_casado[:, None] >= np.asarray(limiares)[None, :]
+    return acertos
+
+
+def precisao_media(recall, precisao):
+    """AP pela interpolação de 101 pontos do COCO (envelope da curva P x R)"""
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precisao = np.concatenate(([1.0], precisao, [0.0]))
+    envelope = np.flip(np.maximum.accumulate(np.flip(precisao)))
+    pontos = np.linspace(0, 1, 101)
+    return float(_trapezio(np.interp(pontos, recall, envelope), pontos))
+
+
+def metricas_deteccao(acertos, confiancas, pred_cls, gt_cls):
+    """
+    Precisão, recall, mAP50 e mAP50-95 (média entre as classes dos labels).
+
+    P e R são os do limiar de confiança com o melhor F1 médio, como no YOLO.val.
+    """
+    classes = np.unique(gt_cls)
+    if not len(classes):
+        return {"precisao": None, "recall": None, "map50": None, "map50_95": None}
+    ordem = np.argsort(-confiancas, kind="stable")
+    acertos, confiancas, pred_cls = acertos[ordem], confiancas[ordem], pred_cls[ordem]
+
+    grade = np.linspace(0, 1, 1000)  # Confianças onde P e R são amostrados
+    ap = np.zeros((len(classes), acertos.shape[1]))
+    p_curva = np.zeros((len(classes), len(grade)))
+    r_curva = np.zeros((len(classes), len(grade)))
+    for c, classe in enumerate(classes):
+        da_classe = pred_cls == classe
+        n_labels = int((gt_cls == classe).sum())
+        if not da_classe.any():
+            continue
+        vp = np.cumsum(acertos[da_classe], axis=0)
+        fp = np.cumsum(~acertos[da_classe], axis=0)
+        recall = vp / n_labels
+        precisao = vp / (vp + fp)
+        conf = confiancas[da_classe]
+        # np.interp precisa de x crescente: as confianças vêm decrescentes
+        r_curva[c] = np.interp(-grade, -conf, recall[:, 0], left=0)
+        p_curva[c] = np.interp(-grade, -conf, precisao[:, 0], left=1)
+        for t in range(acertos.shape[1]):
+            ap[c, t] = precisao_media(recall[:, t], precisao[:, t])
+
+    f1 = 2 * p_curva * r_curva / np.maximum(p_curva + r_curva, 1e-16)
+    melhor = int(f1.mean(0).argmax())
+    return {
+        "precisao": round(float(p_curva[:, melhor].mean()), 4),
+        "recall": round(float(r_curva[:, melhor].mean()), 4),
+        "map50": round(float(ap[:, 0].mean()), 4),
+        "map50_95": round(float(ap.mean()), 4),
+        "conf_melhor_f1": round(float(grade[melhor]), 3),
+    }
+
+
+def avaliar(detector, amostras, aquecimento=3):
+    """
+    Roda o detector imagem por imagem (como nos contadores) e calcula as métricas.
+
+    Returns:
+        dict: métricas de detecção e ms por imagem (média e mediana)
+    """
+    for _, imagem, _, _ in amostras[:aquecimento]:
+        detector.detectar_lote([imagem])
+
+    acertos, confiancas, pred_cls, gt_cls, tempos = [], [], [], [], []
+    for _, imagem, gt_xyxy, gt_classes in amostras:
+        inicio = time.perf_counter()
+        deteccoes = detector.detectar_lote([imagem])[0]
+        tempos.append(time.perf_counter() - inicio)
+        acertos.append(casar_predicoes(deteccoes.xyxy, deteccoes.cls, gt_xyxy, gt_classes))
+        confiancas.append(deteccoes.conf)
+        pred_cls.append(deteccoes.cls)
+        gt_cls.append(gt_classes)
+
+    resultado = metricas_deteccao(np.concatenate(acertos), np.concatenate(confiancas),
+                                  np.concatenate(pred_cls), np.concatenate(gt_cls))
+    tempos = np.array(tempos) * 1000
+    resultado.update({
+        "imagens": len(amostras),
+        "labels": int(sum(len(g) for g in gt_cls)),
+        "ms_por_imagem": round(float(tempos.mean()), 2),
+        "ms_mediana": round(float(np.median(tempos)), 2),
+    })
+    return resultado
+
+
+def criar_detector(backend, modelo_path, imgsz, threads):
+    """Detector do backend pedido, com a confiança baixa usada no mAP"""
+    if backend == "onnx":
+        from detector_onnx import criar_detector_onnx
+        return criar_detector_onnx(modelo_path, imgsz=imgsz, threads=threads, conf=CONF_AVALIACAO)
+
+    import torch
+    from ultralytics import YOLO
+    if threads:
+        torch.set_num_threads(threads)
+    return DetectorYOLO(YOLO(modelo_path, task="detect"), imgsz=imgsz, conf=CONF_AVALIACAO,
+                        iou=0.7, max_det=300, device="cpu")
+
+
+def metricas_do_treino(resultados_csv):
+    """
+    Métricas de validação da melhor época do treino (a do best.pt), para referência.
+
+    O best.pt é a época de maior 0.1 * mAP50 + 0.9 * mAP50-95 (critério da Ultralytics).
+    """
+    if not os.path.exists(resultados_csv):
+        return None
+    with open(resultados_csv, encoding="utf-8") as f:
+        linhas = [{chave.strip(): valor for chave, valor in linha.items()}
+                  for linha in csv.DictReader(f)]
+    if not linhas:
+        return None
+    melhor = max(linhas, key=lambda l: 0.1 * float(l["metrics/mAP50(B)"]) +
+                 0.9 * float(l["metrics/mAP50-95(B)"]))
+    return {
+        "epoca": int(float(melhor["epoch"])),
+        "precisao": round(float(melhor["metrics/precision(B)"]), 4),
+        "recall": round(float(melhor["metrics/recall(B)"]), 4),
+        "map50": round(float(melhor["metrics/mAP50(B)"]), 4),
+        "map50_95": round(float(melhor["metrics/mAP50-95(B)"]), 4),
+    }
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Precisão e velocidade do detector no dataset")
+    parser.add_argument("--modelo", default="runs/detect/train/weights/best.pt",
+                        help="Modelo .pt ou exportado (.onnx)")
+    parser.add_argument("--data", default="data.yaml", help="Configuração do dataset")
+    parser.add_argument("--conjuntos", nargs="+", choices=["val", "test"], default=["val", "test"],
+                        help="Conjuntos avaliados")
+    parser.add_argument("--backends", nargs="+", choices=["pytorch", "onnx"],
+                        help="Backends (padrão: pytorch para .pt, onnx para .onnx)")
+    parser.add_argument("--threads", nargs="+", type=int, default=[0],
+                        help="Números de threads comparados (0 = padrão do backend)")
+    parser.add_argument("--imgsz", nargs="+", type=int, default=[640],
+                        help="Resoluções de entrada comparadas")
+    parser.add_argument("--limite", type=int, help="Máximo de imagens por conjunto")
+    parser.add_argument("--treino", default="runs/detect/train/results.csv",
+                        help="results.csv do treino (mostrado como referência)")
+    parser.add_argument("--json", help="Salva os resultados neste arquivo")
+    parser.add_argument("--base", help="JSON de uma avaliação anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.01,
+                        help="Queda de mAP50-95 aceita em relação à base (absoluta)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.modelo):
+        print(f"❌ Modelo não encontrado em: {args.modelo}")
+        print("💡 Primeiro execute: python treinar_yolo.py")
+        return
+    backends = args.backends or (["onnx"] if args.modelo.endswith(".onnx") else ["pytorch"])
+    if "pytorch" in backends and args.modelo.endswith(".onnx"):
+        print("⚠️ Modelo .onnx: avaliando só no ONNX Runtime")
+        backends = ["onnx"]
+
+    # IMAGENS E LABELS (carregados uma vez para todas as configurações)
+    conjuntos = {}
+    for conjunto in args.conjuntos:
+        try:
+            conjuntos[conjunto] = carregar_conjunto(args.data, conjunto, args.limite)
+        except FileNotFoundError as e:
+            print(f"⚠️ {e}")
+            continue
+        print(f"🖼️ {conjunto}: {len(conjuntos[conjunto])} imagens")
+    conjuntos = {nome: amostras for nome, amostras in conjuntos.items() if amostras}
+    if not conjuntos:
+        print("❌ Nenhuma imagem encontrada. O repositório traz só os labels: extraia as "
+              "imagens do dataset do Roboflow (veja data.yaml) em train/, valid/ e test/")
+        return
+
+    resultados = {}
+    for backend in backends:
+        for threads in args.threads:
+            for imgsz in args.imgsz:
+                chave = f"{backend}/t{threads or 'padrao'}/{imgsz}"
+                print(f"⏱️ {chave}...")
+                detector = criar_detector(backend, args.modelo, imgsz, threads or None)
+                resultados[chave] = {
+                    "backend": backend, "threads": threads or None, "imgsz": imgsz,
+                    **{conjunto: avaliar(detector, amostras)
+                       for conjunto, amostras in conjuntos.items()},
+                }
+
+    # RELATÓRIO (a primeira configuração é a referência dos deltas)
+    referencia = next(iter(resultados.values()))
+    for conjunto in conjuntos:
+        print("\n" + "=" * 84)
+        print(f"📏 {conjunto}: {referencia[conjunto]['imagens']} imagens, "
+              f"{referencia[conjunto]['labels']} pessoas marcadas")
+        print(f"{'configuração':<24}{'P':>8}{'R':>8}{'mAP50':>9}{'mAP50-95':>10}"
+              f"{'Δ mAP50-95':>12}{'ms/img':>9}{'mediana':>9}")
+        print("-" * 84)
+        for chave, r in resultados.items():
+            m = r[conjunto]
+            delta = ("-" if m["map50_95"] is None else
+                     f"{m['map50_95'] - referencia[conjunto]['map50_95']:+.4f}")
+            print(f"{chave:<24}{str(m['precisao']):>8}{str(m['recall']):>8}{str(m['map50']):>9}"
+                  f"{str(m['map50_95']):>10}{delta:>12}{m['ms_por_imagem']:>9}{m['ms_mediana']:>9}")
+    treino = metricas_do_treino(args.treino)
+    if treino is not None:
+        print("-" * 84)
+        print(f"Treino (época {treino['epoca']}, valid/): P={treino['precisao']} "
+              f"R={treino['recall']} mAP50={treino['map50']} mAP50-95={treino['map50_95']}")
+    print("=" * 84)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"modelo": args.modelo, "treino": treino, "resultados": resultados},
+                      f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultados salvos em: {args.json}")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+        falhas = []
+        for chave, r in resultados.items():
+            for conjunto in conjuntos:
+                anterior = base.get(chave, {}).get(conjunto)
+                if (anterior and anterior["map50_95"] is not None and
+                        r[conjunto]["map50_95"] < anterior["map50_95"] - args.tolerancia):
+                    falhas.append(f"{chave} em {conjunto}: mAP50-95 {r[conjunto]['map50_95']} "
+                                  f"contra {anterior['map50_95']} na base")
+        if falhas:
+            print("❌ Piora na detecção:")
+            for falha in falhas:
+                print(f"   • {falha}")
+            sys.exit(1)
+        print(f"✅ Detecção dentro da tolerância ({args.tolerancia}) em relação à base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# ========================================
+# BENCHMARK DOS CODIFICADORES DE GRAVAÇÃO
+# ========================================
+# Grava os mesmos frames com cada perfil de codificadores.py e mostra lado
+# a lado:
+# - FPS de codificação (frames por segundo que o codificador aguenta)
+# - tamanho do arquivo e bytes por minuto de vídeo (para dimensionar o
+#   disco de gravação 24/7)
+# Sem vídeo, usa uma cena sintética determinística (fundo fixo com textura,
+# "pessoas" andando e ruído leve de sensor).
+#
+# Uso:
+#   python benchmark_codificadores.py --video entrada.mp4 --frames 300
+#   python benchmark_codificadores.py --perfis opencv x264 x264_24h --json codificadores.json
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from codificadores import PERFIS_CODIFICACAO, criar_escritor, ffmpeg_disponivel
+
+
+def frames_sinteticos(quantidade, largura=1280, altura=720, semente=0):
+    """
+    Cena determinística parecida com a de uma câmera fixa.
+
+    Returns:
+        list: Frames BGR uint8
+    """
+    rng = np.random.default_rng(semente)
+    fundo = cv2.GaussianBlur(rng.integers(40, 200, (altura, largura, 3), dtype=np.uint8), (0, 0), 3)
+    pessoas = [(rng.uniform(0, largura), rng.uniform(0, altura),
+                rng.uniform(-6, 6), rng.uniform(-4, 4),
+                tuple(int(c) for c in rng.integers(0, 255, 3))) for _ in range(8)]
+    frames = []
+    for i in range(quantidade):
+        frame = fundo.copy()
+        for x, y, vx, vy, cor in pessoas:
+            cx = int((x + vx * i) % largura)
+            cy = int((y + vy * i) % altura)
+            cv2.rectangle(frame, (cx - 25, cy - 70), (cx + 25, cy + 70), cor, -1)
+        ruido = rng.integers(-3, 4, frame.shape, dtype=np.int16)
+        frames.append(np.clip(frame.astype(np.int16) + ruido, 0, 255).astype(np.uint8))
+    return frames
+
+
+def ler_frames(video_path, max_frames):
+    """Lê até max_frames frames do vídeo para a memória"""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def medir_perfil(perfil, frames, fps, pasta):
+    """
+    Grava os frames com o perfil e mede tempo e tamanho.
+
+    O tempo inclui o release(), em que o codificador termina o arquivo.
+
+    Returns:
+        dict: fps de codificação, tamanho e bytes por minuto de vídeo
+    """
+    altura, largura = frames[0].shape[:2]
+    caminho = os.path.join(pasta, f"benchmark_{perfil}.mp4")
+    escritor = criar_escritor(caminho, fps, (largura, altura), perfil)
+    inicio = time.perf_counter()
+    for frame in frames:
+        escritor.write(frame)
+    escritor.release()
+    segundos = time.perf_counter() - inicio
+
+    tamanho = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+    minutos_video = len(frames) / fps / 60
+    return {
+        "fps_codificacao": round(len(frames) / segundos, 1),
+        "ms_por_frame": round(segundos * 1000 / len(frames), 2),
+        "bytes": tamanho,
+        "mb_por_minuto": round(tamanho / minutos_video / 1e6, 2),
+        "gb_por_dia": round(tamanho / minutos_video * 60 * 24 / 1e9, 2),
+    }
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Compara os codificadores de gravação")
+    parser.add_argument("--video", help="Vídeo de entrada (padrão: cena sintética)")
+    parser.add_argument("--frames", type=int, default=300, help="Frames gravados por perfil")
+    parser.add_argument("--fps", type=float, default=30.0,
+                        help="FPS do vídeo gravado (base do cálculo de bytes por minuto)")
+    parser.add_argument("--perfis", nargs="+", choices=list(PERFIS_CODIFICACAO),
+                        default=list(PERFIS_CODIFICACAO), help="Perfis comparados")
+    parser.add_argument("--manter", action="store_true",
+                        help="Mantém os vídeos gravados (na pasta benchmark_codificadores/)")
+    parser.add_argument("--json", help="Salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    if args.video:
+        frames = ler_frames(args.video, args.frames)
+        if not frames:
+            print("❌ Erro ao abrir o vídeo!")
+            return
+        print(f"🎬 {len(frames)} frames de {args.video}")
+    else:
+        frames = frames_sinteticos(args.frames)
+        print(f"🎬 {len(frames)} frames sintéticos {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    perfis = args.perfis
+    if not ffmpeg_disponivel():
+        print("⚠️ ffmpeg não encontrado - comparando só o OpenCV")
+        perfis = [p for p in perfis if PERFIS_CODIFICACAO[p]["backend"] == "opencv"]
+
+    if args.manter:
+        pasta = "benchmark_codificadores"
+        os.makedirs(pasta, exist_ok=True)
+    else:
+        temporaria = tempfile.TemporaryDirectory()
+        pasta = temporaria.name
+
+    resultados = {}
+    for perfil in perfis:
+        print(f"⏱️ Gravando com {perfil}...")
+        try:
+            resultados[perfil] = medir_perfil(perfil, frames, args.fps, pasta)
+        except RuntimeError as e:  # Ex.: ffmpeg compilado sem libx265
+            print(f"❌ {perfil}: {e}")
+            resultados[perfil] = {"erro": str(e)}
+
+    # RELATÓRIO LADO A LADO
+    print("\n" + "="*70)
+    print(f"{'perfil':<12}{'FPS cod.':>12}{'ms/frame':>12}{'MB/min':>12}{'GB/dia':>12}{'x opencv':>10}")
+    print("-"*70)
+    base = resultados.get("opencv", {}).get("bytes")
+    for perfil, r in resultados.items():
+        if "erro" in r:
+            print(f"{perfil:<12}{'falhou':>12}")
+            continue
+        relativo = f"{r['bytes'] / base:.2f}" if base else "-"
+        print(f"{perfil:<12}{r['fps_codificacao']:>12}{r['ms_por_frame']:>12}"
+              f"{r['mb_por_minuto']:>12}{r['gb_por_dia']:>12}{relativo:>10}")
+    print("="*70)
+    print("FPS cod. precisa ficar acima do FPS da câmera; GB/dia é por câmera gravando sem parar")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"frames": len(frames), "largura": frames[0].shape[1],
+                       "altura": frames[0].shape[0], "fps": args.fps,
+                       "perfis": resultados}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultados salvos em: {args.json}")
+    if args.manter:
+        print(f"📁 Vídeos em: {os.path.abspath(pasta)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+# ========================================
+# BENCHMARK DO LAÇO DE CONTAGEM
+# ========================================
+# Mede se uma mudança deixou o ContadorPessoas mais rápido ou mais lento:
+# - gera vídeos sintéticos determinísticos (retângulos atravessando a
+#   linha de contagem) em várias densidades e resoluções
+# - roda processar_frame com um detector de mentira que devolve as caixas
+#   exatas da cena, medindo só o custo FORA do modelo (decodificação,
+#   rastreador, contagem, desenho); com o modelo presente, roda também o
+#   detector de verdade
+# - cada cenário roda num processo novo, para o pico de memória (RSS) ser
+#   só dele
+# - salva frames/s, tempos por estágio (perfil.py) e pico de RSS em JSON e,
+#   com --base, falha (código de saída 1) se algum cenário ficar mais lento
+#   que a base além do limite, ou se a contagem do detector sintético errar
+# - confere que o modo com janela (model.track) e o headless (detecção em
+#   lote + rastreador próprio) contam igual o mesmo vídeo: com o modelo
+#   presente, usando o model.track de verdade; sem ele, um modelo de mentira
+#
+# Uso:
+#   python benchmark_contador.py --json base.json                  # Gera a base
+#   python benchmark_contador.py --base base.json --limite 0.10     # Compara
+#   python benchmark_contador.py --cenarios denso_720p --frames 600
+#   python benchmark_contador.py --video-modos entrada.mp4         # Janela x headless num vídeo real
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from deteccao import CONF_RASTREAMENTO, Deteccoes, criar_rastreador
+
+# Cenários: (largura, altura, pessoas na tela ao mesmo tempo)
+CENARIOS = {
+    "vazio_720p": (1280, 720, 0),
+    "leve_720p": (1280, 720, 2),
+    "medio_720p": (1280, 720, 6),
+    "denso_720p": (1280, 720, 15),
+    "medio_480p": (640, 480, 6),
+    "medio_1080p": (1920, 1080, 6),
+}
+
+FPS_SINTETICO = 30.0
+SEGUNDOS_TRAVESSIA = 3.0  # Tempo de cada pessoa para atravessar a tela inteira
+
+
+class CenaSintetica:
+    """
+    Pessoas (retângulos) atravessando a tela na vertical, sempre iguais para
+    a mesma semente.
+
+    Cada pessoa anda na sua faixa (coluna) e todas da mesma faixa andam no
+    mesmo sentido, então ninguém se sobrepõe e a contagem esperada é exata:
+    quem desce pela linha do meio é uma entrada, quem sobe é uma saída.
+    """
+
+    def __init__(self, largura, altura, pessoas, frames, semente=0):
+        self.largura = largura
+        self.altura = altura
+        self.frames = frames
+        self.linha_y = altura // 2  # Mesma linha do ContadorPessoas
+        rng = np.random.default_rng(semente)
+
+        travessia = int(SEGUNDOS_TRAVESSIA * FPS_SINTETICO)
+        faixas = max(pessoas, 1)
+        largura_faixa = largura / faixas
+        self.w = int(min(largura * 0.05, largura_faixa * 0.7))
+        self.h = int(altura * 0.3)
+
+        # (quadro inicial, x central, sentido +1 desce / -1 sobe, cor)
+        self.pessoas = []
+        if pessoas:
+            intervalo = travessia / pessoas  # Nova pessoa a cada intervalo (densidade constante)
+            inicio = -travessia  # Começa com a tela já ocupada
+            i = 0
+            while inicio < frames:
+                faixa = i % faixas
+                x = int((faixa + 0.5) * largura_faixa + rng.uniform(-0.1, 0.1) * largura_faixa)
+                sentido = 1 if faixa % 2 == 0 else -1
+                cor = tuple(int(c) for c in rng.integers(30, 255, 3))
+                self.pessoas.append((int(inicio), x, sentido, cor))
+                inicio += intervalo
+                i += 1
+        self.velocidade = (altura + self.h) / travessia
+
+        # Fundo fixo com textura (como uma câmera parada)
+        self.fundo = cv2.GaussianBlur(
+            rng.integers(40, 200, (altura, largura, 3), dtype=np.uint8), (0, 0), 3)
+
+    def _posicoes(self, indice):
+        """(x, y central, sentido, cor, distância andada) de quem está na tela no frame"""
+        for inicio, x, sentido, cor in self.pessoas:
+            andado = (indice - inicio) * self.velocidade
+            if not 0 <= andado <= self.altura + self.h:
+                continue
+            y = -self.h / 2 + andado if sentido > 0 else self.altura + self.h / 2 - andado
+            yield x, y, sentido, cor, andado
+
+    def caixas(self, indice):
+        """Caixas xyxy exatas do frame (o que um detector perfeito veria)"""
+        return self.deteccoes(indice).xyxy
+
+    def deteccoes(self, indice, conf_fraca=None):
+        """
+        Deteccoes exatas do frame, com confiança 0.9.
+
+        Com conf_fraca, quem sobe só vem com 0.9 logo ao entrar na tela (o
+        suficiente para o rastreador criar a trilha) e depois com conf_fraca,
+        como uma pessoa parcialmente encoberta.
+        """
+        caixas, confs = [], []
+        for x, y, sentido, _, andado in self._posicoes(indice):
+            caixas.append((x - self.w / 2, y - self.h / 2, x + self.w / 2, y + self.h / 2))
+            fraca = conf_fraca is not None and sentido < 0 and andado > self.h * 1.5
+            confs.append(conf_fraca if fraca else 0.9)
+        caixas = np.array(caixas, np.float32).reshape(-1, 4)
+        np.clip(caixas[:, 0::2], 0, self.largura - 1, out=caixas[:, 0::2])
+        np.clip(caixas[:, 1::2], 0, self.altura - 1, out=caixas[:, 1::2])
+        visiveis = (caixas[:, 3] - caixas[:, 1]) >= 8  # Só quem aparece de verdade
+        return Deteccoes(caixas, confs, np.zeros(len(confs)))[visiveis]
+
+    def desenhar(self, indice):
+        """Frame BGR da cena (fundo + uma "pessoa" com cabeça por caixa)"""
+        frame = self.fundo.copy()
+        for x, y, _, cor, _ in self._posicoes(indice):
+            x1, y1 = int(x - self.w / 2), int(y - self.h / 2)
+            x2, y2 = int(x + self.w / 2), int(y + self.h / 2)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), cor, -1)
+            cv2.rectangle(frame, (x1 + 4, y1 + 4), (x2 - 4, y1 + self.w // 2), (60, 60, 200), -1)
+        return frame
+
+    def contagem_esperada(self, historico_minimo=3):
+        """
+        (entradas, saídas) que um contador perfeito veria.
+
+        Refaz o teste do contador (centro inteiro antes da linha num frame e
+        na linha ou depois no seguinte) para cada pessoa, exigindo alguns
+        frames de trilha antes do cruzamento (o rastreador precisa confirmar
+        a pessoa).
+        """
+        entradas = saidas = 0
+        for inicio, _, sentido, _ in self.pessoas:
+            visivel = None  # Primeiro frame do vídeo com a pessoa na tela
+            anterior = None
+            for indice in range(max(inicio, 0), self.frames):
+                andado = (indice - inicio) * self.velocidade
+                if andado > self.altura + self.h:
+                    break
+                y = -self.h / 2 + andado if sentido > 0 else self.altura + self.h / 2 - andado
+                visivel = indice if visivel is None else visivel
+                centro = int(np.float32(y))
+                if anterior is not None and indice - visivel >= historico_minimo:
+                    if sentido > 0 and anterior < self.linha_y <= centro:
+                        entradas += 1
+                        break
+                    if sentido < 0 and anterior > self.linha_y >= centro:
+                        saidas += 1
+                        break
+                anterior = centro
+        return entradas, saidas
+
+
+class DetectorSintetico:
+    """Detector com a interface de detectar_lote que devolve as caixas exatas da cena"""
+
+    def __init__(self, cena):
+        self.cena = cena
+        self.indice = 0  # O contador pede os frames em ordem, um por vez
+
+    def detectar_lote(self, frames):
+        resultado = []
+        for _ in frames:
+            resultado.append(self.cena.deteccoes(self.indice))
+            self.indice += 1
+        return resultado
+
+
+class _TensorSintetico:
+    """Array com a parte da interface de torch.Tensor lida pelo contador"""
+
+    def __init__(self, valores):
+        self.valores = np.asarray(valores)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.valores
+
+    def int(self):
+        return _TensorSintetico(self.valores.astype(np.int32))
+
+    def float(self):
+        return _TensorSintetico(self.valores.astype(np.float32))
+
+
+class _ResultadoSintetico:
+    """Results da Ultralytics reduzido a results.boxes (xyxy, xywh, conf, cls, id)"""
+
+    def __init__(self, deteccoes, ids=None):
+        self.boxes = self
+        self.xyxy = _TensorSintetico(deteccoes.xyxy)
+        self.xywh = _TensorSintetico(deteccoes.xywh)
+        self.conf = _TensorSintetico(deteccoes.conf)
+        self.cls = _TensorSintetico(deteccoes.cls)
+        self.id = None if ids is None or len(ids) == 0 else _TensorSintetico(ids)
+        self._total = len(deteccoes)
+
+    def __len__(self):
+        return self._total
+
+
+class ModeloSintetico:
+    """
+    Modelo com o predict/track da Ultralytics sobre as caixas exatas da cena.
+
+    Repete os padrões da Ultralytics que importam para a contagem: predict
+    filtra com conf=0.25, track com conf=0.1 e um rastreador criado na
+    primeira chamada com persist=True. Quem sobe passa com confiança baixa
+    (veja CenaSintetica.deteccoes), então só conta se as detecções chegam ao
+    rastreador com o mesmo limiar nos dois modos.
+
+    O track aqui é refeito sobre criar_rastreador, o mesmo do headless: só
+    serve quando não há pesos. Com o modelo presente, verificar_modos usa o
+    model.track de verdade.
+    """
+
+    def __init__(self, cena, conf_fraca=0.15):
+        self.cena = cena
+        self.conf_fraca = conf_fraca
+        self.indice = 0  # O contador pede os frames em ordem
+        self.rastreador = None
+
+    def _proximo(self, conf):
+        deteccoes = self.cena.deteccoes(self.indice, self.conf_fraca)
+        self.indice += 1
+        return deteccoes[deteccoes.conf > conf]
+
+    def predict(self, frames, conf=0.25, **_):
+        return [_ResultadoSintetico(self._proximo(conf)) for _ in frames]
+
+    def track(self, frame, persist=False, conf=None, **_):
+        if self.rastreador is None or not persist:
+            self.rastreador = criar_rastreador()
+        rastros = np.asarray(self.rastreador.update(self._proximo(conf or CONF_RASTREAMENTO), frame),
+                             np.float32).reshape(-1, 8)
+        deteccoes = Deteccoes(rastros[:, :4], rastros[:, 5], rastros[:, 6])
+        return [_ResultadoSintetico(deteccoes, rastros[:, 4])]
+
+
+def gerar_video(cena, caminho):
+    """Grava a cena em arquivo (a decodificação faz parte do que é medido)"""
+    escritor = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*"mp4v"), FPS_SINTETICO,
+                               (cena.largura, cena.altura))
+    for i in range(cena.frames):
+        escritor.write(cena.desenhar(i))
+    escritor.release()
+
+
+def pico_rss_mb():
+    """Pico de memória residente deste processo em MB (None se não der para medir)"""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(pico / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)  # bytes no macOS
+    except ImportError:  # Windows
+        try:
+            import psutil
+            memoria = psutil.Process().memory_info()
+            return round(getattr(memoria, "peak_wset", memoria.rss) / 2 ** 20, 1)
+        except ImportError:
+            return None
+
+
+def _executar_cenario(nome, detector, video, frames, semente, modelo):
+    """
+    Roda um cenário (num processo só dele) e devolve as medições.
+
+    Args:
+        detector (str): "sintetico" (caixas exatas) ou "modelo" (YOLO de verdade)
+    """
+    from contador_pessoas import ContadorPessoas
+    from perfil import PerfilEstagios
+    from preprocessamento import CapturaReutilizavel
+
+    largura, altura, pessoas = CENARIOS[nome]
+    cena = CenaSintetica(largura, altura, pessoas, frames, semente)
+    if detector == "sintetico":
+        contador = ContadorPessoas(modelo, detector=DetectorSintetico(cena))
+    else:
+        contador = ContadorPessoas(modelo)
+    perfil = contador.perfil = PerfilEstagios()
+
+    cap = CapturaReutilizavel(cv2.VideoCapture(video))
+    # Os avisos de cada passagem iriam para o terminal; o custo do print continua medido
+    with contextlib.redirect_stdout(io.StringIO()):
+        perfil.reiniciar()
+        inicio = time.perf_counter()
+        while True:
+            marca = perfil.agora()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            inicio_frame = perfil.marcar("captura", marca)
+            contador.processar_frame(frame)
+            perfil.marcar("frame", inicio_frame)
+            perfil.contar_frame()
+        segundos = time.perf_counter() - inicio
+        perfil.finalizar()
+    cap.release()
+
+    resumo = perfil.resumo()
+    tempo_frames = resumo["estagios"].get("frame", {}).get("soma_s") or 0
+    entradas, saidas = cena.contagem_esperada()
+    return {
+        "cenario": nome,
+        "detector": detector,
+        "largura": largura,
+        "altura": altura,
+        "pessoas": pessoas,
+        "frames": perfil.frames,
+        "fps": round(perfil.frames / segundos, 2),
+        "fps_sem_captura": round(perfil.frames / tempo_frames, 2) if tempo_frames else None,
+        "rss_pico_mb": pico_rss_mb(),
+        "entradas": contador.contador_entrada,
+        "saidas": contador.contador_saida,
+        "entradas_esperadas": entradas if detector == "sintetico" else None,
+        "saidas_esperadas": saidas if detector == "sintetico" else None,
+        "estagios": {estagio: {chave: e[chave] for chave in
+                               ("total", "media_ms", "p50_ms", "p95_ms", "p99_ms")}
+                     for estagio, e in resumo["estagios"].items()},
+    }
+
+
+def verificar_modos(nome, frames, semente, modelo, detector="sintetico", video=None):
+    """
+    Conta o mesmo vídeo no modo com janela e no headless.
+
+    O modo com janela passa por processar_frame (model.track); o headless,
+    por contar_headless (detectar_lote + rastreador próprio). Os dois devem
+    dar a mesma contagem.
+
+    Args:
+        detector (str): "modelo" usa o YOLO de verdade (o model.track da
+                        Ultralytics contra o rastreador próprio); "sintetico"
+                        usa o ModeloSintetico, só para quando não há pesos
+        video (str): Vídeo usado (None = a cena sintética do cenário 'nome')
+
+    Returns:
+        dict: Modo -> (entradas, saídas)
+    """
+    from contador_pessoas import ContadorPessoas
+
+    largura, altura, pessoas = CENARIOS[nome]
+    cena = CenaSintetica(largura, altura, pessoas, frames, semente)
+    contagens = {}
+    with tempfile.TemporaryDirectory() as pasta, contextlib.redirect_stdout(io.StringIO()):
+        if video is None:
+            video = os.path.join(pasta, f"{nome}.mp4")
+            gerar_video(cena, video)
+        for modo in ("janela", "headless"):
+            if detector == "modelo":
+                contador = ContadorPessoas(modelo)
+            else:
+                # Um detector externo evita carregar o YOLO; depois o modelo vira o sintético
+                contador = ContadorPessoas(modelo, detector=DetectorSintetico(cena))
+                contador.detector = None
+                contador.model = ModeloSintetico(cena)
+            if modo == "janela":
+                cap = cv2.VideoCapture(video)
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    contador.processar_frame(frame)
+                cap.release()
+            else:
+                contador.contar_headless(video, guardar_eventos=False)
+            contagens[modo] = (contador.contador_entrada, contador.contador_saida)
+    return contagens
+
+
+def comparar_com_base(resultados, base, limite, limite_rss=None):
+    """
+    Procura regressões em relação a um JSON salvo antes.
+
+    Returns:
+        list: Textos das falhas (vazia se tudo estiver dentro do limite)
+    """
+    falhas = []
+    for chave, r in resultados.items():
+        if r.get("entradas_esperadas") is not None and (
+                (r["entradas"], r["saidas"]) != (r["entradas_esperadas"], r["saidas_esperadas"])):
+            falhas.append(f"{chave}: contagem {r['entradas']}/{r['saidas']}, esperado "
+                          f"{r['entradas_esperadas']}/{r['saidas_esperadas']}")
+        anterior = base.get(chave)
+        if anterior is None:
+            continue
+        if r["fps"] < anterior["fps"] * (1 - limite):
+            falhas.append(f"{chave}: {r['fps']} FPS contra {anterior['fps']} na base "
+                          f"({r['fps'] / anterior['fps'] - 1:+.1%})")
+        if (limite_rss is not None and r["rss_pico_mb"] and anterior.get("rss_pico_mb")
+                and r["rss_pico_mb"] > anterior["rss_pico_mb"] * (1 + limite_rss)):
+            falhas.append(f"{chave}: pico de RSS {r['rss_pico_mb']} MB contra "
+                          f"{anterior['rss_pico_mb']} MB na base")
+    return falhas
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark do laço de contagem")
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS),
+                        help="Cenários medidos (padrão: todos)")
+    parser.add_argument("--frames", type=int, default=300, help="Frames por vídeo sintético")
+    parser.add_argument("--semente", type=int, default=0, help="Semente das cenas")
+    parser.add_argument("--modelo", default="runs/detect/train/weights/best.pt",
+                        help="Modelo para a rodada com o detector de verdade (se existir)")
+    parser.add_argument("--sem-modelo", action="store_true",
+                        help="Mede só com o detector sintético, mesmo com o modelo presente")
+    parser.add_argument("--repeticoes", type=int, default=1,
+                        help="Rodadas por cenário; fica a mais rápida (menos ruído da máquina)")
+    parser.add_argument("--video-modos",
+                        help="Vídeo real para comparar janela x headless com o modelo "
+                             "(padrão: a cena sintética medio_480p)")
+    parser.add_argument("--json", help="Salva os resultados neste arquivo (serve de base depois)")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--limite", type=float, default=0.10,
+                        help="Queda de FPS tolerada em relação à base (0.10 = 10%%)")
+    parser.add_argument("--limite-rss", type=float,
+                        help="Aumento de pico de RSS tolerado em relação à base (padrão: não verifica)")
+    args = parser.parse_args()
+
+    detectores = ["sintetico"]
+    if not args.sem_modelo and os.path.exists(args.modelo):
+        detectores.append("modelo")
+    else:
+        print(f"ℹ️ Sem o modelo {args.modelo}: medindo só o detector sintético")
+
+    resultados = {}
+    contexto = mp.get_context("spawn")  # Processo limpo por cenário (pico de RSS só dele)
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome in args.cenarios:
+            largura, altura, pessoas = CENARIOS[nome]
+            video = os.path.join(pasta, f"{nome}.mp4")
+            print(f"🎬 {nome}: {largura}x{altura}, {pessoas} pessoa(s) na tela, {args.frames} frames")
+            gerar_video(CenaSintetica(largura, altura, pessoas, args.frames, args.semente), video)
+            for detector in detectores:
+                rodadas = []
+                for _ in range(max(args.repeticoes, 1)):
+                    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                        rodadas.append(executor.submit(
+                            _executar_cenario, nome, detector, video, args.frames,
+                            args.semente, args.modelo).result())
+                r = max(rodadas, key=lambda rodada: rodada["fps"])
+                resultados[f"{nome}/{detector}"] = r
+                print(f"   ⏱️ {detector}: {r['fps']} FPS ({r['fps_sem_captura']} sem a captura), "
+                      f"pico {r['rss_pico_mb']} MB")
+
+    # MODO COM JANELA x HEADLESS: mesma contagem no mesmo vídeo
+    # Com os pesos, compara o model.track de verdade; sem eles, o ModeloSintetico
+    detector = "modelo" if "modelo" in detectores else "sintetico"
+    video = args.video_modos if detector == "modelo" else None
+    modos = verificar_modos("medio_480p", args.frames, args.semente, args.modelo, detector, video)
+    print(f"🔁 Janela x headless ({detector}): "
+          + ", ".join(f"{modo} {e}/{s}" for modo, (e, s) in modos.items()))
+
+    # RELATÓRIO
+    print("\n" + "=" * 86)
+    print(f"{'cenário':<28}{'FPS':>9}{'s/ capt.':>10}{'frame p50':>11}{'frame p95':>11}"
+          f"{'RSS MB':>9}{'E/S':>8}")
+    print("-" * 86)
+    for chave, r in resultados.items():
+        frame = r["estagios"].get("frame", {})
+        contagem = f"{r['entradas']}/{r['saidas']}"
+        print(f"{chave:<28}{r['fps']:>9}{str(r['fps_sem_captura']):>10}"
+              f"{str(frame.get('p50_ms')):>11}{str(frame.get('p95_ms')):>11}"
+              f"{str(r['rss_pico_mb']):>9}{contagem:>8}")
+    print("=" * 86)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"frames": args.frames, "semente": args.semente,
+                       "repeticoes": args.repeticoes,
+                       "resultados": resultados}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultados salvos em: {args.json}")
+
+    falhas = []
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("frames") != args.frames:
+            print(f"⚠️ A base usou {base.get('frames')} frames por vídeo (agora {args.frames})")
+        falhas = comparar_com_base(resultados, base["resultados"], args.limite, args.limite_rss)
+    else:
+        falhas = comparar_com_base(resultados, {}, args.limite)  # Só a contagem exata
+    if modos["janela"] != modos["headless"]:
+        falhas.append(f"{detector}: modo com janela contou {modos['janela']}, "
+                      f"headless {modos['headless']}")
+
+    if falhas:
+        print("❌ Regressões:")
+        for falha in falhas:
+            print(f"   • {falha}")
+        sys.exit(1)
+    print("✅ Sem regressões" + (f" (limite {args.limite:.0%})" if args.base else ""))
+
+
+if __name__ == "__main__":
+    main()
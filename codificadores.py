@@ -0,0 +1,186 @@
+# ========================================
+# CODIFICADORES DE VÍDEO PARA A GRAVAÇÃO
+# ========================================
+# O cv2.VideoWriter com 'mp4v' (MPEG-4 parte 2) gera arquivos grandes e não
+# deixa escolher entre velocidade e compressão. Aqui há um escritor que manda
+# os frames BGR crus para um processo do ffmpeg (libx264/libx265, com preset
+# e CRF, ou um modo rápido só com quadros-chave) e perfis prontos para
+# escolher o equilíbrio certo. Sem ffmpeg instalado, volta para o OpenCV.
+#
+# Perfis (ver benchmark_codificadores.py para medir no seu computador):
+# - "opencv":  cv2.VideoWriter mp4v (padrão, sem dependências)
+# - "x264":    H.264 veryfast CRF 23 (bom equilíbrio)
+# - "x264_24h": H.264 medium CRF 28 (arquivos pequenos para gravação 24/7)
+# - "x265":    H.265 fast CRF 28 (ainda menor, usa mais CPU)
+# - "intra":   H.264 ultrafast só com quadros-chave (mais rápido, arquivos maiores)
+#
+# Uso (mesma interface do cv2.VideoWriter):
+#   escritor = criar_escritor("saida.mp4", 30, (1280, 720), perfil="x264")
+#   escritor.write(frame)
+#   escritor.release()
+
+import os  # Extensão do arquivo
+import shutil  # Procura o ffmpeg no PATH
+import subprocess  # Processo do ffmpeg
+import tempfile  # Mensagens de erro do ffmpeg
+
+import cv2  # VideoWriter (alternativa)
+import numpy as np  # Frames contíguos para o pipe
+
+PERFIS_CODIFICACAO = {
+    "opencv": {"backend": "opencv", "fourcc": "mp4v"},
+    "x264": {"backend": "ffmpeg", "codec": "libx264", "preset": "veryfast", "crf": 23},
+    "x264_24h": {"backend": "ffmpeg", "codec": "libx264", "preset": "medium", "crf": 28},
+    "x265": {"backend": "ffmpeg", "codec": "libx265", "preset": "fast", "crf": 28},
+    "intra": {"backend": "ffmpeg", "codec": "libx264", "preset": "ultrafast", "crf": 20,
+              "intra": True},
+}
+
+DESCRICOES_PERFIS = {
+    "opencv": "OpenCV mp4v (padrão, sem ffmpeg)",
+    "x264": "H.264 veryfast CRF 23 (equilíbrio)",
+    "x264_24h": "H.264 medium CRF 28 (arquivos pequenos, 24/7)",
+    "x265": "H.265 fast CRF 28 (menor ainda, mais CPU)",
+    "intra": "H.264 só quadros-chave (mais rápido, arquivos maiores)",
+}
+
+
+def ffmpeg_disponivel(executavel="ffmpeg"):
+    """Caminho do ffmpeg, ou None se ele não estiver instalado"""
+    return shutil.which(executavel)
+
+
+class CodificadorFFmpeg:
+    """Escritor de vídeo que envia frames BGR crus para um processo do ffmpeg"""
+
+    def __init__(self, caminho, fps, tamanho, codec="libx264", preset="veryfast", crf=23,
+                 intra=False, executavel="ffmpeg"):
+        """
+        Args:
+            caminho (str): Arquivo de saída (o contêiner vem da extensão)
+            fps (float): FPS do vídeo gravado
+            tamanho (tuple): (largura, altura) dos frames
+            codec (str): "libx264" ou "libx265"
+            preset (str): Preset do x264/x265 (ultrafast ... veryslow)
+            crf (int): Qualidade constante (menor = melhor e maior)
+            intra (bool): Só quadros-chave (-g 1): codifica mais rápido,
+                          arquivos bem maiores
+            executavel (str): Nome ou caminho do ffmpeg
+        """
+        ffmpeg = ffmpeg_disponivel(executavel)
+        if ffmpeg is None:
+            raise FileNotFoundError(f"ffmpeg não encontrado: {executavel}")
+
+        self.caminho = caminho
+        self.largura, self.altura = (int(v) for v in tamanho)
+        self.bytes_enviados = 0
+
+        comando = [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            # Entrada: frames BGR crus pelo stdin
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{self.largura}x{self.altura}", "-r", str(fps), "-i", "-",
+            "-an", "-c:v", codec, "-preset", preset, "-crf", str(crf),
+        ]
+        if intra:
+            comando += ["-g", "1", "-bf", "0"]
+        if codec == "libx265":
+            comando += ["-x265-params", "log-level=error"]
+            if caminho.lower().endswith((".mp4", ".mov")):
+                comando += ["-tag:v", "hvc1"]  # Tocável no QuickTime/Safari
+        # yuv420p (compatível com qualquer player) exige largura e altura pares
+        if self.largura % 2 or self.altura % 2:
+            comando += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+        comando += ["-pix_fmt", "yuv420p", caminho]
+
+        # Erros vão para um arquivo temporário: um pipe cheio travaria o ffmpeg
+        self._erros = tempfile.TemporaryFile()
+        self._processo = subprocess.Popen(comando, stdin=subprocess.PIPE,
+                                          stdout=subprocess.DEVNULL, stderr=self._erros)
+
+    def isOpened(self):
+        return self._processo.poll() is None
+
+    def write(self, frame):
+        """Envia um frame BGR (altura x largura x 3, uint8) ao ffmpeg"""
+        if frame.shape != (self.altura, self.largura, 3):
+            raise ValueError(f"Frame {frame.shape[1]}x{frame.shape[0]} diferente do vídeo "
+                             f"{self.largura}x{self.altura}")
+        try:
+            self._processo.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        except (BrokenPipeError, OSError):
+            self._processo.wait()
+            raise RuntimeError(f"ffmpeg encerrou: {self._mensagem_erro()}") from None
+        self.bytes_enviados += frame.nbytes
+
+    def release(self):
+        """Fecha o stdin e espera o ffmpeg terminar o arquivo"""
+        if self._processo.stdin and not self._processo.stdin.closed:
+            try:
+                self._processo.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+        if self._processo.wait() != 0:
+            print(f"❌ ffmpeg terminou com erro ({self._processo.returncode}): "
+                  f"{self._mensagem_erro()}")
+        self._erros.close()
+
+    def _mensagem_erro(self):
+        """Últimas linhas que o ffmpeg escreveu no stderr"""
+        try:
+            self._erros.seek(0)
+            texto = self._erros.read().decode("utf-8", "replace").strip()
+        except ValueError:  # Arquivo já fechado
+            return ""
+        return " | ".join(texto.splitlines()[-3:])
+
+
+def criar_escritor(caminho, fps, tamanho, perfil="opencv", **ajustes):
+    """
+    Cria o escritor de vídeo do perfil escolhido.
+
+    Se o perfil usa ffmpeg e ele não está disponível (ou não abre), avisa e
+    grava com o cv2.VideoWriter mp4v.
+
+    Args:
+        caminho (str): Arquivo de saída
+        fps (float): FPS do vídeo gravado
+        tamanho (tuple): (largura, altura) dos frames
+        perfil (str): Chave de PERFIS_CODIFICACAO
+        **ajustes: Sobrescrevem opções do perfil (ex.: crf=30, preset="faster")
+
+    Returns:
+        Objeto com write(frame), release() e isOpened()
+    """
+    if perfil not in PERFIS_CODIFICACAO:
+        raise ValueError(f"Perfil de codificação desconhecido: {perfil} "
+                         f"(opções: {', '.join(PERFIS_CODIFICACAO)})")
+    opcoes = {**PERFIS_CODIFICACAO[perfil], **ajustes}
+    backend = opcoes.pop("backend")
+
+    if backend == "ffmpeg":
+        try:
+            return CodificadorFFmpeg(caminho, fps, tamanho, **opcoes)
+        except FileNotFoundError:
+            print(f"⚠️ ffmpeg não encontrado - gravando {os.path.basename(caminho)} com OpenCV (mp4v)")
+        except OSError as e:
+            print(f"⚠️ Não foi possível iniciar o ffmpeg ({e}) - gravando com OpenCV (mp4v)")
+        opcoes = {}
+
+    fourcc = opcoes.get("fourcc", "mp4v")
+    return cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*fourcc), fps, tuple(tamanho))
+
+
+def escolher_perfil(padrao="opencv"):
+    """Menu no terminal para escolher o codificador da gravação"""
+    perfis = list(PERFIS_CODIFICACAO)
+    print("\n🎞️ CODIFICADOR DA GRAVAÇÃO:")
+    for i, perfil in enumerate(perfis, 1):
+        print(f"{i}. {DESCRICOES_PERFIS[perfil]}")
+    if not ffmpeg_disponivel():
+        print("   (ffmpeg não encontrado: as opções 2-5 gravam com OpenCV)")
+
+    opcao = input(f"Escolha (1-{len(perfis)}, ENTER = {padrao}): ").strip()
+    if opcao.isdigit() and 1 <= int(opcao) <= len(perfis):
+        return perfis[int(opcao) - 1]
+    return padrao
@@ -0,0 +1,172 @@
+# ========================================
+# COMPARAÇÃO PYTORCH x ONNX RUNTIME
+# ========================================
+# Roda os dois backends de detecção no mesmo vídeo e mostra lado a lado:
+# - velocidade (ms por frame e FPS) só da detecção
+# - concordância das caixas do ONNX com as do PyTorch (precisão, recall, IoU médio)
+# - entradas e saídas contadas por cada um no vídeo inteiro
+# Os dois detectam com o limiar do rastreamento (CONF_RASTREAMENTO), o mesmo
+# usado pelo contador, e não com o padrão 0.25 da Ultralytics.
+# Ajuda a escolher o backend de cada local.
+#
+# Uso:
+#   python comparar_backends.py video.mp4 --frames 300 --threads 4 --json comparacao.json
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from deteccao import CONF_RASTREAMENTO, DetectorYOLO, iou_caixas
+
+
+def ler_frames(video_path, max_frames):
+    """Lê até max_frames frames do vídeo para a memória"""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def medir_deteccao(detector, frames, aquecimento=3):
+    """
+    Detecta frame a frame (como no contador ao vivo) e mede o tempo.
+
+    Returns:
+        tuple: (lista de Deteccoes, ms por frame)
+    """
+    for frame in frames[:aquecimento]:
+        detector.detectar_lote([frame])
+    inicio = time.perf_counter()
+    deteccoes = [detector.detectar_lote([frame])[0] for frame in frames]
+    return deteccoes, (time.perf_counter() - inicio) * 1000 / len(frames)
+
+
+def concordancia(referencia, candidata, limiar_iou=0.5):
+    """
+    Compara as caixas de dois backends, frame a frame.
+
+    Cada caixa da candidata casa com no máximo uma da referência (mesma
+    classe, IoU >= limiar), das mais confiantes para as menos confiantes.
+
+    Returns:
+        dict: precisão e recall da candidata em relação à referência e IoU médio
+    """
+    casadas = total_ref = total_cand = 0
+    ious = []
+    for ref, cand in zip(referencia, candidata):
+        total_ref += len(ref)
+        total_cand += len(cand)
+        if not len(ref) or not len(cand):
+            continue
+        iou = iou_caixas(cand.xyxy, ref.xyxy)
+        iou[cand.cls[:, None] != ref.cls[None, :]] = 0
+        usada = np.zeros(len(ref), bool)
+        for i in np.argsort(-cand.conf):
+            linha = np.where(usada, 0, iou[i])
+            j = int(linha.argmax())
+            if linha[j] >= limiar_iou:
+                usada[j] = True
+                casadas += 1
+                ious.append(float(linha[j]))
+    return {
+        "precisao": round(casadas / total_cand, 4) if total_cand else None,
+        "recall": round(casadas / total_ref, 4) if total_ref else None,
+        "iou_medio": round(float(np.mean(ious)), 4) if ious else None,
+    }
+
+
+def contar(modelo_path, detector, video_path):
+    """Conta o vídeo inteiro em modo headless com o detector informado"""
+    from contador_pessoas import ContadorPessoas
+
+    contador = ContadorPessoas(modelo_path, detector=detector)
+    resumo = contador.contar_headless(video_path, tamanho_lote=1, guardar_eventos=False)
+    return {"entradas": resumo["entradas"], "saidas": resumo["saidas"],
+            "velocidade_tempo_real": resumo["velocidade_tempo_real"]}
+
+
+def main():
+    """Função principal"""
+    from ultralytics import YOLO
+    from detector_onnx import criar_detector_onnx
+
+    parser = argparse.ArgumentParser(description="Compara os backends PyTorch e ONNX Runtime")
+    parser.add_argument("video", help="Vídeo usado na comparação")
+    parser.add_argument("--modelo", default="runs/detect/train/weights/best.pt",
+                        help="Modelo .pt (o .onnx é exportado ao lado dele)")
+    parser.add_argument("--frames", type=int, default=300,
+                        help="Frames usados na medição de velocidade e concordância")
+    parser.add_argument("--threads", type=int, help="Threads do ONNX Runtime e do PyTorch")
+    parser.add_argument("--sem-contagem", action="store_true",
+                        help="Não conta o vídeo inteiro com cada backend")
+    parser.add_argument("--json", help="Salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    modelo_path = args.modelo
+    if not os.path.exists(modelo_path):
+        print(f"⚠️ Modelo não encontrado em: {modelo_path} - usando yolov8n.pt")
+        modelo_path = "yolov8n.pt"
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    frames = ler_frames(args.video, args.frames)
+    if not frames:
+        print("❌ Erro ao abrir o vídeo!")
+        return
+    print(f"🎬 {len(frames)} frames de {args.video}")
+
+    detectores = {
+        "pytorch": DetectorYOLO(YOLO(modelo_path), conf=CONF_RASTREAMENTO),
+        "onnx": criar_detector_onnx(modelo_path, threads=args.threads, conf=CONF_RASTREAMENTO),
+    }
+
+    resultados = {}
+    deteccoes = {}
+    for nome, detector in detectores.items():
+        print(f"⏱️ Medindo {nome}...")
+        deteccoes[nome], ms = medir_deteccao(detector, frames)
+        resultados[nome] = {"ms_por_frame": round(ms, 2), "fps": round(1000 / ms, 1),
+                            "deteccoes": sum(len(d) for d in deteccoes[nome])}
+    resultados["onnx"]["concordancia"] = concordancia(deteccoes["pytorch"], deteccoes["onnx"])
+
+    if not args.sem_contagem:
+        for nome, detector in detectores.items():
+            print(f"🔢 Contando o vídeo inteiro com {nome}...")
+            resultados[nome]["contagem"] = contar(modelo_path, detector, args.video)
+
+    # RELATÓRIO LADO A LADO
+    print("\n" + "="*60)
+    print(f"{'':<22}{'PyTorch':>18}{'ONNX Runtime':>18}")
+    print("-"*60)
+    for chave, rotulo in [("ms_por_frame", "ms por frame"), ("fps", "FPS"),
+                          ("deteccoes", "detecções")]:
+        print(f"{rotulo:<22}{resultados['pytorch'][chave]:>18}{resultados['onnx'][chave]:>18}")
+    if not args.sem_contagem:
+        for chave in ("entradas", "saidas"):
+            print(f"{chave:<22}{resultados['pytorch']['contagem'][chave]:>18}"
+                  f"{resultados['onnx']['contagem'][chave]:>18}")
+    c = resultados["onnx"]["concordancia"]
+    print("-"*60)
+    print(f"Concordância ONNX x PyTorch: precisão={c['precisao']} recall={c['recall']} "
+          f"IoU médio={c['iou_medio']}")
+    print(f"Aceleração ONNX: {resultados['pytorch']['ms_por_frame'] / resultados['onnx']['ms_por_frame']:.2f}x")
+    print("="*60)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultados salvos em: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
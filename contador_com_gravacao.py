@@ -6,10 +6,15 @@
 import cv2
 import numpy as np
 from ultralytics import YOLO
-from collections import defaultdict
+from contagem import centros_inteiros
+from track_store import TrackStore
 import time
 import os
 from datetime import datetime
+from exibicao import ExibidorAssincrono
+from codificadores import criar_escritor, escolher_perfil
+from gravador_eventos import GravadorEventos
+from gravacao_assincrona import GravadorAssincrono, POLITICA_BLOQUEAR, POLITICA_DESCARTAR_CONTANDO
 
 class ContadorComGravacao:
     """
@@ -27,16 +32,23 @@ class ContadorComGravacao:
             print("⚠️ Usando modelo pré-treinado!")
         
         # Variáveis de controle
-        self.track_history = defaultdict(lambda: [])
-        self.pessoas_contadas = set()
+        self.trilhas = TrackStore(tamanho_historico=30)  # Histórico + quem já foi contado
+        self.indice_frame = -1
         self.contador_entrada = 0
         self.contador_saida = 0
         self.linha_contagem_y = None
         
         # Variáveis para gravação
-        self.video_writer = None
+        self.video_writer = None  # GravadorAssincrono: codifica fora do laço
         self.gravando = False
         self.nome_arquivo_saida = None
+        self.capacidade_gravacao = 32  # Frames que podem esperar pela codificação
+        self.perfil_gravacao = "opencv"  # Codificador (ver codificadores.PERFIS_CODIFICACAO)
+        
+        # Gravação só de clipes em volta das passagens (tecla 'e')
+        self.ouvintes_eventos = []  # Funções chamadas a cada entrada/saída
+        self.gravador_eventos = None
+        self.pasta_clipes = "clipes"
     
     def definir_linha_contagem(self, frame):
         """Define linha de contagem no meio da tela"""
@@ -52,30 +64,22 @@ class ContadorComGravacao:
             cv2.putText(frame, "LINHA DE CONTAGEM", (10, self.linha_contagem_y - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
     
-    def verificar_passagem(self, track_id, centro_y):
-        """Verifica passagem pela linha"""
-        if self.linha_contagem_y is None:
+    def registrar_passagem(self, track_id, direcao):
+        """Conta uma passagem pela linha (uma vez por pessoa)"""
+        if self.trilhas.foi_contado(track_id):
             return
+        self.trilhas.marcar_contado(track_id)
         
-        historico = self.track_history[track_id]
+        if direcao == "entrada":
+            self.contador_entrada += 1
+            print(f"🚶 Pessoa {track_id} ENTROU! Total: {self.contador_entrada}")
+        else:
+            self.contador_saida += 1
+            print(f"🚶 Pessoa {track_id} SAIU! Total: {self.contador_saida}")
         
-        if len(historico) >= 2:
-            y_anterior = historico[-2][1]
-            y_atual = centro_y
-            
-            # Entrada (cima para baixo)
-            if y_anterior < self.linha_contagem_y and y_atual >= self.linha_contagem_y:
-                if track_id not in self.pessoas_contadas:
-                    self.contador_entrada += 1
-                    self.pessoas_contadas.add(track_id)
-                    print(f"🚶 Pessoa {track_id} ENTROU! Total: {self.contador_entrada}")
-            
-            # Saída (baixo para cima)
-            elif y_anterior > self.linha_contagem_y and y_atual <= self.linha_contagem_y:
-                if track_id not in self.pessoas_contadas:
-                    self.contador_saida += 1
-                    self.pessoas_contadas.add(track_id)
-                    print(f"🚶 Pessoa {track_id} SAIU! Total: {self.contador_saida}")
+        evento = {"frame": self.indice_frame, "track_id": int(track_id), "direcao": direcao}
+        for ouvinte in self.ouvintes_eventos:
+            ouvinte(evento)
     
     def adicionar_info_tela(self, frame):
         """Adiciona informações na tela com PAINEL MAIOR"""
@@ -102,28 +106,24 @@ class ContadorComGravacao:
         """Processa frame com detecção e rastreamento"""
         if self.linha_contagem_y is None:
             self.definir_linha_contagem(frame)
+        self.indice_frame += 1
         
         # Detecção + tracking
         results = self.model.track(frame, persist=True, verbose=False)
         
         if results[0].boxes is not None and results[0].boxes.id is not None:
-            boxes = results[0].boxes.xywh.cpu()
-            track_ids = results[0].boxes.id.int().cpu().tolist()
-            confidences = results[0].boxes.conf.float().cpu().tolist()
+            boxes = results[0].boxes.xywh.cpu().numpy()
+            track_ids = results[0].boxes.id.int().cpu().numpy()
+            confidences = results[0].boxes.conf.float().cpu().numpy()
             
-            for box, track_id, conf in zip(boxes, track_ids, confidences):
-                x, y, w, h = box
-                centro_x = int(x)
-                centro_y = int(y)
-                
-                # Atualiza histórico
-                self.track_history[track_id].append((centro_x, centro_y))
-                if len(self.track_history[track_id]) > 30:
-                    self.track_history[track_id].pop(0)
-                
-                # Verifica passagem
-                self.verificar_passagem(track_id, centro_y)
-                
+            # Atualiza histórico e verifica passagens de todas as pessoas de uma vez
+            _, entrada, saida = self.trilhas.atualizar(track_ids, centros_inteiros(boxes),
+                                                       self.indice_frame, self.linha_contagem_y)
+            for i in np.flatnonzero(entrada | saida):
+                self.registrar_passagem(int(track_ids[i]), "entrada" if entrada[i] else "saida")
+            
+            for (x, y, w, h), track_id, conf in zip(boxes.tolist(), track_ids.tolist(),
+                                                    confidences.tolist()):
                 # Desenha bounding box
                 x1 = int(x - w/2)
                 y1 = int(y - h/2)
@@ -135,7 +135,7 @@ class ContadorComGravacao:
                            (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
                 
                 # Desenha rastro (comentado para remover linhas)
-                # pontos = np.array(self.track_history[track_id], dtype=np.int32)
+                # pontos = self.trilhas.historico(track_id).astype(np.int32)
                 # if len(pontos) > 1:
                 #     cv2.polylines(frame, [pontos], False, (0, 255, 255), 2)
         
@@ -145,38 +145,60 @@ class ContadorComGravacao:
         
         return frame
     
-    def iniciar_gravacao(self, largura, altura, fps=30):
-        """Inicia gravação do vídeo"""
+    def iniciar_gravacao(self, largura, altura, fps=30, politica=POLITICA_BLOQUEAR):
+        """
+        Inicia gravação do vídeo (em segundo plano)
+
+        Args:
+            politica (str): O que fazer se a codificação atrasar: "bloquear"
+                            (arquivo de vídeo, nenhum frame perdido) ou
+                            "descartar_contando" (câmera, o laço não para)
+        """
         # Nome do arquivo com timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.nome_arquivo_saida = f"contador_gravado_{timestamp}.mp4"
         
-        # Codec para MP4
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        
-        # Cria VideoWriter
-        self.video_writer = cv2.VideoWriter(
-            self.nome_arquivo_saida, 
-            fourcc, 
-            fps, 
-            (largura, altura)
+        # Codificador do perfil escolhido (OpenCV ou ffmpeg), numa thread
+        # própria, com fila limitada
+        self.video_writer = GravadorAssincrono(
+            self.nome_arquivo_saida,
+            fps,
+            (largura, altura),
+            escritor=criar_escritor(self.nome_arquivo_saida, fps, (largura, altura),
+                                    self.perfil_gravacao),
+            capacidade=self.capacidade_gravacao,
+            politica=politica
         )
         
         self.gravando = True
         print(f"🎬 Iniciando gravação: {self.nome_arquivo_saida}")
     
     def gravar_frame(self, frame):
-        """Grava um frame no vídeo"""
+        """Enfileira um frame para gravação (copiado; pode ser desenhado depois)"""
         if self.gravando and self.video_writer is not None:
             self.video_writer.write(frame)
     
     def parar_gravacao(self):
         """Para a gravação"""
         if self.gravando and self.video_writer is not None:
-            self.video_writer.release()
+            self.video_writer.release()  # Grava o que falta na fila antes de fechar
             self.gravando = False
             print(f"✅ Gravação salva: {self.nome_arquivo_saida}")
             print(f"📁 Local: {os.path.abspath(self.nome_arquivo_saida)}")
+            self.video_writer.imprimir_resumo()
+    
+    def alternar_clipes(self, fps, politica=POLITICA_BLOQUEAR):
+        """Liga/desliga a gravação só de clipes em volta das passagens"""
+        if self.gravador_eventos is None:
+            self.gravador_eventos = GravadorEventos(self.pasta_clipes, fps=fps,
+                                                    perfil=self.perfil_gravacao,
+                                                    politica=politica).conectar(self)
+            print(f"🎞️ Clipes por evento ativados (pasta: {self.pasta_clipes})")
+        else:
+            self.gravador_eventos.fechar()
+            self.ouvintes_eventos.remove(self.gravador_eventos.ao_evento)
+            print(f"🎞️ Clipes por evento desativados: {len(self.gravador_eventos.clipes)} clipe(s) salvo(s)")
+            self.gravador_eventos = None
     
     def contar_com_gravacao_video(self, video_path):
         """Conta pessoas em vídeo e salva resultado"""
@@ -194,10 +216,15 @@ class ContadorComGravacao:
         
         print(f"📹 Vídeo: {width}x{height}, {fps} FPS, {total_frames} frames")
         print("🎬 Pressione 'g' para iniciar/parar gravação")
+        print("🎞️ Pressione 'e' para gravar só clipes das passagens")
         print("🚪 Pressione 'q' para sair")
         
         frame_count = 0
         
+        # JANELA MAIOR E REDIMENSIONÁVEL, criada uma vez (atualizada em outra thread)
+        janela = ExibidorAssincrono('Contador com Gravação', tamanho=(1200, 800),
+                                    teclas="qge").iniciar()
+        
         while True:
             ret, frame = cap.read()
             if not ret:
@@ -211,6 +238,8 @@ class ContadorComGravacao:
             # Grava se estiver gravando
             if self.gravando:
                 self.gravar_frame(frame_processado)
+            if self.gravador_eventos is not None:
+                self.gravador_eventos.adicionar_frame(frame_processado)
             
             # Adiciona contador de progresso
             progresso = f"Frame: {frame_count}/{total_frames}"
@@ -224,27 +253,28 @@ class ContadorComGravacao:
                 new_height = int(height * scale)
                 frame_processado = cv2.resize(frame_processado, (new_width, new_height))
             
-            # JANELA MAIOR E REDIMENSIONÁVEL
-            cv2.namedWindow('Contador com Gravação', cv2.WINDOW_NORMAL)
-            cv2.resizeWindow('Contador com Gravação', 1200, 800)  # Janela inicial maior
-            cv2.imshow('Contador com Gravação', frame_processado)
+            janela.mostrar(frame_processado)
             
-            # Controles de teclado
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
+            # Controles de teclado (repassados pela thread da janela)
+            key = janela.tecla()
+            if key == 'q':
                 break
-            elif key == ord('g'):
+            elif key == 'g':
                 if not self.gravando:
                     self.iniciar_gravacao(width, height, fps)
                 else:
                     self.parar_gravacao()
+            elif key == 'e':
+                self.alternar_clipes(fps)
         
         # Finaliza
         if self.gravando:
             self.parar_gravacao()
+        if self.gravador_eventos is not None:
+            self.alternar_clipes(fps)
         
         cap.release()
-        cv2.destroyAllWindows()
+        janela.parar()
         
         # Relatório final
         print("\n" + "="*50)
@@ -271,8 +301,13 @@ class ContadorComGravacao:
         
         print(f"📹 Câmera: {width}x{height}")
         print("🎬 Pressione 'g' para iniciar/parar gravação")
+        print("🎞️ Pressione 'e' para gravar só clipes das passagens")
         print("🚪 Pressione 'q' para sair")
         
+        # JANELA MAIOR E REDIMENSIONÁVEL PARA CÂMERA, criada uma vez
+        janela = ExibidorAssincrono('Contador Câmera com Gravação', tamanho=(1000, 700),
+                                    teclas="qge").iniciar()
+        
         while True:
             ret, frame = cap.read()
             if not ret:
@@ -284,28 +319,33 @@ class ContadorComGravacao:
             # Grava se estiver gravando
             if self.gravando:
                 self.gravar_frame(frame_processado)
+            if self.gravador_eventos is not None:
+                self.gravador_eventos.adicionar_frame(frame_processado)
             
-            # JANELA MAIOR E REDIMENSIONÁVEL PARA CÂMERA
-            cv2.namedWindow('Contador Câmera com Gravação', cv2.WINDOW_NORMAL)
-            cv2.resizeWindow('Contador Câmera com Gravação', 1000, 700)
-            cv2.imshow('Contador Câmera com Gravação', frame_processado)
+            janela.mostrar(frame_processado)
             
             # Controles
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
+            key = janela.tecla()
+            if key == 'q':
                 break
-            elif key == ord('g'):
+            elif key == 'g':
                 if not self.gravando:
-                    self.iniciar_gravacao(width, height, fps)
+                    # Câmera ao vivo: se a codificação atrasar, descarta (e conta)
+                    # em vez de travar a contagem
+                    self.iniciar_gravacao(width, height, fps, politica=POLITICA_DESCARTAR_CONTANDO)
                 else:
                     self.parar_gravacao()
+            elif key == 'e':
+                self.alternar_clipes(fps, politica=POLITICA_DESCARTAR_CONTANDO)
         
         # Finaliza
         if self.gravando:
             self.parar_gravacao()
+        if self.gravador_eventos is not None:
+            self.alternar_clipes(fps)
         
         cap.release()
-        cv2.destroyAllWindows()
+        janela.parar()
         
         # Relatório final
         print("\n" + "="*50)
@@ -323,6 +363,7 @@ def main():
     print("="*50)
     
     contador = ContadorComGravacao()
+    contador.perfil_gravacao = escolher_perfil()
     
     print("\n🎯 ESCOLHA UMA OPÇÃO:")
     print("1. Processar vídeo e gravar resultado")
@@ -6,6 +6,9 @@ import cv2
 from ultralytics import YOLO
 import os
 from datetime import datetime
+from exibicao import ExibidorAssincrono
+from codificadores import criar_escritor, escolher_perfil
+from gravacao_assincrona import GravadorAssincrono, POLITICA_BLOQUEAR, POLITICA_DESCARTAR_CONTANDO
 
 def contador_com_gravacao_funcional():
     """Contador que funciona e grava automaticamente"""
@@ -59,9 +62,13 @@ def contador_com_gravacao_funcional():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = f"contador_resultado_{timestamp}.mp4"
     
-    # Configurar gravação
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_file, fourcc, fps, (width, height))
+    # Configurar gravação: codificador escolhido (OpenCV ou ffmpeg), numa
+    # thread própria, com fila limitada.
+    # Vídeo: espera a codificação (nenhum frame perdido); câmera: descarta e conta
+    perfil = escolher_perfil()
+    politica = POLITICA_BLOQUEAR if opcao == "1" else POLITICA_DESCARTAR_CONTANDO
+    escritor = criar_escritor(output_file, fps, (width, height), perfil)
+    out = GravadorAssincrono(output_file, fps, (width, height), escritor=escritor, politica=politica)
     
     print(f"🎬 Gravando em: {output_file}")
     print(f"📊 {width}x{height} @ {fps}fps")
@@ -70,6 +77,10 @@ def contador_com_gravacao_funcional():
     pessoas_detectadas = 0
     frame_count = 0
     
+    # Janela criada uma vez; atualizada em outra thread, sem o waitKey(30)
+    # que limitava o laço a ~33 FPS
+    janela = ExibidorAssincrono('CONTADOR + GRAVAÇÃO', tamanho=(1000, 700)).iniciar()
+    
     while True:
         ret, frame = cap.read()
         if not ret:
@@ -138,27 +149,25 @@ def contador_com_gravacao_funcional():
                    (30, 170),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
         
-        # GRAVA O FRAME
+        # GRAVA O FRAME (só enfileira; a thread de gravação codifica)
         out.write(frame)
         
         # Mostra na tela
-        cv2.namedWindow('CONTADOR + GRAVAÇÃO', cv2.WINDOW_NORMAL)
-        cv2.resizeWindow('CONTADOR + GRAVAÇÃO', 1000, 700)
-        cv2.imshow('CONTADOR + GRAVAÇÃO', frame)
+        janela.mostrar(frame)
         
         # Controle de saída
-        key = cv2.waitKey(30) & 0xFF
-        if key == ord('q'):
+        if janela.tecla() == 'q':
             break
     
     # Finaliza
     cap.release()
-    out.release()
-    cv2.destroyAllWindows()
+    out.release()  # Grava o que ainda está na fila
+    janela.parar()
     
     print(f"✅ CONCLUÍDO!")
     print(f"📁 Arquivo salvo: {os.path.abspath(output_file)}")
     print(f"🎯 Total de frames processados: {frame_count}")
+    out.imprimir_resumo()
 
 if __name__ == "__main__":
     contador_com_gravacao_funcional()
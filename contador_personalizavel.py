@@ -6,7 +6,12 @@
 import cv2
 import numpy as np
 from ultralytics import YOLO
-from collections import defaultdict
+from contagem import centros_inteiros
+from track_store import TrackStore
+from sobreposicao import RenderizadorSobreposicao
+from exibicao import ExibidorAssincrono
+from codificadores import criar_escritor, escolher_perfil
+from gravacao_assincrona import GravadorAssincrono, POLITICA_BLOQUEAR, POLITICA_DESCARTAR_CONTANDO
 import os
 import threading
 import time
@@ -25,8 +30,8 @@ class ContadorPersonalizavel:
             print("⚠️ Usando modelo pré-treinado!")
         
         # Variáveis de controle
-        self.track_history = defaultdict(lambda: [])
-        self.pessoas_contadas = set()
+        self.trilhas = TrackStore(tamanho_historico=30)  # Histórico + quem já foi contado
+        self.indice_frame = -1
         self.contador_entrada = 0
         self.contador_saida = 0
         self.linha_contagem_y = None
@@ -35,11 +40,13 @@ class ContadorPersonalizavel:
         self.tamanho_painel = "medio"  # pequeno, medio, grande, gigante
         self.tamanho_janela = "medio"  # pequeno, medio, grande, fullscreen
         self.tamanho_fonte = "medio"   # pequeno, medio, grande
+        self.sobreposicao = RenderizadorSobreposicao()  # Painel, linha e rótulos em cache
         
         # Configurações de gravação
         self.gravando = False
-        self.video_writer = None
+        self.video_writer = None  # GravadorAssincrono: codifica fora do laço
         self.nome_arquivo_gravacao = None
+        self.perfil_gravacao = "opencv"  # Codificador (ver codificadores.PERFIS_CODIFICACAO)
     
     def configurar_interface(self):
         """Permite ao usuário configurar o tamanho da interface"""
@@ -106,13 +113,21 @@ class ContadorPersonalizavel:
         
         if gravar in ['s', 'sim', 'y', 'yes']:
             self.configurar_gravacao = True
+            self.perfil_gravacao = escolher_perfil(self.perfil_gravacao)
             print("✅ Gravação será ativada!")
         else:
             self.configurar_gravacao = False
             print("❌ Sem gravação")
     
-    def iniciar_gravacao(self, frame_exemplo):
-        """Inicia gravação de vídeo"""
+    def iniciar_gravacao(self, frame_exemplo, politica=POLITICA_BLOQUEAR):
+        """
+        Inicia gravação de vídeo
+        
+        Args:
+            politica (str): O que fazer se a codificação atrasar: "bloquear"
+                            (arquivo de vídeo, nenhum frame perdido) ou
+                            "descartar_contando" (câmera, o laço não para)
+        """
         if not hasattr(self, 'configurar_gravacao') or not self.configurar_gravacao:
             return
         
@@ -122,9 +137,11 @@ class ContadorPersonalizavel:
             
             # Configurações do vídeo
             height, width = frame_exemplo.shape[:2]
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            self.video_writer = cv2.VideoWriter(
-                self.nome_arquivo_gravacao, fourcc, 20.0, (width, height)
+            escritor = criar_escritor(self.nome_arquivo_gravacao, 20.0, (width, height),
+                                      self.perfil_gravacao)
+            self.video_writer = GravadorAssincrono(
+                self.nome_arquivo_gravacao, 20.0, (width, height),
+                escritor=escritor, politica=politica
             )
             
             self.gravando = True
@@ -135,7 +152,7 @@ class ContadorPersonalizavel:
             self.configurar_gravacao = False
     
     def gravar_frame(self, frame):
-        """Grava um frame"""
+        """Enfileira um frame para a thread de gravação"""
         if self.gravando and self.video_writer:
             try:
                 self.video_writer.write(frame)
@@ -146,9 +163,10 @@ class ContadorPersonalizavel:
         """Para a gravação"""
         if self.gravando and self.video_writer:
             self.gravando = False
-            self.video_writer.release()
+            self.video_writer.release()  # Espera a fila esvaziar
             print(f"✅ Gravação finalizada!")
             print(f"📁 Arquivo salvo: {os.path.abspath(self.nome_arquivo_gravacao)}")
+            self.video_writer.imprimir_resumo()
     
     def get_config_painel(self):
         """Retorna configurações do painel baseado no tamanho escolhido"""
@@ -186,112 +204,123 @@ class ContadorPersonalizavel:
         return self.linha_contagem_y
     
     def desenhar_linha_contagem(self, frame):
-        """Desenha linha de contagem"""
+        """Desenha linha de contagem (desenhada uma vez por resolução e fonte)"""
         if self.linha_contagem_y is not None:
-            cv2.line(frame, (0, self.linha_contagem_y), 
-                    (frame.shape[1], self.linha_contagem_y), (0, 255, 0), 4)
-            
-            fonte_config = self.get_config_fonte()
-            cv2.putText(frame, "LINHA DE CONTAGEM", (15, self.linha_contagem_y - 15),
-                       cv2.FONT_HERSHEY_SIMPLEX, fonte_config["texto"], (0, 255, 0), 
-                       fonte_config["espessura"])
+            self.sobreposicao.camada(frame, ("linha", self.linha_contagem_y, self.tamanho_fonte),
+                                     self._desenhar_linha_fixa)
     
-    def verificar_passagem(self, track_id, centro_y):
-        """Verifica passagem pela linha"""
-        if self.linha_contagem_y is None:
-            return
+    def _desenhar_linha_fixa(self, tela):
+        """Linha de contagem e seu texto"""
+        cv2.line(tela, (0, self.linha_contagem_y), 
+                (tela.shape[1], self.linha_contagem_y), (0, 255, 0), 4)
         
-        historico = self.track_history[track_id]
+        fonte_config = self.get_config_fonte()
+        cv2.putText(tela, "LINHA DE CONTAGEM", (15, self.linha_contagem_y - 15),
+                   cv2.FONT_HERSHEY_SIMPLEX, fonte_config["texto"], (0, 255, 0), 
+                   fonte_config["espessura"])
+    
+    def registrar_passagem(self, track_id, direcao):
+        """Conta uma passagem pela linha (uma vez por pessoa)"""
+        if self.trilhas.foi_contado(track_id):
+            return
+        self.trilhas.marcar_contado(track_id)
         
-        if len(historico) >= 2:
-            y_anterior = historico[-2][1]
-            y_atual = centro_y
-            
-            if y_anterior < self.linha_contagem_y and y_atual >= self.linha_contagem_y:
-                if track_id not in self.pessoas_contadas:
-                    self.contador_entrada += 1
-                    self.pessoas_contadas.add(track_id)
-                    print(f"🚶 Pessoa {track_id} ENTROU! Total: {self.contador_entrada}")
-            
-            elif y_anterior > self.linha_contagem_y and y_atual <= self.linha_contagem_y:
-                if track_id not in self.pessoas_contadas:
-                    self.contador_saida += 1
-                    self.pessoas_contadas.add(track_id)
-                    print(f"🚶 Pessoa {track_id} SAIU! Total: {self.contador_saida}")
+        if direcao == "entrada":
+            self.contador_entrada += 1
+            print(f"🚶 Pessoa {track_id} ENTROU! Total: {self.contador_entrada}")
+        else:
+            self.contador_saida += 1
+            print(f"🚶 Pessoa {track_id} SAIU! Total: {self.contador_saida}")
     
     def adicionar_info_tela(self, frame):
         """Adiciona informações na tela com tamanho personalizável"""
         painel_config = self.get_config_painel()
+        
+        # Painel em cache: redesenhado só quando um contador ou o tamanho muda
+        x, y = painel_config["x"], painel_config["y"]
+        w, h = painel_config["largura"], painel_config["altura"]
+        self.sobreposicao.painel(frame, (self.tamanho_painel, self.tamanho_fonte),
+                                 self._desenhar_fundo_painel, self._desenhar_valores_painel,
+                                 (self.contador_entrada, self.contador_saida),
+                                 area=(frame.shape[1], y + h + 3))  # Textos grandes passam da borda
+        
+        # Status da gravação (se ativada)
+        if self.gravando:
+            self.sobreposicao.rotulo(frame, "🔴 GRAVANDO", (frame.shape[1] - 150, 30),
+                                     0.7, (0, 0, 255), 2)
+    
+    def _desenhar_fundo_painel(self, tela):
+        """Fundo, contorno e título do painel"""
+        painel_config = self.get_config_painel()
         fonte_config = self.get_config_fonte()
         
         # Desenha painel
         x, y = painel_config["x"], painel_config["y"]
         w, h = painel_config["largura"], painel_config["altura"]
         
-        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 0), -1)
-        cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 255, 255), 3)
-        
-        # Calcula posições dos textos baseado no tamanho do painel
-        espacamento = h // 5
-        y_texto = y + espacamento
+        cv2.rectangle(tela, (x, y), (x + w, y + h), (0, 0, 0), -1)
+        cv2.rectangle(tela, (x, y), (x + w, y + h), (255, 255, 255), 3)
         
         # Título
-        cv2.putText(frame, "CONTADOR DE PESSOAS", 
-                   (x + 15, y_texto),
+        cv2.putText(tela, "CONTADOR DE PESSOAS", 
+                   (x + 15, y + h // 5),
                    cv2.FONT_HERSHEY_SIMPLEX, fonte_config["titulo"], 
                    (0, 255, 0), fonte_config["espessura"])
+    
+    def _desenhar_valores_painel(self, tela, valores):
+        """Contadores do painel"""
+        painel_config = self.get_config_painel()
+        fonte_config = self.get_config_fonte()
+        entrada, saida = valores
+        
+        # Calcula posições dos textos baseado no tamanho do painel
+        x, y = painel_config["x"], painel_config["y"]
+        espacamento = painel_config["altura"] // 5
+        y_texto = y + espacamento
         
         # Entradas
         y_texto += espacamento
-        cv2.putText(frame, f"Entradas: {self.contador_entrada}", 
+        cv2.putText(tela, f"Entradas: {entrada}", 
                    (x + 15, y_texto),
                    cv2.FONT_HERSHEY_SIMPLEX, fonte_config["texto"], 
                    (0, 255, 0), fonte_config["espessura"] - 1)
         
         # Saídas
         y_texto += espacamento
-        cv2.putText(frame, f"Saidas: {self.contador_saida}", 
+        cv2.putText(tela, f"Saidas: {saida}", 
                    (x + 15, y_texto),
                    cv2.FONT_HERSHEY_SIMPLEX, fonte_config["texto"], 
                    (0, 255, 0), fonte_config["espessura"] - 1)
         
         # Total
         y_texto += espacamento
-        total = self.contador_entrada - self.contador_saida
-        cv2.putText(frame, f"Total Atual: {total}", 
+        total = entrada - saida
+        cv2.putText(tela, f"Total Atual: {total}", 
                    (x + 15, y_texto),
                    cv2.FONT_HERSHEY_SIMPLEX, fonte_config["texto"], 
                    (0, 255, 255), fonte_config["espessura"])
-        
-        # Status da gravação (se ativada)
-        if self.gravando:
-            cv2.putText(frame, "🔴 GRAVANDO", 
-                       (frame.shape[1] - 150, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
     
     def processar_frame(self, frame):
         """Processa frame"""
         if self.linha_contagem_y is None:
             self.definir_linha_contagem(frame)
+        self.indice_frame += 1
         
         results = self.model.track(frame, persist=True, verbose=False)
         
         if results[0].boxes is not None and results[0].boxes.id is not None:
-            boxes = results[0].boxes.xywh.cpu()
-            track_ids = results[0].boxes.id.int().cpu().tolist()
-            confidences = results[0].boxes.conf.float().cpu().tolist()
+            boxes = results[0].boxes.xywh.cpu().numpy()
+            track_ids = results[0].boxes.id.int().cpu().numpy()
+            confidences = results[0].boxes.conf.float().cpu().numpy()
             
-            for box, track_id, conf in zip(boxes, track_ids, confidences):
-                x, y, w, h = box
-                centro_x = int(x)
-                centro_y = int(y)
-                
-                self.track_history[track_id].append((centro_x, centro_y))
-                if len(self.track_history[track_id]) > 30:
-                    self.track_history[track_id].pop(0)
-                
-                self.verificar_passagem(track_id, centro_y)
-                
+            # Atualiza histórico e verifica passagens de todas as pessoas de uma vez
+            _, entrada, saida = self.trilhas.atualizar(track_ids, centros_inteiros(boxes),
+                                                       self.indice_frame, self.linha_contagem_y)
+            for i in np.flatnonzero(entrada | saida):
+                self.registrar_passagem(int(track_ids[i]), "entrada" if entrada[i] else "saida")
+            
+            for (x, y, w, h), track_id, conf in zip(boxes.tolist(), track_ids.tolist(),
+                                                    confidences.tolist()):
                 # Desenha bounding box
                 x1 = int(x - w/2)
                 y1 = int(y - h/2) 
@@ -299,11 +328,12 @@ class ContadorPersonalizavel:
                 y2 = int(y + h/2)
                 
                 cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 3)
+                # Texto muda a cada frame (confiança): desenho direto, sem cache
                 cv2.putText(frame, f'ID: {track_id} ({conf:.2f})', 
                            (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
                 
                 # Rastro (comentado para remover linhas)
-                # pontos = np.array(self.track_history[track_id], dtype=np.int32)
+                # pontos = self.trilhas.historico(track_id).astype(np.int32)
                 # if len(pontos) > 1:
                 #     cv2.polylines(frame, [pontos], False, (0, 255, 255), 3)
         
@@ -333,15 +363,15 @@ class ContadorPersonalizavel:
             self.processar_camera()
     
     def configurar_janela(self, nome_janela):
-        """Configura a janela com o tamanho escolhido"""
+        """Cria a janela com o tamanho escolhido (atualizada em thread própria)"""
         janela_config = self.get_config_janela()
         
         if self.tamanho_janela == "fullscreen":
-            cv2.namedWindow(nome_janela, cv2.WINDOW_NORMAL)
-            cv2.setWindowProperty(nome_janela, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+            janela = ExibidorAssincrono(nome_janela, tela_cheia=True)
         else:
-            cv2.namedWindow(nome_janela, cv2.WINDOW_NORMAL)
-            cv2.resizeWindow(nome_janela, janela_config["largura"], janela_config["altura"])
+            janela = ExibidorAssincrono(nome_janela, tamanho=(janela_config["largura"],
+                                                              janela_config["altura"]))
+        return janela.iniciar()
     
     def processar_video(self, video_path):
         """Processa vídeo com interface personalizada"""
@@ -352,7 +382,7 @@ class ContadorPersonalizavel:
             return
         
         nome_janela = "Contador Personalizado - Vídeo"
-        self.configurar_janela(nome_janela)
+        janela = self.configurar_janela(nome_janela)
         
         print("▶️ Processando vídeo... Pressione 'q' para sair")
         
@@ -373,13 +403,13 @@ class ContadorPersonalizavel:
             # Grava frame se ativado
             self.gravar_frame(frame_processado)
             
-            cv2.imshow(nome_janela, frame_processado)
+            janela.mostrar(frame_processado)
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if janela.tecla() == 'q':
                 break
         
         cap.release()
-        cv2.destroyAllWindows()
+        janela.parar()
         
         # Para gravação se ativa
         self.parar_gravacao()
@@ -395,7 +425,7 @@ class ContadorPersonalizavel:
             return
         
         nome_janela = "Contador Personalizado - Câmera"
-        self.configurar_janela(nome_janela)
+        janela = self.configurar_janela(nome_janela)
         
         print("📹 Câmera ativa... Pressione 'q' para sair")
         
@@ -408,7 +438,7 @@ class ContadorPersonalizavel:
             
             # Inicia gravação no primeiro frame
             if primeiro_frame and hasattr(self, 'configurar_gravacao'):
-                self.iniciar_gravacao(frame)
+                self.iniciar_gravacao(frame, politica=POLITICA_DESCARTAR_CONTANDO)
                 primeiro_frame = False
             
             frame_processado = self.processar_frame(frame)
@@ -416,13 +446,13 @@ class ContadorPersonalizavel:
             # Grava frame se ativado
             self.gravar_frame(frame_processado)
             
-            cv2.imshow(nome_janela, frame_processado)
+            janela.mostrar(frame_processado)
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if janela.tecla() == 'q':
                 break
         
         cap.release()
-        cv2.destroyAllWindows()
+        janela.parar()
         
         # Para gravação se ativa
         self.parar_gravacao()
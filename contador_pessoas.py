@@ -8,8 +8,27 @@
 import cv2  # OpenCV para processamento de imagem e vídeo
 import numpy as np  # NumPy para operações matemáticas com arrays
 from ultralytics import YOLO  # YOLOv8 para detecção de objetos
-from collections import defaultdict  # Para criar dicionários com valores padrão
 import time  # Para operações relacionadas ao tempo
+import sys  # Para medir a memória do histórico de trilhas
+import csv  # Para salvar os eventos do modo headless
+import json  # Para salvar o resumo do modo headless
+from datetime import datetime  # Para carimbar os eventos de passagem
+from contagem import centros_inteiros  # Centros das caixas em lote
+from deteccao import (CONF_RASTREAMENTO, TRACK_BUFFER, DetectorYOLO,  # Detecção em lote
+                      criar_rastreador, rastros_para_xywh)
+from track_store import TrackStore  # Histórico de trilhas em arrays
+from pipeline_video import PipelineVideo, POLITICA_BLOQUEAR  # Pipeline em threads
+from gate_movimento import GateMovimento  # Pula o detector em cenas paradas
+from controle_taxa import ControladorPasso  # Passo de inferência adaptativo
+from regiao_interesse import RegiaoInteresse  # Detecção só perto da linha
+from preprocessamento import CapturaReutilizavel  # Decodifica em buffers reaproveitados
+from sobreposicao import RenderizadorSobreposicao  # Painel, linha e rótulos em cache
+from exibicao import ExibidorAssincrono  # Janela em thread própria, com FPS limitado
+from gravador_eventos import GravadorEventos  # Clipes só em volta das passagens
+from codificadores import PERFIS_CODIFICACAO  # Codificadores dos clipes
+from registro_eventos import RegistroEventos  # Histórico durável das passagens
+from perfil import PerfilEstagios, PERFIL_DESLIGADO  # Tempos por estágio do laço
+from metricas import ServidorMetricas, ColetorContador  # Endpoint /metrics do Prometheus
 
 class ContadorPessoas:
     """
@@ -21,31 +40,66 @@ class ContadorPessoas:
     - Contagem de entradas e saídas baseada em linha virtual
     - Interface visual com informações em tempo real
     """
-    def __init__(self, modelo_path="runs/detect/train/weights/best.pt"):
+    # Resultado de um frame sem ninguém: (boxes, track_ids, confidences)
+    SEM_PESSOAS = (np.zeros((0, 4), np.float32), np.zeros(0, np.int64), np.zeros(0, np.float32))
+    
+    def __init__(self, modelo_path="runs/detect/train/weights/best.pt", detector=None,
+                 backend=None, gate_movimento=None, roi=None):
         """
         Inicializa o contador de pessoas com todas as variáveis necessárias.
         
         Args:
             modelo_path (str): Caminho para o arquivo do modelo YOLO treinado
                               Por padrão usa o modelo treinado em 'runs/detect/train/weights/best.pt'
+            detector: Detector externo com o método detectar_lote(frames) (ex.: um
+                      ClienteInferencia de servidor_inferencia.py). Quando informado, o
+                      modelo YOLO não é carregado neste processo e o rastreamento é
+                      feito por um rastreador próprio do contador.
+            backend (str): "pytorch" (Ultralytics) ou "onnx" (ONNX Runtime na CPU; o .pt
+                           é exportado para .onnx na primeira vez, veja detector_onnx.py).
+                           Padrão: "onnx" para arquivos .onnx (ex.: o modelo INT8 de
+                           quantizar_modelo.py), senão "pytorch". Ignorado com detector externo.
+            gate_movimento (GateMovimento): Pula o detector em frames parados e vazios
+                                            (veja gate_movimento.py). None = detecta sempre.
+            roi (RegiaoInteresse): Envia ao detector só a faixa em volta da linha de
+                                   contagem (veja regiao_interesse.py). None = frame inteiro.
         
         Variáveis inicializadas:
         - self.model: Carrega o modelo YOLO para detecção
-        - self.track_history: Dicionário que armazena o histórico de movimento de cada pessoa
-        - self.pessoas_contadas: Set para evitar contar a mesma pessoa múltiplas vezes
+        - self.detector / self.rastreador: Detector externo e seu rastreador (opcionais)
+        - self.trilhas: Histórico de movimento de cada pessoa (arrays NumPy, veja track_store.py)
+                        e marcação de quem já foi contado (evita contagem dupla)
         - self.contador_entrada: Número total de pessoas que entraram
         - self.contador_saida: Número total de pessoas que saíram
         - self.linha_contagem_y: Posição Y da linha virtual de contagem
         """
         # Carrega o modelo YOLO (pode ser treinado ou pré-treinado)
-        self.model = YOLO(modelo_path)
-        
-        # Dicionário para armazenar histórico de movimento de cada pessoa rastreada
-        # defaultdict cria automaticamente uma lista vazia para novos IDs
-        self.track_history = defaultdict(lambda: [])
+        # Com um detector externo, o modelo fica em outro processo/backend
+        if backend is None:
+            backend = "onnx" if modelo_path.endswith(".onnx") else "pytorch"
+        if detector is None and backend == "onnx":
+            from detector_onnx import criar_detector_onnx
+            # As caixas vão para o rastreador: mesmo limiar do model.track
+            detector = criar_detector_onnx(modelo_path, conf=CONF_RASTREAMENTO)
+        elif backend not in ("pytorch", "onnx"):
+            raise ValueError(f"Backend desconhecido: {backend}")
+        self.detector = detector
+        self.model = YOLO(modelo_path) if detector is None else None
+        self.rastreador = None  # Criado no primeiro frame quando há detector externo
+        self.gate_movimento = gate_movimento  # Opcional: só detecta quando há movimento
+        self.detector_rodou = False  # Se o último detectar_e_contar passou pelo modelo (gate)
+        self.roi = roi  # Opcional: detecta só na faixa da linha de contagem
+        self._detector_proprio = None  # DetectorYOLO do próprio modelo (usado com ROI)
+        self.imgsz = None  # Resolução de entrada do modelo (None = padrão do modelo)
+        self.controlador_passo = None  # Controle de taxa ativo (mostrado no painel)
+        self.sobreposicao = RenderizadorSobreposicao()  # Desenhos fixos prontos para colar
+        self.fps_exibicao = 30.0  # Máximo de redesenhos da janela por segundo
         
-        # Set para armazenar IDs de pessoas já contadas (evita contagem dupla)
-        self.pessoas_contadas = set()
+        # Histórico de movimento de cada pessoa rastreada (últimos 30 centros)
+        # Cada ID ocupa um slot em arrays pré-alocados; também guarda quem já
+        # foi contado (evita contagem dupla)
+        self.trilhas = TrackStore(tamanho_historico=30)
+        self._aviso_ttl = False  # Já avisou que o TTL pedido era curto demais
         
         # Contadores de entrada e saída
         self.contador_entrada = 0  # Pessoas que atravessaram de cima para baixo
@@ -54,6 +108,27 @@ class ContadorPessoas:
         # Posição da linha de contagem (será definida automaticamente)
         self.linha_contagem_y = None
         
+        # Índice do frame sendo analisado e FPS da fonte (para carimbar eventos)
+        self.indice_frame = -1
+        self.fps_fonte = None
+        
+        # Relógio do rastreador: só avança nos frames em que ele rodou (não nos
+        # pulados pelo gate). Mede a idade das trilhas (TTL e despejo)
+        self.frame_rastreador = -1
+        
+        # Funções chamadas a cada entrada/saída registrada (recebem um dict do evento)
+        self.ouvintes_eventos = []
+        
+        # Opcional: grava clipes (com pré-roll) só em volta das passagens,
+        # nos modos vídeo e câmera (veja gravador_eventos.py)
+        self.gravador_eventos = None
+        
+        # Opcional: tempos por estágio (perfil.py) e filas observadas pelo
+        # endpoint de métricas (metricas.py); None = nada é medido
+        self.perfil = None
+        self.arquivo_perfil = None  # JSON com os histogramas ao fim de cada execução
+        self.filas_metricas = {}  # nome -> fila (FilaLimitada, exibidor, gravador...)
+        
     def definir_linha_contagem(self, frame):
         """
         Define automaticamente a linha de contagem no meio vertical da tela.
@@ -92,21 +167,32 @@ class ContadorPessoas:
         - Cor verde (0, 255, 0) para boa visibilidade
         """
         if self.linha_contagem_y is not None:  # Só desenha se a linha foi definida
-            # Desenha linha horizontal verde de uma extremidade à outra
-            cv2.line(frame, 
-                    (0, self.linha_contagem_y),  # Ponto inicial (x=0, y=linha)
-                    (frame.shape[1], self.linha_contagem_y),  # Ponto final (x=largura, y=linha)
-                    (0, 255, 0),  # Cor verde (B, G, R)
-                    3)  # Espessura da linha
+            # Linha e texto são desenhados uma vez por resolução e só colados a cada frame
+            self.sobreposicao.camada(frame, ("linha", self.linha_contagem_y),
+                                     self._desenhar_linha_fixa)
             
-            # Adiciona texto explicativo acima da linha
-            cv2.putText(frame, 
-                       "LINHA DE CONTAGEM",  # Texto a ser exibido
-                       (10, self.linha_contagem_y - 10),  # Posição (x, y)
-                       cv2.FONT_HERSHEY_SIMPLEX,  # Fonte
-                       0.7,  # Tamanho da fonte
-                       (0, 255, 0),  # Cor verde
-                       2)  # Espessura do texto
+            # Com ROI, contorna em cinza a região que vai para o detector
+            if self.roi is not None:
+                x0, y0, x1, y1 = self.roi.retangulo(frame.shape, self.linha_contagem_y)
+                cv2.rectangle(frame, (x0, y0), (x1 - 1, y1 - 1), (128, 128, 128), 1)
+    
+    def _desenhar_linha_fixa(self, tela):
+        """Desenha a linha de contagem e seu texto (usada pelo cache de sobreposições)"""
+        # Desenha linha horizontal verde de uma extremidade à outra
+        cv2.line(tela, 
+                (0, self.linha_contagem_y),  # Ponto inicial (x=0, y=linha)
+                (tela.shape[1], self.linha_contagem_y),  # Ponto final (x=largura, y=linha)
+                (0, 255, 0),  # Cor verde (B, G, R)
+                3)  # Espessura da linha
+        
+        # Adiciona texto explicativo acima da linha
+        cv2.putText(tela, 
+                   "LINHA DE CONTAGEM",  # Texto a ser exibido
+                   (10, self.linha_contagem_y - 10),  # Posição (x, y)
+                   cv2.FONT_HERSHEY_SIMPLEX,  # Fonte
+                   0.7,  # Tamanho da fonte
+                   (0, 255, 0),  # Cor verde
+                   2)  # Espessura do texto
     
     def verificar_passagem(self, track_id, centro_y):
         """
@@ -130,7 +216,7 @@ class ContadorPessoas:
             return
         
         # Obtém o histórico de movimento desta pessoa específica
-        historico = self.track_history[track_id]
+        historico = self.trilhas.historico(track_id)
         
         # Precisa de pelo menos 2 pontos para comparar movimento
         if len(historico) >= 2:
@@ -142,20 +228,55 @@ class ContadorPessoas:
             # DETECÇÃO DE ENTRADA (movimento de cima para baixo)
             # Condições: estava acima da linha E agora está na linha ou abaixo
             if y_anterior < self.linha_contagem_y and y_atual >= self.linha_contagem_y:
-                # Só conta se esta pessoa ainda não foi contada
-                if track_id not in self.pessoas_contadas:
-                    self.contador_entrada += 1  # Incrementa contador de entrada
-                    self.pessoas_contadas.add(track_id)  # Marca como já contada
-                    print(f"🚶 Pessoa {track_id} ENTROU! Total: {self.contador_entrada}")
+                self.registrar_passagem(track_id, "entrada")
             
             # DETECÇÃO DE SAÍDA (movimento de baixo para cima)  
             # Condições: estava abaixo da linha E agora está na linha ou acima
             elif y_anterior > self.linha_contagem_y and y_atual <= self.linha_contagem_y:
-                # Só conta se esta pessoa ainda não foi contada
-                if track_id not in self.pessoas_contadas:
-                    self.contador_saida += 1  # Incrementa contador de saída
-                    self.pessoas_contadas.add(track_id)  # Marca como já contada
-                    print(f"🚶 Pessoa {track_id} SAIU! Total: {self.contador_saida}")
+                self.registrar_passagem(track_id, "saida")
+    
+    def registrar_passagem(self, track_id, direcao):
+        """
+        Conta uma passagem pela linha, se esta pessoa ainda não foi contada.
+        
+        Args:
+            track_id (int): ID da pessoa que atravessou a linha
+            direcao (str): "entrada" (cima para baixo) ou "saida" (baixo para cima)
+        """
+        # Só conta se esta pessoa ainda não foi contada
+        if self.trilhas.foi_contado(track_id):
+            return
+        self.trilhas.marcar_contado(track_id)  # Marca como já contada
+        
+        if direcao == "entrada":
+            self.contador_entrada += 1  # Incrementa contador de entrada
+            print(f"🚶 Pessoa {track_id} ENTROU! Total: {self.contador_entrada}")
+        else:
+            self.contador_saida += 1  # Incrementa contador de saída
+            print(f"🚶 Pessoa {track_id} SAIU! Total: {self.contador_saida}")
+        self.notificar_evento(track_id, direcao)
+    
+    def notificar_evento(self, track_id, direcao):
+        """
+        Avisa os ouvintes registrados em self.ouvintes_eventos sobre uma passagem.
+        
+        Args:
+            track_id (int): ID da pessoa que atravessou a linha
+            direcao (str): "entrada" ou "saida"
+        """
+        if not self.ouvintes_eventos:
+            return
+        
+        evento = {
+            "frame": self.indice_frame,
+            # Tempo dentro do vídeo (só conhecido quando o FPS da fonte foi informado)
+            "tempo_s": round(self.indice_frame / self.fps_fonte, 3) if self.fps_fonte else None,
+            "horario": datetime.now().isoformat(timespec="seconds"),
+            "track_id": int(track_id),
+            "direcao": direcao,
+        }
+        for ouvinte in self.ouvintes_eventos:
+            ouvinte(evento)
     
     def processar_frame(self, frame):
         """
@@ -174,67 +295,214 @@ class ContadorPessoas:
         Returns:
             frame: Frame processado com todas as anotações visuais
         """
+        # PASSOS 1 a 6: detecção, rastreamento e contagem
+        deteccoes = self.detectar_e_contar(frame)
+        
+        # PASSOS 7 a 9: desenhos (caixas, linha e painel)
+        self.desenhar_anotacoes(frame, deteccoes)
+        
+        return frame  # Retorna o frame processado
+    
+    def detectar_e_contar(self, frame):
+        """
+        Executa detecção, rastreamento e contagem em um frame, SEM desenhar nada.
+        
+        Separado do desenho para que a contagem possa rodar em uma thread
+        própria (veja pipeline_video.py), sempre na ordem dos frames.
+        
+        Args:
+            frame: Frame de vídeo a ser analisado
+            
+        Returns:
+            tuple: (boxes, track_ids, confidences) das pessoas rastreadas
+        """
         # PASSO 1: Define a linha de contagem se ainda não foi definida
         if self.linha_contagem_y is None:
             self.definir_linha_contagem(frame)
         
+        # PASSO 1.5: Gate de movimento - cena parada e vazia não passa pelo YOLO
+        # O rastreador não é chamado, então fica exatamente como estava (e o
+        # relógio das trilhas, frame_rastreador, não avança); o gate
+        # só pula depois de TRACK_BUFFER frames detectados sem ninguém, quando
+        # o rastreador já descartou todas as trilhas perdidas
+        perfil = self.perfil or PERFIL_DESLIGADO
+        marca = perfil.agora()
+        gate = self.gate_movimento
+        if gate is not None:
+            precisa = gate.precisa_detectar(frame, self.linha_contagem_y)
+            marca = perfil.marcar("gate", marca)
+            if not precisa:
+                self.detector_rodou = False
+                deteccoes = self.registrar_deteccoes(*self.SEM_PESSOAS, rastreou=False)
+                perfil.marcar("pos_processamento", marca)
+                return deteccoes
+        
+        self.detector_rodou = True
+        rastros = self.rastrear(frame)
+        marca = perfil.marcar("inferencia", marca)
+        deteccoes = self.registrar_deteccoes(*rastros)
+        perfil.marcar("pos_processamento", marca)
+        if gate is not None:
+            gate.informar_pessoas(len(deteccoes[1]))
+        return deteccoes
+    
+    def definir_resolucao(self, imgsz):
+        """
+        Muda a resolução de entrada do detector (ex.: 640 -> 480 sob sobrecarga).
+        
+        Args:
+            imgsz (int): Lado maior da imagem enviada ao modelo
+        """
+        self.imgsz = imgsz
+        for detector in (self.detector, self._detector_proprio):
+            if hasattr(detector, "definir_resolucao"):
+                detector.definir_resolucao(imgsz)
+    
+    def detector_ativo(self):
+        """
+        Detector usado fora do model.track: o externo ou um DetectorYOLO do modelo.
+        
+        O DetectorYOLO filtra com o mesmo limiar do model.track (CONF_RASTREAMENTO),
+        já que as caixas vão para o rastreador.
+        
+        Returns:
+            Objeto com detectar_lote(frames)
+        """
+        if self.detector is not None:
+            return self.detector
+        if self._detector_proprio is None:
+            opcoes = {"imgsz": self.imgsz} if self.imgsz else {}
+            opcoes.setdefault("conf", CONF_RASTREAMENTO)
+            self._detector_proprio = DetectorYOLO(self.model, **opcoes)
+        return self._detector_proprio
+    
+    def detectar_frames(self, detector, frames):
+        """
+        Detecções (sem rastreamento) de vários frames, só na ROI se houver.
+        
+        Returns:
+            list: Deteccoes por frame, em coordenadas do frame inteiro
+        """
+        if self.roi is not None:
+            return self.roi.detectar(detector, frames, self.linha_contagem_y)
+        return detector.detectar_lote(frames)
+    
+    def rastrear(self, frame):
+        """
+        Detecção + rastreamento de um frame (sem contagem).
+        
+        Returns:
+            tuple: (boxes xywh, track_ids, confidences) em arrays NumPy
+        """
         # PASSO 2: Executa detecção + rastreamento com YOLO
         # persist=True mantém o rastreamento entre frames
         # verbose=False evita prints desnecessários
-        results = self.model.track(frame, persist=True, verbose=False)
+        if self.detector is not None or self.roi is not None:
+            # Detector externo (ou ROI): detecção fora do model.track + rastreador
+            # próprio, que recebe as caixas já no frame inteiro
+            if self.rastreador is None:
+                self.rastreador = criar_rastreador()
+            deteccoes = self.detectar_frames(self.detector_ativo(), [frame])[0]
+            rastros = self.rastreador.update(deteccoes, frame)
+            return rastros_para_xywh(rastros)
+        
+        opcoes = {"imgsz": self.imgsz} if self.imgsz else {}
+        results = self.model.track(frame, persist=True, verbose=False, **opcoes)
         
         # PASSO 3: Verifica se foram encontradas pessoas no frame
         if results[0].boxes is not None and results[0].boxes.id is not None:
             # Extrai informações das detecções
-            boxes = results[0].boxes.xywh.cpu()  # Coordenadas das caixas (x, y, width, height)
-            track_ids = results[0].boxes.id.int().cpu().tolist()  # IDs de rastreamento
-            confidences = results[0].boxes.conf.float().cpu().tolist()  # Níveis de confiança
+            # (uma única conversão para NumPy por frame, sem laço por pessoa)
+            boxes = results[0].boxes.xywh.cpu().numpy()  # Coordenadas das caixas (x, y, width, height)
+            track_ids = results[0].boxes.id.int().cpu().numpy()  # IDs de rastreamento
+            confidences = results[0].boxes.conf.float().cpu().numpy()  # Níveis de confiança
+            return boxes, track_ids, confidences
+        return self.SEM_PESSOAS
+    
+    def registrar_deteccoes(self, boxes, track_ids, confidences, rastreou=True):
+        """
+        Atualiza históricos e contadores com as pessoas rastreadas em um frame.
+        
+        Chamada uma vez por frame, sempre na ordem dos frames, tanto pelo
+        modo com janela quanto pelo modo headless em lote.
+        
+        O trabalho é vetorizado: centros, posições anteriores e cruzamentos
+        da linha são calculados para todas as pessoas de uma vez com NumPy,
+        e só quem cruzou a linha passa por registrar_passagem().
+        
+        Args:
+            boxes: Array (N, 4) de caixas (x_centro, y_centro, largura, altura)
+            track_ids: Array (N,) de IDs de rastreamento, na mesma ordem das caixas
+            confidences: Array (N,) de confianças, na mesma ordem das caixas
+            rastreou (bool): False em frames pulados pelo gate (o rastreador não
+                             rodou, então o relógio das trilhas não avança)
             
-            # PASSO 4: Processa cada pessoa detectada individualmente
-            for box, track_id, conf in zip(boxes, track_ids, confidences):
-                x, y, w, h = box  # Desempacota coordenadas da caixa
-                
-                # Calcula o centro da pessoa (ponto usado para rastreamento)
-                centro_x = int(x)  # Posição X do centro
-                centro_y = int(y)  # Posição Y do centro (importante para contagem)
-                
-                # PASSO 5: Atualiza histórico de movimento desta pessoa
-                self.track_history[track_id].append((centro_x, centro_y))
-                
-                # Mantém apenas os últimos 30 pontos para não sobrecarregar memória
-                if len(self.track_history[track_id]) > 30:
-                    self.track_history[track_id].pop(0)  # Remove o ponto mais antigo
-                
-                # PASSO 6: Verifica se esta pessoa atravessou a linha de contagem
-                self.verificar_passagem(track_id, centro_y)
-                
-                # PASSO 7: Desenha a caixa delimitadora (bounding box) ao redor da pessoa
-                # Converte coordenadas do centro+tamanho para coordenadas dos cantos
-                x1 = int(x - w/2)  # Canto superior esquerdo X
-                y1 = int(y - h/2)  # Canto superior esquerdo Y
-                x2 = int(x + w/2)  # Canto inferior direito X
-                y2 = int(y + h/2)  # Canto inferior direito Y
-                
-                # Desenha retângulo azul ao redor da pessoa
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
-                
-                # Adiciona texto com ID e confiança acima da caixa
-                cv2.putText(frame, f'ID: {track_id} ({conf:.2f})', 
-                           (x1, y1 - 10),  # Posição do texto
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-                
-                # PASSO 8: Desenha o rastro/trilha da pessoa (comentado para remover linhas)
-                # pontos = np.array(self.track_history[track_id], dtype=np.int32)
-                # if len(pontos) > 1:  # Precisa de pelo menos 2 pontos para desenhar linha
-                #     cv2.polylines(frame, [pontos], False, (0, 255, 255), 2)
+        Returns:
+            tuple: (boxes, track_ids, confidences) como arrays NumPy, para o desenho
+        """
+        self.indice_frame += 1
+        if rastreou:
+            self.frame_rastreador += 1
+        
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        track_ids = np.asarray(track_ids).astype(np.int64).reshape(-1)
+        confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        
+        # PASSO 4: Calcula o centro de todas as pessoas de uma vez
+        centros = centros_inteiros(boxes)
+        
+        # PASSOS 5 e 6: Atualiza o histórico e verifica quem atravessou a
+        # linha de contagem (vetorizado sobre todas as trilhas do frame)
+        _, entrada, saida = self.trilhas.atualizar(track_ids, centros, self.frame_rastreador,
+                                                   self.linha_contagem_y)
+        for i in np.flatnonzero(entrada | saida):
+            self.registrar_passagem(int(track_ids[i]), "entrada" if entrada[i] else "saida")
+        
+        return boxes, track_ids, confidences
+    
+    def desenhar_anotacoes(self, frame, deteccoes, entrada=None, saida=None):
+        """
+        Desenha caixas, linha de contagem e painel de informações no frame.
+        
+        Args:
+            frame: Frame onde desenhar
+            deteccoes (tuple): Resultado de detectar_e_contar()
+            entrada (int): Contagem de entradas a exibir (padrão: valor atual)
+            saida (int): Contagem de saídas a exibir (padrão: valor atual)
+        """
+        perfil = self.perfil or PERFIL_DESLIGADO
+        marca = perfil.agora()
+        boxes, track_ids, confidences = deteccoes
+        for (x, y, w, h), track_id, conf in zip(boxes.tolist(), track_ids.tolist(),
+                                                confidences.tolist()):
+            # PASSO 7: Desenha a caixa delimitadora (bounding box) ao redor da pessoa
+            # Converte coordenadas do centro+tamanho para coordenadas dos cantos
+            x1 = int(x - w/2)  # Canto superior esquerdo X
+            y1 = int(y - h/2)  # Canto superior esquerdo Y
+            x2 = int(x + w/2)  # Canto inferior direito X
+            y2 = int(y + h/2)  # Canto inferior direito Y
+            
+            # Desenha retângulo azul ao redor da pessoa
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
+            
+            # Adiciona texto com ID e confiança acima da caixa
+            # (desenho direto: a confiança muda a cada frame, um sprite em
+            # cache quase nunca seria reaproveitado)
+            cv2.putText(frame, f'ID: {track_id} ({conf:.2f})', 
+                       (x1, y1 - 10),  # Posição do texto
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+            
+            # PASSO 8: Desenha o rastro/trilha da pessoa (comentado para remover linhas)
+            # pontos = self.trilhas.historico(track_id).astype(np.int32)
+            # if len(pontos) > 1:  # Precisa de pelo menos 2 pontos para desenhar linha
+            #     cv2.polylines(frame, [pontos], False, (0, 255, 255), 2)
         
         # PASSO 9: Adiciona elementos visuais finais
         self.desenhar_linha_contagem(frame)  # Desenha a linha verde de contagem
-        self.adicionar_info_tela(frame)      # Adiciona painel com informações
-        
-        return frame  # Retorna o frame processado
+        self.adicionar_info_tela(frame, entrada, saida)  # Adiciona painel com informações
+        perfil.marcar("desenho", marca)
     
-    def adicionar_info_tela(self, frame):
+    def adicionar_info_tela(self, frame, entrada=None, saida=None):
         """
         Adiciona um painel informativo MAIOR no canto superior esquerdo da tela.
         
@@ -246,17 +514,40 @@ class ContadorPessoas:
         
         Args:
             frame: Frame onde adicionar as informações
+            entrada (int): Entradas a exibir (padrão: self.contador_entrada)
+            saida (int): Saídas a exibir (padrão: self.contador_saida)
         """
+        # Usa os contadores atuais se nenhum valor foi informado
+        # (o pipeline em threads informa os valores do frame exibido)
+        if entrada is None:
+            entrada = self.contador_entrada
+        if saida is None:
+            saida = self.contador_saida
+        
+        # Painel em cache: o fundo é desenhado uma vez e os textos só quando
+        # algum contador muda; nos outros frames ele só é colado
+        self.sobreposicao.painel(frame, "painel", self._desenhar_fundo_painel,
+                                 self._desenhar_valores_painel, (entrada, saida),
+                                 area=(560, 190))
+        
+        # Controle de taxa ativo: passo e resolução atuais logo abaixo do painel
+        if self.controlador_passo is not None:
+            cv2.rectangle(frame, (10, 185), (550, 215), (0, 0, 0), -1)
+            cv2.putText(frame, self.controlador_passo.resumo(),
+                       (25, 207), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (200, 200, 200), 1)
+    
+    def _desenhar_fundo_painel(self, tela):
+        """Parte fixa do painel: fundo, contorno e título"""
         # DESENHA O PAINEL DE FUNDO (MAIOR)
         # Retângulo preto preenchido para fundo do painel - AUMENTADO
-        cv2.rectangle(frame, 
+        cv2.rectangle(tela, 
                      (10, 10),      # Ponto superior esquerdo
                      (550, 180),    # Ponto inferior direito (era 400x120, agora 550x180)
                      (0, 0, 0),     # Cor preta (B, G, R)
                      -1)            # -1 = preenchido
         
         # Contorno branco ao redor do painel
-        cv2.rectangle(frame, 
+        cv2.rectangle(tela, 
                      (10, 10),      # Ponto superior esquerdo
                      (550, 180),    # Ponto inferior direito
                      (255, 255, 255), # Cor branca
@@ -264,32 +555,96 @@ class ContadorPessoas:
         
         # ADICIONA OS TEXTOS INFORMATIVOS (MAIORES)
         # Título principal em verde - FONTE MAIOR
-        cv2.putText(frame, f"CONTADOR DE PESSOAS", 
+        cv2.putText(tela, f"CONTADOR DE PESSOAS", 
                    (25, 50),                    # Posição (x, y) - mais espaçada
                    cv2.FONT_HERSHEY_SIMPLEX,    # Fonte
                    1.0,                         # Tamanho (era 0.7, agora 1.0)
                    (0, 255, 0),                 # Cor verde
                    3)                           # Espessura (era 2, agora 3)
+    
+    def _desenhar_valores_painel(self, tela, valores):
+        """Textos do painel que dependem dos contadores"""
+        entrada, saida = valores
         
         # Contador de entradas - FONTE MAIOR
-        cv2.putText(frame, f"Entradas: {self.contador_entrada}", 
+        cv2.putText(tela, f"Entradas: {entrada}", 
                    (25, 90),                    # Posição (era y=60, agora y=90)
                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)  # Tamanho 0.8 (era 0.6)
         
         # Contador de saídas - FONTE MAIOR
-        cv2.putText(frame, f"Saidas: {self.contador_saida}", 
+        cv2.putText(tela, f"Saidas: {saida}", 
                    (25, 125),                   # Posição (era y=85, agora y=125)
                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)  # Tamanho 0.8 (era 0.6)
         
         # Total atual (entradas - saídas = pessoas presentes) - FONTE MAIOR
-        total_atual = self.contador_entrada - self.contador_saida
-        cv2.putText(frame, f"Total Atual: {total_atual}", 
+        total_atual = entrada - saida
+        cv2.putText(tela, f"Total Atual: {total_atual}", 
                    (25, 160),                   # Posição (era y=110, agora y=160)
                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, 
                    (0, 255, 255),               # Cor amarela para destaque
                    3)                           # Espessura maior para destaque
     
-    def contar_em_video(self, video_path):
+    def preparar_exibicao(self, frame):
+        """
+        Redimensiona o frame processado para uma visualização confortável.
+        
+        Args:
+            frame: Frame já anotado
+            
+        Returns:
+            frame: Frame ampliado (se muito pequeno), reduzido (se muito grande)
+                   ou o próprio frame
+        """
+        height, width = frame.shape[:2]
+        
+        # Se o vídeo for muito pequeno, aumenta para tamanho mínimo
+        if width < 800:
+            scale = 800 / width  # Escala para largura mínima de 800px
+            new_width = int(width * scale)
+            new_height = int(height * scale)
+            frame = cv2.resize(frame, (new_width, new_height))
+            print(f"📈 Vídeo ampliado para: {new_width}x{new_height}")
+        
+        # Se o vídeo for muito grande, reduz para tamanho máximo
+        elif width > 1400:  # Era 1200, agora 1400 para permitir janelas maiores
+            scale = 1400 / width  # Escala para largura máxima de 1400px
+            new_width = int(width * scale)
+            new_height = int(height * scale)
+            frame = cv2.resize(frame, (new_width, new_height))
+            print(f"📉 Vídeo reduzido para: {new_width}x{new_height}")
+        
+        return frame
+    
+    def mostrar_resultados(self):
+        """Mostra o relatório final com entradas, saídas e total atual"""
+        print("\n" + "="*50)
+        print("📊 RESULTADOS FINAIS:")
+        print(f"🚶‍♂️ Pessoas que entraram: {self.contador_entrada}")
+        print(f"🚶‍♀️ Pessoas que saíram: {self.contador_saida}")
+        print(f"👥 Total atual no ambiente: {self.contador_entrada - self.contador_saida}")
+        print("="*50)
+    
+    def fechar_clipes(self):
+        """Termina o clipe por evento em andamento e mostra quanto foi gravado"""
+        if self.gravador_eventos is None:
+            return
+        self.gravador_eventos.fechar()
+        resumo = self.gravador_eventos.resumo()
+        if resumo["frames_vistos"]:
+            print(f"🎞️ Clipes: {resumo['clipes']} em {self.gravador_eventos.pasta} "
+                  f"({resumo['fracao_gravada']:.0%} dos frames gravados)")
+    
+    def relatar_perfil(self):
+        """Tempos por estágio (p50/p95/p99) e FPS ao fim da execução, se o perfil estiver ligado"""
+        if self.perfil is None:
+            return
+        self.perfil.finalizar()
+        self.perfil.imprimir_relatorio()
+        if self.arquivo_perfil:
+            self.perfil.salvar_json(self.arquivo_perfil)
+    
+    def contar_em_video(self, video_path, pipeline=False, tamanho_fila=4,
+                        politica_fila=POLITICA_BLOQUEAR):
         """
         Executa a contagem de pessoas em um arquivo de vídeo.
         
@@ -302,9 +657,26 @@ class ContadorPessoas:
         
         Args:
             video_path (str): Caminho completo para o arquivo de vídeo
+            pipeline (bool): Se True, usa captura, inferência e exibição em
+                             threads separadas (veja pipeline_video.py)
+            tamanho_fila (int): Capacidade das filas entre os estágios do pipeline
+            politica_fila (str): "bloquear" (não perde frames) ou
+                                 "descartar_antigo" (menor latência)
         """
-        # ABRE O ARQUIVO DE VÍDEO
-        cap = cv2.VideoCapture(video_path)
+        # MODO PIPELINE: captura, inferência e exibição em paralelo
+        if pipeline:
+            if self.gravador_eventos is not None:
+                print("⚠️ Clipes por evento não são gravados no modo pipeline")
+            if self.perfil is not None:
+                self.perfil.reiniciar()
+            executor = PipelineVideo(self, tamanho_fila, politica_fila)
+            if executor.executar(video_path):
+                self.mostrar_resultados()
+                self.relatar_perfil()
+            return
+        
+        # ABRE O ARQUIVO DE VÍDEO (decodificando sempre nos mesmos 2 buffers)
+        cap = CapturaReutilizavel(cv2.VideoCapture(video_path))
         
         # Verifica se conseguiu abrir o vídeo
         if not cap.isOpened():
@@ -314,111 +686,414 @@ class ContadorPessoas:
         print("▶️ Iniciando contagem de pessoas no vídeo...")
         print("Pressione 'q' para sair")
         
+        # CLIPES POR EVENTO (opcional): pré/pós-roll medidos em frames do vídeo
+        if self.gravador_eventos is not None:
+            self.gravador_eventos.definir_fps(cap.get(cv2.CAP_PROP_FPS))
+        
+        # JANELA MAIOR, criada uma vez; o redimensionamento para visualização
+        # é feito na thread de exibição, só nos frames que chegam à tela
+        janela = ExibidorAssincrono('Contador de Pessoas', tamanho=(1200, 800),
+                                    fps_max=self.fps_exibicao,
+                                    preparar=self.preparar_exibicao,
+                                    perfil_estagios=self.perfil).iniciar()
+        self.filas_metricas["exibicao"] = janela
+        if self.gravador_eventos is not None:
+            self.gravador_eventos.perfil_estagios = self.perfil
+            self.filas_metricas["clipes"] = self.gravador_eventos
+        
+        # TEMPOS POR ESTÁGIO (só com o perfil ligado; inferência, pós-processamento
+        # e desenho são medidos dentro de processar_frame)
+        if self.perfil is not None:
+            self.perfil.reiniciar()
+        perfil = self.perfil or PERFIL_DESLIGADO
+        
         # LOOP PRINCIPAL - PROCESSA CADA FRAME
         while True:
             # Lê o próximo frame do vídeo
+            marca = perfil.agora()
             ret, frame = cap.read()  # ret = sucesso, frame = imagem
             
             # Se não conseguiu ler (fim do vídeo), sai do loop
             if not ret:
                 break
+            inicio_frame = perfil.marcar("captura", marca)
             
             # PROCESSA O FRAME (detecção + contagem + desenhos)
             frame_processado = self.processar_frame(frame)
             
-            # REDIMENSIONA PARA VISUALIZAÇÃO MAIOR (se muito pequeno ou muito grande)
-            height, width = frame_processado.shape[:2]
-            
-            # Se o vídeo for muito pequeno, aumenta para tamanho mínimo
-            if width < 800:
-                scale = 800 / width  # Escala para largura mínima de 800px
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                frame_processado = cv2.resize(frame_processado, (new_width, new_height))
-                print(f"📈 Vídeo ampliado para: {new_width}x{new_height}")
+            # PRÉ-ROLL / CLIPE ABERTO (só copia ou comprime; a gravação é em outra thread)
+            if self.gravador_eventos is not None:
+                marca = perfil.agora()
+                self.gravador_eventos.adicionar_frame(frame_processado)
+                perfil.marcar("clipes", marca)
             
-            # Se o vídeo for muito grande, reduz para tamanho máximo
-            elif width > 1400:  # Era 1200, agora 1400 para permitir janelas maiores
-                scale = 1400 / width  # Escala para largura máxima de 1400px
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                frame_processado = cv2.resize(frame_processado, (new_width, new_height))
-                print(f"📉 Vídeo reduzido para: {new_width}x{new_height}")
-            
-            # MOSTRA O FRAME PROCESSADO NA TELA (JANELA MAIOR)
-            cv2.namedWindow('Contador de Pessoas', cv2.WINDOW_NORMAL)  # Janela redimensionável
-            cv2.resizeWindow('Contador de Pessoas', 1200, 800)        # Tamanho inicial maior
-            cv2.imshow('Contador de Pessoas', frame_processado)
+            # ENTREGA O FRAME À JANELA (não espera o imshow)
+            marca = perfil.agora()
+            janela.mostrar(frame_processado)
+            perfil.marcar("entrega_tela", marca)
+            perfil.marcar("frame", inicio_frame)
+            perfil.contar_frame()
             
             # VERIFICA SE USUÁRIO QUER SAIR (tecla 'q')
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if janela.tecla() == 'q':
                 break
         
         # FINALIZA E LIMPA RECURSOS
         cap.release()        # Libera o arquivo de vídeo
-        cv2.destroyAllWindows()  # Fecha todas as janelas OpenCV
+        janela.parar()       # Fecha a janela
+        self.fechar_clipes() # Termina o clipe em andamento
         
         # MOSTRA RELATÓRIO FINAL
-        print("\n" + "="*50)
-        print("📊 RESULTADOS FINAIS:")
-        print(f"🚶‍♂️ Pessoas que entraram: {self.contador_entrada}")
-        print(f"🚶‍♀️ Pessoas que saíram: {self.contador_saida}")
-        print(f"👥 Total atual no ambiente: {self.contador_entrada - self.contador_saida}")
-        print("="*50)
+        self.mostrar_resultados()
+        self.relatar_perfil()
+    
+    def contar_headless(self, video_path, tamanho_lote=8, arquivo_json=None, arquivo_csv=None,
+                        parar=None, guardar_eventos=True, ttl_frames=None, max_trilhas=None,
+                        ao_progresso=None):
+        """
+        Conta pessoas em um vídeo gravado SEM janela e SEM desenhos.
+        
+        Ideal para processar gravações durante a noite em servidores sem GPU:
+        1. Lê o vídeo em lotes de N frames
+        2. Roda o detector uma vez por lote (uma única passada no modelo)
+        3. Alimenta o rastreador e a contagem um frame por vez, em ordem
+        4. Salva um resumo em JSON e/ou os eventos em CSV
+        
+        Também serve para fontes ao vivo (câmera ou URL) sem janela, como
+        nos workers do supervisor_cameras.py: use tamanho_lote=1, um evento
+        'parar' e guardar_eventos=False para não acumular eventos na memória.
+        
+        Args:
+            video_path (str | int): Caminho do vídeo, índice de câmera ou URL
+                                    (ou uma captura já aberta, ex.: CapturaCompartilhada)
+            tamanho_lote (int): Número de frames por passada do detector
+            arquivo_json (str): Onde salvar o resumo (entradas, saídas, eventos)
+            arquivo_csv (str): Onde salvar um evento por linha
+            parar (threading.Event | multiprocessing.Event): Encerra quando sinalizado
+            guardar_eventos (bool): Guarda os eventos no resumo (desligue em execuções 24/7)
+            ttl_frames (int): Descarta trilhas não vistas há N frames (veja limpar_trilhas)
+            max_trilhas (int): Limite de trilhas vivas (veja limpar_trilhas)
+            ao_progresso (callable): Chamada após cada lote com o número de frames lidos
+            
+        Returns:
+            dict: Resumo da contagem, ou None se o vídeo não abriu
+        """
+        # Aceita uma captura pronta (ex.: frames direto em memória compartilhada)
+        # Sem captura pronta: decodifica num anel com um buffer por frame do lote + 1
+        cap = (video_path if hasattr(video_path, "read") else
+               CapturaReutilizavel(cv2.VideoCapture(video_path), tamanho_lote + 1))
+        if not cap.isOpened():
+            print("❌ Erro ao abrir o vídeo!")
+            return None
+        
+        # FPS da fonte: usado para o tempo de cada evento
+        self.fps_fonte = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        detector = self.detector_ativo()
+        rastreador = criar_rastreador()
+        
+        # Coleta os eventos desta execução
+        eventos = []
+        if guardar_eventos:
+            self.ouvintes_eventos.append(eventos.append)
+        
+        print(f"⚙️ Modo headless: lotes de {tamanho_lote} frames")
+        inicio = time.monotonic()
+        frames_lidos = 0
+        
+        try:
+            fim_do_video = False
+            while not fim_do_video and not (parar is not None and parar.is_set()):
+                # MONTA O LOTE
+                lote = []
+                while len(lote) < tamanho_lote:
+                    ret, frame = cap.read()
+                    if not ret:
+                        fim_do_video = True
+                        break
+                    lote.append(frame)
+                if not lote:
+                    break
+                frames_lidos += len(lote)
+                
+                if self.linha_contagem_y is None:
+                    self.definir_linha_contagem(lote[0])
+                
+                # GATE DE MOVIMENTO: só os frames com movimento vão ao detector
+                gate = self.gate_movimento
+                if gate is None:
+                    precisa = [True] * len(lote)
+                else:
+                    precisa = [gate.precisa_detectar(f, self.linha_contagem_y) for f in lote]
+                resultados = iter(self.detectar_frames(
+                    detector, [f for f, p in zip(lote, precisa) if p]))
+                
+                # DETECÇÃO EM LOTE, RASTREAMENTO E CONTAGEM FRAME A FRAME
+                for frame, detectar in zip(lote, precisa):
+                    if not detectar:
+                        self.registrar_deteccoes(*self.SEM_PESSOAS, rastreou=False)
+                        continue
+                    rastros = rastreador.update(next(resultados), frame)
+                    _, track_ids, _ = self.registrar_deteccoes(*rastros_para_xywh(rastros))
+                    if gate is not None:
+                        gate.informar_pessoas(len(track_ids))
+                
+                # Memória limitada em execuções longas
+                if ttl_frames is not None or max_trilhas is not None:
+                    self.limpar_trilhas(ttl_frames, max_trilhas)
+                if ao_progresso is not None:
+                    ao_progresso(frames_lidos)
+        finally:
+            if guardar_eventos:
+                self.ouvintes_eventos.remove(eventos.append)
+            cap.release()
+        
+        duracao = time.monotonic() - inicio
+        duracao_video = frames_lidos / self.fps_fonte
+        resumo = {
+            "video": str(getattr(cap, "fonte", video_path)),
+            "frames": frames_lidos,
+            "fps_fonte": self.fps_fonte,
+            "duracao_video_s": round(duracao_video, 3),
+            "duracao_processamento_s": round(duracao, 3),
+            "velocidade_tempo_real": round(duracao_video / duracao, 2) if duracao > 0 else None,
+            "entradas": self.contador_entrada,
+            "saidas": self.contador_saida,
+            "total_atual": self.contador_entrada - self.contador_saida,
+            "frames_pulados_gate": self.gate_movimento.frames_pulados if self.gate_movimento else 0,
+            "eventos": eventos,
+        }
+        if self.gate_movimento is not None:
+            print(f"🚦 Gate de movimento: detector pulado em "
+                  f"{self.gate_movimento.taxa_pulados:.0%} dos frames")
+        if self.roi is not None:
+            print(f"✂️ ROI: detector recebe {self.roi.fracao_pixels:.0%} dos pixels por frame "
+                  f"({self.roi.fracao_pixels_media:.0%} na média desde o início; "
+                  f"altura típica de pessoa {self.roi.altura_pessoa:.0f}px)")
+        # Buffers reaproveitados: só são criados de novo se a resolução muda
+        alocacoes = [f"{nome} {objeto.alocacoes}x" for nome, objeto in
+                     (("captura", cap), ("pré-processamento", getattr(detector, "preprocessador", None)))
+                     if hasattr(objeto, "alocacoes")]
+        if alocacoes:
+            print(f"♻️ Buffers alocados em {frames_lidos} frames: {', '.join(alocacoes)}")
+        
+        # SALVA OS RESULTADOS
+        if arquivo_json:
+            with open(arquivo_json, "w", encoding="utf-8") as f:
+                json.dump(resumo, f, ensure_ascii=False, indent=2)
+            print(f"💾 Resumo salvo em: {arquivo_json}")
+        if arquivo_csv:
+            with open(arquivo_csv, "w", newline="", encoding="utf-8") as f:
+                escritor = csv.DictWriter(f, fieldnames=["frame", "tempo_s", "horario",
+                                                         "track_id", "direcao"])
+                escritor.writeheader()
+                escritor.writerows(eventos)
+            print(f"💾 Eventos salvos em: {arquivo_csv}")
+        
+        print(f"⚡ {frames_lidos} frames em {duracao:.1f}s "
+              f"({resumo['velocidade_tempo_real']}x tempo real)")
+        self.mostrar_resultados()
+        return resumo
+    
+    def limpar_trilhas(self, ttl_frames=None, max_trilhas=None):
+        """
+        Remove trilhas antigas para a memória não crescer em execuções 24/7.
+        
+        O ByteTrack/BoT-SORT entrega um ID novo para cada pessoa que aparece,
+        então sem limpeza o histórico ganha uma entrada por pessoa para sempre.
+        Os totais de entrada/saída NÃO são afetados: eles ficam em
+        self.contador_entrada / self.contador_saida.
+        
+        Trilhas que o rastreador ainda guarda (TRACK_BUFFER frames) nunca são
+        removidas: uma pessoa "reencontrada" com o mesmo ID seria contada de novo.
+        
+        Args:
+            ttl_frames (int): Remove trilhas não vistas há mais que isso (em frames do
+                              rastreador, veja frame_rastreador). Valores menores que TRACK_BUFFER sobem para TRACK_BUFFER.
+            max_trilhas (int): Limite de trilhas vivas (remove as mais antigas entre
+                               as que o rastreador já descartou)
+            
+        Returns:
+            int: Quantas trilhas foram removidas
+        """
+        removidas = 0
+        if ttl_frames is not None:
+            if ttl_frames < TRACK_BUFFER:
+                if not self._aviso_ttl:
+                    print(f"⚠️ TTL de {ttl_frames} frames é menor que o track_buffer do "
+                          f"rastreador: usando {TRACK_BUFFER} frames")
+                    self._aviso_ttl = True
+                ttl_frames = TRACK_BUFFER
+            removidas += self.trilhas.remover_inativos(self.frame_rastreador, ttl_frames)
+        if max_trilhas is not None:
+            removidas += self.trilhas.limitar(max_trilhas, self.frame_rastreador, TRACK_BUFFER)
+        return removidas
+    
+    def status_memoria(self):
+        """
+        Resumo de uso de memória do histórico de trilhas.
+        
+        Returns:
+            dict: trilhas vivas, trilhas removidas e bytes ocupados
+        """
+        return {
+            "trilhas_vivas": len(self.trilhas),
+            "trilhas_removidas": self.trilhas.removidas,
+            "bytes": self.trilhas.nbytes + sys.getsizeof(self.trilhas.slot_de),
+        }
     
-    def contar_em_camera(self, camera_id=0):
+    def contar_em_camera(self, camera_id=0, ttl_frames=None, ttl_segundos=None,
+                         max_trilhas=None, intervalo_status_s=60, controlador=None):
         """
         Executa a contagem de pessoas usando câmera ao vivo.
         
         Funciona igual ao vídeo, mas captura frames em tempo real
         da câmera conectada ao computador.
         
+        MODO CONTÍNUO (24/7): informe ttl_frames ou ttl_segundos e/ou
+        max_trilhas para que trilhas antigas sejam descartadas e a memória
+        fique limitada. O status periódico mostra o uso de memória.
+        
+        CONTROLE DE TAXA: com um ControladorPasso (controle_taxa.py) o detector
+        roda só a cada N frames, com N (e a resolução) ajustados ao vivo para
+        manter o FPS alvo; nos frames intermediários as últimas caixas são redesenhadas.
+        
         Args:
             camera_id (int): ID da câmera (0 = câmera padrão, 1 = segunda câmera, etc.)
+            ttl_frames (int): Descarta trilhas não vistas há esse número de frames
+            ttl_segundos (float): Igual ao anterior, em segundos (convertido pelo FPS medido)
+            max_trilhas (int): Limite de trilhas vivas (veja limpar_trilhas)
+            intervalo_status_s (float): Intervalo entre as linhas de status no terminal
+            controlador (ControladorPasso): Ajuste adaptativo do passo de inferência
         """
-        # ABRE A CÂMERA
-        cap = cv2.VideoCapture(camera_id)
+        # ABRE A CÂMERA (decodificando sempre nos mesmos 2 buffers)
+        cap = CapturaReutilizavel(cv2.VideoCapture(camera_id))
         
         # Verifica se conseguiu abrir a câmera
         if not cap.isOpened():
             print("❌ Erro ao abrir a câmera!")
             return
         
+        modo_continuo = ttl_frames is not None or ttl_segundos is not None or max_trilhas is not None
+        
         print("📹 Iniciando contagem de pessoas na câmera...")
+        if modo_continuo:
+            print(f"♾️ Modo contínuo: TTL={ttl_frames or ttl_segundos}"
+                  f"{' frames' if ttl_frames else ' s'}, máximo de trilhas={max_trilhas}")
         print("Pressione 'q' para sair")
         
+        # Controle do status periódico e do FPS medido
+        fps_medido = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        ultimo_status = time.monotonic()
+        frames_desde_status = 0
+        
+        # CONTROLE DE TAXA (opcional): passo e resolução adaptativos
+        self.controlador_passo = controlador
+        if controlador is not None:
+            controlador.ao_mudar_resolucao(self.definir_resolucao)
+            print(f"🎚️ Controle de taxa: alvo {controlador.fps_alvo} FPS, "
+                  f"passo até {controlador.passo_max}")
+        deteccoes = self.SEM_PESSOAS
+        
+        # CLIPES POR EVENTO (opcional): o FPS é corrigido a cada status
+        if self.gravador_eventos is not None:
+            self.gravador_eventos.definir_fps(fps_medido)
+        
+        # JANELA MAIOR E REDIMENSIONÁVEL PARA CÂMERA (criada uma vez, em outra thread)
+        janela = ExibidorAssincrono('Contador de Pessoas - Camera', tamanho=(1000, 700),
+                                    fps_max=self.fps_exibicao,
+                                    perfil_estagios=self.perfil).iniciar()
+        self.filas_metricas["exibicao"] = janela
+        if self.gravador_eventos is not None:
+            self.gravador_eventos.perfil_estagios = self.perfil
+            self.filas_metricas["clipes"] = self.gravador_eventos
+        
+        # TEMPOS POR ESTÁGIO (só com o perfil ligado; inferência, pós-processamento
+        # e desenho são medidos dentro de detectar_e_contar/desenhar_anotacoes)
+        if self.perfil is not None:
+            self.perfil.reiniciar()
+        perfil = self.perfil or PERFIL_DESLIGADO
+        
         # LOOP PRINCIPAL - CAPTURA E PROCESSA FRAMES EM TEMPO REAL
         while True:
             # Captura frame atual da câmera
+            marca = perfil.agora()
             ret, frame = cap.read()
             if not ret:
                 break
+            perfil.marcar("captura", marca)
+            inicio_frame = time.perf_counter()  # Trabalho do frame, sem a espera pela câmera
             
             # PROCESSA O FRAME (mesma lógica do vídeo)
-            frame_processado = self.processar_frame(frame)
+            # Com controle de taxa, só alguns frames passam pelo detector
+            inferiu = controlador is None or controlador.deve_inferir()
+            # Frame que o gate de movimento pulou não conta como inferência para
+            # o controle de taxa (senão a cena vazia puxa a média para ~0 ms)
+            detectou = False
+            if inferiu:
+                deteccoes = self.detectar_e_contar(frame)
+                detectou = self.detector_rodou
+                if controlador is not None and detectou:
+                    controlador.registrar_inferencia(time.perf_counter() - inicio_frame)
+            self.desenhar_anotacoes(frame, deteccoes)
+            frame_processado = frame
             
-            # CONFIGURA JANELA MAIOR E REDIMENSIONÁVEL PARA CÂMERA
-            cv2.namedWindow('Contador de Pessoas - Camera', cv2.WINDOW_NORMAL)
-            cv2.resizeWindow('Contador de Pessoas - Camera', 1000, 700)  # Janela maior para câmera
+            # MODO CONTÍNUO: descarta trilhas que sumiram há muito tempo
+            # (o TTL conta só os frames em que o rastreador rodou: nem os pulados
+            # pelo controle de taxa nem os pulados pelo gate de movimento)
+            if modo_continuo and inferiu:
+                ttl = ttl_frames
+                if ttl is None and ttl_segundos is not None:
+                    passo = controlador.passo if controlador is not None else 1
+                    ttl = int(ttl_segundos * fps_medido / passo)
+                self.limpar_trilhas(ttl, max_trilhas)
             
-            # MOSTRA O RESULTADO EM TEMPO REAL
-            cv2.imshow('Contador de Pessoas - Camera', frame_processado)
+            # STATUS PERIÓDICO (contagem + memória)
+            frames_desde_status += 1
+            agora = time.monotonic()
+            if agora - ultimo_status >= intervalo_status_s:
+                fps_medido = frames_desde_status / (agora - ultimo_status)
+                memoria = self.status_memoria()
+                print(f"📊 Status: entradas={self.contador_entrada} saídas={self.contador_saida} "
+                      f"| {fps_medido:.1f} FPS | trilhas vivas={memoria['trilhas_vivas']} "
+                      f"removidas={memoria['trilhas_removidas']} "
+                      f"memória={memoria['bytes'] / 1024:.1f} KB"
+                      + (f" | gate pulou {self.gate_movimento.taxa_pulados:.0%}"
+                         if self.gate_movimento else "")
+                      + (f" | {controlador.resumo()}" if controlador is not None else ""))
+                ultimo_status = agora
+                frames_desde_status = 0
+                if self.gravador_eventos is not None:
+                    self.gravador_eventos.definir_fps(fps_medido)
+            
+            # PRÉ-ROLL / CLIPE ABERTO
+            if self.gravador_eventos is not None:
+                marca = perfil.agora()
+                self.gravador_eventos.adicionar_frame(frame_processado)
+                perfil.marcar("clipes", marca)
+            
+            # MOSTRA O RESULTADO EM TEMPO REAL (sem esperar a janela)
+            marca = perfil.agora()
+            janela.mostrar(frame_processado)
+            perfil.marcar("entrega_tela", marca)
+            perfil.observar("frame", time.perf_counter() - inicio_frame)
+            perfil.contar_frame()
             
             # VERIFICA SE USUÁRIO QUER SAIR
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if janela.tecla() == 'q':
                 break
+            
+            if controlador is not None:
+                controlador.registrar_frame(time.perf_counter() - inicio_frame, detectou)
         
         # FINALIZA RECURSOS
         cap.release()
-        cv2.destroyAllWindows()
+        janela.parar()
+        self.controlador_passo = None
+        self.fechar_clipes()
         
         # MOSTRA ESTATÍSTICAS FINAIS
-        print("\n" + "="*50)
-        print("📊 RESULTADOS FINAIS:")
-        print(f"🚶‍♂️ Pessoas que entraram: {self.contador_entrada}")  
-        print(f"🚶‍♀️ Pessoas que saíram: {self.contador_saida}")
-        print(f"👥 Total atual no ambiente: {self.contador_entrada - self.contador_saida}")
-        print("="*50)
+        self.mostrar_resultados()
+        self.relatar_perfil()
 
 # ========================================
 # FUNÇÃO PRINCIPAL DO PROGRAMA
@@ -439,11 +1114,68 @@ def main():
     2. Contar pessoas na câmera ao vivo
     3. Sair do programa
     """
+    import argparse
+    import os
+    
+    # ARGUMENTOS DE LINHA DE COMANDO (opcionais - sem eles o menu é exibido)
+    parser = argparse.ArgumentParser(description="Contador de Pessoas com YOLO")
+    parser.add_argument("--headless", metavar="VIDEO",
+                        help="Processa o vídeo sem janela e sai (modo em lote)")
+    parser.add_argument("--lote", type=int, default=8,
+                        help="Frames por passada do detector no modo headless")
+    parser.add_argument("--json", help="Arquivo JSON para o resumo do modo headless")
+    parser.add_argument("--csv", help="Arquivo CSV para os eventos do modo headless")
+    parser.add_argument("--modelo", default="runs/detect/train/weights/best.pt",
+                        help="Caminho do modelo YOLO")
+    parser.add_argument("--backend", choices=["pytorch", "onnx"],
+                        help="Motor de inferência (padrão: onnx para modelos .onnx, "
+                             "ex.: o INT8 de quantizar_modelo.py)")
+    parser.add_argument("--gate-movimento", action="store_true",
+                        help="Pula o detector em frames parados e sem pessoas")
+    parser.add_argument("--banda-gate", type=int, metavar="PX",
+                        help="Gate só olha a faixa linha ± PX pixels (padrão: frame inteiro)")
+    parser.add_argument("--roi", action="store_true",
+                        help="Detecta só numa faixa em volta da linha de contagem "
+                             "(com --altura-pessoa já começa na faixa certa)")
+    parser.add_argument("--altura-pessoa", type=float, metavar="PX",
+                        help="Altura típica de uma pessoa na imagem (padrão: aprendida)")
+    parser.add_argument("--fps-alvo", type=float,
+                        help="Câmera: ajusta o passo de inferência para manter este FPS")
+    parser.add_argument("--latencia-alvo-ms", type=float,
+                        help="Câmera: reduz a resolução se a inferência passar deste tempo")
+    parser.add_argument("--resolucoes", default="",
+                        help="Câmera: resoluções permitidas ao controle de taxa (ex.: 640,480,320)")
+    parser.add_argument("--camera", type=int, metavar="ID",
+                        help="Conta direto na câmera informada, sem menu")
+    parser.add_argument("--ttl-segundos", type=float,
+                        help="Modo contínuo: descarta trilhas não vistas há N segundos")
+    parser.add_argument("--max-trilhas", type=int,
+                        help="Modo contínuo: limite de trilhas vivas (trilhas que o rastreador ainda guarda não saem)")
+    parser.add_argument("--fps-tela", type=float, default=30.0,
+                        help="Máximo de redesenhos da janela por segundo (não limita o processamento)")
+    parser.add_argument("--clipes", metavar="PASTA",
+                        help="Grava só clipes em volta de cada entrada/saída nesta pasta")
+    parser.add_argument("--pre-roll", type=float, default=5.0,
+                        help="Segundos antes da passagem incluídos em cada clipe")
+    parser.add_argument("--pos-roll", type=float, default=5.0,
+                        help="Segundos gravados depois da última passagem do clipe")
+    parser.add_argument("--perfil-clipes", default="opencv", choices=list(PERFIS_CODIFICACAO),
+                        help="Codificador dos clipes (x264/x265 precisam do ffmpeg)")
+    parser.add_argument("--registro", metavar="PASTA",
+                        help="Anexa cada passagem ao registro binário desta pasta "
+                             "(consulte com: python registro_eventos.py PASTA --por hora)")
+    parser.add_argument("--perfil", nargs="?", const="perfil_estagios.json", metavar="JSON",
+                        help="Mede cada estágio do laço, mostra p50/p95/p99 ao final e salva "
+                             "os histogramas neste JSON (padrão: perfil_estagios.json)")
+    parser.add_argument("--metricas", type=int, metavar="PORTA",
+                        help="Expõe contagens, FPS, latências e filas em "
+                             "http://0.0.0.0:PORTA/metrics (formato do Prometheus)")
+    args = parser.parse_args()
+    
     print("🤖 Iniciando Contador de Pessoas com YOLO")
     
     # VERIFICA QUAL MODELO USAR
-    import os
-    modelo_path = "runs/detect/train/weights/best.pt"  # Modelo treinado
+    modelo_path = args.modelo  # Modelo treinado
     
     # Se não existe modelo treinado, usa o pré-treinado
     if not os.path.exists(modelo_path):
@@ -453,7 +1185,43 @@ def main():
         modelo_path = "yolov8n.pt"  # Modelo pré-treinado genérico
     
     # CRIA O CONTADOR COM O MODELO ESCOLHIDO
-    contador = ContadorPessoas(modelo_path)
+    gate = GateMovimento(banda_px=args.banda_gate) if args.gate_movimento else None
+    roi = RegiaoInteresse(args.altura_pessoa) if args.roi or args.altura_pessoa else None
+    contador = ContadorPessoas(modelo_path, backend=args.backend, gate_movimento=gate, roi=roi)
+    contador.fps_exibicao = args.fps_tela
+    if args.registro:
+        # Flush periódico em outra thread; o fechamento final é feito ao sair
+        contador.ouvintes_eventos.append(RegistroEventos(args.registro).ouvinte(fonte=0))
+    if args.clipes:
+        contador.gravador_eventos = GravadorEventos(
+            args.clipes, pre_segundos=args.pre_roll, pos_segundos=args.pos_roll,
+            perfil=args.perfil_clipes,
+            # Câmera ao vivo: se a codificação atrasar, descarta (e conta) em vez de travar
+            politica="descartar_contando" if args.camera is not None else "bloquear"
+        ).conectar(contador)
+    if args.perfil or args.metricas is not None:
+        contador.perfil = PerfilEstagios()
+        contador.arquivo_perfil = args.perfil
+    if args.metricas is not None:
+        # O servidor só lê contadores já mantidos pelo laço (não trava o processamento)
+        ServidorMetricas(args.metricas).adicionar(
+            ColetorContador(contador, fonte=args.camera if args.camera is not None else 0)).iniciar()
+    
+    # MODO HEADLESS: processa o vídeo e sai, sem menu
+    if args.headless:
+        contador.contar_headless(args.headless, args.lote, args.json, args.csv)
+        return
+    
+    # CÂMERA DIRETA (ex.: serviço 24/7), opcionalmente com limite de memória
+    if args.camera is not None:
+        controlador = None
+        if args.fps_alvo or args.latencia_alvo_ms:
+            resolucoes = [int(r) for r in args.resolucoes.split(",") if r.strip()]
+            controlador = ControladorPasso(args.fps_alvo or 25.0, args.latencia_alvo_ms,
+                                           resolucoes=resolucoes)
+        contador.contar_em_camera(args.camera, ttl_segundos=args.ttl_segundos,
+                                  max_trilhas=args.max_trilhas, controlador=controlador)
+        return
     
     # MOSTRA MENU DE OPÇÕES
     print("\n" + "="*50)
@@ -475,7 +1243,10 @@ def main():
             
             # Verifica se o arquivo existe
             if os.path.exists(video_path):
-                contador.contar_em_video(video_path)  # Executa contagem
+                # Pipeline em threads: captura, inferência e exibição em paralelo
+                usar_pipeline = input("Usar pipeline em threads? (s/N): ").strip().lower()
+                contador.contar_em_video(video_path,
+                                         pipeline=usar_pipeline in ['s', 'sim', 'y', 'yes'])
             else:
                 print("❌ Arquivo de vídeo não encontrado!")
         
@@ -10,6 +10,10 @@
 import cv2  # OpenCV para captura de câmera e processamento de imagem
 from ultralytics import YOLO  # YOLOv8 para detecção de pessoas
 import os   # Para verificar arquivos
+from gate_movimento import GateMovimento  # Pula o YOLO quando a cena está parada
+from controle_taxa import ControladorPasso  # Passo de detecção adaptativo
+import time  # Mede o tempo de cada frame para o controle de taxa
+from exibicao import ExibidorAssincrono  # Janela em thread própria, com FPS limitado
 
 def contador_simples():
     """
@@ -58,6 +62,12 @@ def contador_simples():
     # Variáveis de controle
     pessoas_detectadas = 0  # Número atual de pessoas na tela
     frame_count = 0         # Contador de frames para otimização
+    gate = GateMovimento()  # Só detecta com movimento ou com pessoas na tela
+    # Passo de detecção ajustado ao vivo para acompanhar o FPS da câmera
+    controle = ControladorPasso(fps_alvo=cap.get(cv2.CAP_PROP_FPS) or 25)
+    
+    # Janela redimensionável e maior, criada uma vez e atualizada em outra thread
+    janela = ExibidorAssincrono('Contador Simples de Pessoas', tamanho=(900, 650)).iniciar()
     
     print("📹 Câmera aberta! Pressione 'q' para sair")
     
@@ -71,10 +81,14 @@ def contador_simples():
             break
         
         frame_count += 1
+        inicio_frame = time.perf_counter()
         
-        # OTIMIZAÇÃO: Faz detecção apenas a cada 5 frames
-        # Isso melhora a performance sem perder muito da precisão
-        if frame_count % 5 == 0:
+        # OTIMIZAÇÃO: Faz detecção apenas a cada N frames (N ajustado pelo
+        # controle de taxa: 1 numa máquina rápida, mais numa lenta)
+        # e, com a cena parada e vazia, nem nesses frames (gate de movimento)
+        # (inferiu = o YOLO rodou de fato; só esses frames entram na média do controle)
+        inferiu = controle.deve_inferir() and gate.precisa_detectar(frame)
+        if inferiu:
             # Executa detecção YOLO no frame atual
             results = model(frame, verbose=False)  # verbose=False evita prints
             
@@ -104,6 +118,8 @@ def contador_simples():
             
             # Atualiza contador global
             pessoas_detectadas = pessoas_no_frame
+            gate.informar_pessoas(pessoas_no_frame)
+            controle.registrar_inferencia(time.perf_counter() - inicio_frame)
         
         # ========================================
         # ETAPA 5: INTERFACE VISUAL - PAINEL DE INFORMAÇÕES (MAIOR)
@@ -127,23 +143,28 @@ def contador_simples():
                    (25, 110),  # Nova linha com info do modelo
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
         
+        # PASSO ATUAL DO CONTROLE DE TAXA (faixa logo abaixo do painel)
+        cv2.rectangle(frame, (10, 125), (400, 150), (0, 0, 0), -1)
+        cv2.putText(frame, controle.resumo(), 
+                   (25, 143), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1)
+        
         # ========================================
         # ETAPA 6: MOSTRA O RESULTADO (JANELA MAIOR)
         # ========================================
-        # Configura janela redimensionável e maior
-        cv2.namedWindow('Contador Simples de Pessoas', cv2.WINDOW_NORMAL)
-        cv2.resizeWindow('Contador Simples de Pessoas', 900, 650)  # Janela maior
-        cv2.imshow('Contador Simples de Pessoas', frame)
+        # Entrega o frame à janela (sem esperar o imshow)
+        janela.mostrar(frame)
         
         # Verifica se usuário pressionou 'q' para sair
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if janela.tecla() == 'q':
             break
+        
+        controle.registrar_frame(time.perf_counter() - inicio_frame, inferiu)
     
     # ========================================
     # ETAPA 7: LIMPEZA E FINALIZAÇÃO
     # ========================================
     cap.release()         # Libera a câmera
-    cv2.destroyAllWindows()  # Fecha janelas do OpenCV
+    janela.parar()        # Fecha a janela do OpenCV
     print(f"🎯 Sessão finalizada!")
 
 # ========================================
@@ -0,0 +1,47 @@
+# ========================================
+# LÓGICA DE CONTAGEM VETORIZADA
+# ========================================
+# Versão em NumPy da regra de verificar_passagem, aplicada a todas as
+# pessoas do frame de uma vez. Só as trilhas que realmente cruzaram a
+# linha voltam para o código Python.
+
+import numpy as np  # Operações vetorizadas
+
+
+def detectar_cruzamentos(y_anterior, y_atual, tem_anterior, linha_y):
+    """
+    Calcula quais trilhas cruzaram a linha de contagem neste frame.
+
+    Mesma regra de ContadorPessoas.verificar_passagem:
+    - ENTRADA: estava acima da linha e agora está na linha ou abaixo
+    - SAÍDA: estava abaixo da linha e agora está na linha ou acima
+
+    Args:
+        y_anterior: Array (N,) com o Y do ponto anterior de cada trilha
+        y_atual: Array (N,) com o Y atual de cada trilha
+        tem_anterior: Array booleano (N,), False para trilhas sem ponto anterior
+        linha_y (int): Posição Y da linha de contagem
+
+    Returns:
+        tuple: (mascara_entrada, mascara_saida), arrays booleanos (N,)
+    """
+    y_anterior = np.asarray(y_anterior)
+    y_atual = np.asarray(y_atual)
+    tem_anterior = np.asarray(tem_anterior, dtype=bool)
+
+    entrada = tem_anterior & (y_anterior < linha_y) & (y_atual >= linha_y)
+    saida = tem_anterior & (y_anterior > linha_y) & (y_atual <= linha_y)
+    return entrada, saida
+
+
+def centros_inteiros(xywh):
+    """
+    Centros das caixas como inteiros, truncados como int(x) do Python.
+
+    Args:
+        xywh: Array (N, 4) com x_centro, y_centro, largura, altura
+
+    Returns:
+        np.ndarray: Array (N, 2) int32 com (centro_x, centro_y)
+    """
+    return np.asarray(xywh, dtype=np.float32)[:, :2].astype(np.int32)
@@ -0,0 +1,189 @@
+# ========================================
+# CONTROLE ADAPTATIVO DO PASSO DE INFERÊNCIA
+# ========================================
+# Em vez de um "frame_count % 5" fixo, mede quanto custa cada inferência e
+# cada frame sem inferência e escolhe, em tempo de execução:
+# - o passo (detecta 1 a cada N frames) que mantém o FPS alvo
+# - opcionalmente a resolução de entrada do modelo (ex.: 640 -> 480 -> 320)
+#   quando nem o passo máximo basta ou quando a latência passa do limite
+# Numa máquina rápida o passo volta para 1 (máxima precisão); numa lenta ou
+# sobrecarregada o passo sobe até passo_max e a resolução cai, em vez de a
+# fila da câmera crescer e a imagem ficar cada vez mais atrasada.
+#
+# Uso:
+#   controle = ControladorPasso(fps_alvo=25)
+#   if controle.deve_inferir():
+#       inicio = time.perf_counter(); ...detecta...
+#       controle.registrar_inferencia(time.perf_counter() - inicio)
+#   controle.registrar_frame(tempo_de_trabalho_do_frame)
+
+import math  # Arredondamento do passo
+import time  # FPS real do laço
+
+
+class ControladorPasso:
+    """Ajusta o passo (e a resolução) de inferência para caber no orçamento de tempo"""
+
+    def __init__(self, fps_alvo=25.0, latencia_alvo_ms=None, passo_min=1, passo_max=10,
+                 resolucoes=None, intervalo_ajuste=15, suavizacao=0.2, mostrar_log=True):
+        """
+        Args:
+            fps_alvo (float): Frames por segundo que o laço deve sustentar
+            latencia_alvo_ms (float): Tempo máximo de uma inferência (reduz a resolução)
+            passo_min (int): Menor passo (1 = detecta todo frame)
+            passo_max (int): Maior passo aceito, mesmo sob sobrecarga
+            resolucoes (list): Resoluções de entrada, da maior para a menor
+                               (ex.: [640, 480, 320]); None não mexe na resolução
+            intervalo_ajuste (int): Frames entre reavaliações (evita oscilação)
+            suavizacao (float): Peso das novas medidas na média móvel (0-1)
+            mostrar_log (bool): Imprime cada mudança de passo/resolução
+        """
+        self.fps_alvo = fps_alvo
+        self.latencia_alvo = latencia_alvo_ms / 1000 if latencia_alvo_ms else None
+        self.passo_min = passo_min
+        self.passo_max = passo_max
+        self.resolucoes = list(resolucoes) if resolucoes else []
+        self.intervalo_ajuste = intervalo_ajuste
+        self.suavizacao = suavizacao
+        self.mostrar_log = mostrar_log
+
+        self.passo = passo_min
+        self.indice_resolucao = 0
+        self.tempo_inferencia = None  # Média móvel (s) de um frame com inferência
+        self.tempo_leve = 0.0         # Média móvel (s) de um frame sem inferência
+        self._ultima_inferencia = 0.0
+        self.fps_medido = 0.0  # FPS real do laço (inclui a espera pela câmera)
+        self._ultimo_frame = None
+        self._frames_desde_inferencia = None  # None = ainda não inferiu
+        self._frames_desde_ajuste = 0
+        self._ao_mudar_resolucao = []
+
+        # Estatísticas
+        self.frames = 0
+        self.inferencias = 0  # Frames em que o detector rodou de fato (registrar_inferencia)
+        self.sobrecarga = False
+
+    @property
+    def resolucao(self):
+        """Resolução de entrada atual (None se não controla a resolução)"""
+        return self.resolucoes[self.indice_resolucao] if self.resolucoes else None
+
+    def ao_mudar_resolucao(self, funcao):
+        """Registra uma função chamada com a nova resolução (ex.: contador.definir_resolucao)"""
+        self._ao_mudar_resolucao.append(funcao)
+        if self.resolucao is not None:
+            funcao(self.resolucao)
+
+    def deve_inferir(self):
+        """True se este frame deve passar pelo detector"""
+        self.frames += 1
+        if (self._frames_desde_inferencia is None or
+                self._frames_desde_inferencia + 1 >= self.passo):
+            self._frames_desde_inferencia = 0
+            return True
+        self._frames_desde_inferencia += 1
+        return False
+
+    def _media(self, atual, nova):
+        return nova if atual is None else atual + self.suavizacao * (nova - atual)
+
+    def registrar_inferencia(self, segundos):
+        """
+        Informa quanto tempo levou a detecção + rastreamento deste frame.
+
+        Chame só quando o detector rodou de fato: um frame liberado por
+        deve_inferir() mas pulado pelo gate de movimento custaria ~0 ms e
+        deixaria o passo agressivo demais quando alguém aparecer.
+        """
+        self.inferencias += 1
+        self._ultima_inferencia = segundos
+        self.tempo_inferencia = self._media(self.tempo_inferencia, segundos)
+
+    def registrar_frame(self, segundos, inferiu=None):
+        """
+        Informa o tempo de trabalho do frame inteiro (sem a espera pela câmera).
+
+        Args:
+            segundos (float): Tempo do frame, da leitura pronta até a exibição
+            inferiu (bool): Se o frame teve inferência (padrão: o último deve_inferir)
+        """
+        if inferiu is None:
+            inferiu = self._frames_desde_inferencia == 0
+        # Parte "leve" (desenho, exibição): o frame inteiro ou o que sobrou da inferência
+        leve = segundos - self._ultima_inferencia if inferiu else segundos
+        self.tempo_leve = self._media(self.tempo_leve, max(leve, 0.0))
+        agora = time.monotonic()
+        if self._ultimo_frame is not None and agora > self._ultimo_frame:
+            self.fps_medido = self._media(self.fps_medido or None, 1 / (agora - self._ultimo_frame))
+        self._ultimo_frame = agora
+
+        self._frames_desde_ajuste += 1
+        if self._frames_desde_ajuste >= self.intervalo_ajuste and self.tempo_inferencia:
+            self._frames_desde_ajuste = 0
+            self._ajustar()
+
+    def passo_necessario(self, orcamento):
+        """
+        Menor passo em que o custo médio por frame cabe no orçamento.
+
+        Custo médio com passo N = (inferência + (N - 1) * frame leve) / N
+        """
+        if self.tempo_inferencia <= orcamento:
+            return 1
+        if orcamento <= self.tempo_leve:
+            return math.inf  # Nem sem inferência o laço cabe no orçamento
+        return math.ceil((self.tempo_inferencia - self.tempo_leve) / (orcamento - self.tempo_leve))
+
+    def _ajustar(self):
+        """Reavalia passo e resolução com as médias atuais"""
+        orcamento = 1 / self.fps_alvo
+        passo_antes, resolucao_antes = self.passo, self.resolucao
+
+        # PASSO: sobe logo que precisar; desce um de cada vez e só com folga
+        ideal = self.passo_necessario(orcamento * 0.9)
+        if ideal > self.passo:
+            self.passo = min(ideal, self.passo_max)
+        elif self.passo > self.passo_min and self.passo_necessario(orcamento * 0.7) < self.passo:
+            self.passo -= 1
+        self.passo = max(self.passo, self.passo_min)
+        self.sobrecarga = ideal > self.passo_max
+
+        # RESOLUÇÃO: cai sob sobrecarga ou latência alta; sobe com bastante folga
+        if self.resolucoes:
+            latencia_alta = self.latencia_alvo is not None and self.tempo_inferencia > self.latencia_alvo
+            if (self.sobrecarga or latencia_alta) and self.indice_resolucao < len(self.resolucoes) - 1:
+                self._trocar_resolucao(self.indice_resolucao + 1)
+            elif self.indice_resolucao > 0 and self.passo == self.passo_min:
+                maior = self.resolucoes[self.indice_resolucao - 1]
+                estimada = self.tempo_inferencia * (maior / self.resolucao) ** 2
+                limite = min(orcamento, self.latencia_alvo or orcamento) * 0.7
+                if estimada < limite:
+                    self._trocar_resolucao(self.indice_resolucao - 1)
+
+        if self.mostrar_log and (self.passo, self.resolucao) != (passo_antes, resolucao_antes):
+            print(f"⚙️ Controle de taxa: passo {passo_antes} → {self.passo}"
+                  + (f", resolução {resolucao_antes} → {self.resolucao}"
+                     if self.resolucao != resolucao_antes else "")
+                  + f" (inferência {self.tempo_inferencia * 1000:.0f} ms, "
+                    f"orçamento {orcamento * 1000:.0f} ms/frame"
+                  + (", SOBRECARGA" if self.sobrecarga else "") + ")")
+
+    def _trocar_resolucao(self, indice):
+        """Muda a resolução e reescala a média de inferência (custo ~ área)"""
+        antiga = self.resolucao
+        self.indice_resolucao = indice
+        self.tempo_inferencia *= (self.resolucao / antiga) ** 2
+        for funcao in self._ao_mudar_resolucao:
+            funcao(self.resolucao)
+
+    def resumo(self):
+        """Texto curto para o painel e os logs"""
+        texto = f"Passo: 1/{self.passo}"
+        if self.resolucao is not None:
+            texto += f" | {self.resolucao}px"
+        if self.tempo_inferencia:
+            texto += f" | inf {self.tempo_inferencia * 1000:.0f} ms"
+        texto += f" | {self.fps_medido:.1f} FPS"
+        if self.sobrecarga:
+            texto += " | SOBRECARGA"
+        return texto
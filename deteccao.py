@@ -0,0 +1,209 @@
+# ========================================
+# DETECÇÃO EM LOTE + RASTREADOR INDEPENDENTE
+# ========================================
+# O model.track() da Ultralytics só aceita um frame por chamada, porque o
+# rastreador fica preso ao modelo. Este módulo separa as duas coisas:
+# - o detector roda em lotes de N frames por chamada (mais eficiente na CPU)
+# - o rastreador (BoT-SORT / ByteTrack, os mesmos do model.track) é
+#   alimentado um frame por vez, na ordem, pelo contador
+
+import numpy as np  # Arrays para as detecções
+
+# Limiar de confiança das detecções que alimentam um rastreador: o mesmo que o
+# model.track força, porque o BoT-SORT/ByteTrack usa as caixas fracas (0.1 a
+# 0.25) na segunda associação para não perder quem ficou encoberto
+CONF_RASTREAMENTO = 0.1
+
+# O model.track sempre cria o rastreador com frame_rate=30 (track_buffer de 30
+# frames, qualquer que seja o FPS da fonte)
+FPS_RASTREADOR = 30
+
+# Frames que o rastreador guarda uma trilha perdida antes de descartá-la
+# (track_buffer do botsort.yaml/bytetrack.yaml, com frame_rate=FPS_RASTREADOR).
+# Até lá a pessoa pode reaparecer com o mesmo ID
+TRACK_BUFFER = 30
+
+
+class Deteccoes:
+    """
+    Detecções de um frame em arrays NumPy.
+
+    Expõe os mesmos atributos que os rastreadores da Ultralytics leem de
+    results.boxes (conf, xywh, cls, xyxy e indexação), então pode ser
+    passado diretamente para BYTETracker.update / BOTSORT.update.
+    """
+
+    def __init__(self, xyxy, conf, cls):
+        """
+        Args:
+            xyxy: Array (N, 4) com cantos x1, y1, x2, y2 em pixels
+            conf: Array (N,) com as confianças
+            cls: Array (N,) com os IDs de classe
+        """
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.float32).reshape(-1)
+
+    @classmethod
+    def vazias(cls):
+        """Conjunto de detecções vazio"""
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0))
+
+    @classmethod
+    def de_resultado(cls, resultado):
+        """Converte um Results da Ultralytics em Deteccoes"""
+        boxes = resultado.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.vazias()
+        return cls(boxes.xyxy.cpu().numpy(),
+                   boxes.conf.cpu().numpy(),
+                   boxes.cls.cpu().numpy())
+
+    @property
+    def xywh(self):
+        """Caixas no formato centro x, centro y, largura, altura"""
+        xywh = np.empty_like(self.xyxy)
+        xywh[:, 0] = (self.xyxy[:, 0] + self.xyxy[:, 2]) / 2
+        xywh[:, 1] = (self.xyxy[:, 1] + self.xyxy[:, 3]) / 2
+        xywh[:, 2] = self.xyxy[:, 2] - self.xyxy[:, 0]
+        xywh[:, 3] = self.xyxy[:, 3] - self.xyxy[:, 1]
+        return xywh
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, indice):
+        return Deteccoes(self.xyxy[indice], self.conf[indice], self.cls[indice])
+
+
+def iou_caixas(a, b):
+    """
+    IoU entre todas as caixas de 'a' e todas as de 'b', sem laços em Python.
+
+    Args:
+        a: Array (N, 4) no formato x1, y1, x2, y2
+        b: Array (M, 4) no formato x1, y1, x2, y2
+
+    Returns:
+        np.ndarray: Matriz (N, M) float32
+    """
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersecao = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    return intersecao / np.maximum(area_a[:, None] + area_b[None, :] - intersecao, 1e-9)
+
+
+def nms(xyxy, conf, cls, limiar_iou=0.7, max_deteccoes=300):
+    """
+    Supressão de não-máximos por classe (mesma regra do NMS da Ultralytics).
+
+    Args:
+        xyxy: Array (N, 4) de caixas
+        conf: Array (N,) de confianças
+        cls: Array (N,) de classes (caixas de classes diferentes não se suprimem)
+        limiar_iou (float): Sobreposição a partir da qual a caixa menos confiante sai
+        max_deteccoes (int): Máximo de caixas mantidas
+
+    Returns:
+        np.ndarray: Índices mantidos, do mais confiante ao menos confiante
+    """
+    ordem = np.argsort(-np.asarray(conf), kind="stable")
+    # Desloca cada classe para uma região própria: uma só passada cobre todas
+    deslocadas = np.asarray(xyxy, np.float32) + np.asarray(cls, np.float32)[:, None] * 7680
+
+    mantidas = []
+    while len(ordem) and len(mantidas) < max_deteccoes:
+        melhor = ordem[0]
+        mantidas.append(melhor)
+        # IoU da melhor caixa contra as restantes (uma linha por vez: memória O(N))
+        iou = iou_caixas(deslocadas[melhor:melhor + 1], deslocadas[ordem[1:]])[0]
+        ordem = ordem[1:][iou <= limiar_iou]
+    return np.asarray(mantidas, dtype=np.int64)
+
+
+class DetectorYOLO:
+    """Detector Ultralytics que processa vários frames por chamada"""
+
+    def __init__(self, model, **opcoes_predict):
+        """
+        Args:
+            model (YOLO): Modelo já carregado
+            **opcoes_predict: Opções extras repassadas ao model.predict (ex.: imgsz, conf)
+        """
+        self.model = model
+        self.opcoes_predict = opcoes_predict
+
+    def definir_resolucao(self, imgsz):
+        """Muda a resolução de entrada do modelo (usado pelo controle de taxa)"""
+        self.opcoes_predict["imgsz"] = imgsz
+
+    def detectar_lote(self, frames):
+        """
+        Roda o detector em um lote de frames numa única passada.
+
+        Args:
+            frames (list): Lista de frames BGR
+
+        Returns:
+            list: Uma instância de Deteccoes por frame, na mesma ordem
+        """
+        if not frames:
+            return []
+        resultados = self.model.predict(frames, verbose=False, **self.opcoes_predict)
+        return [Deteccoes.de_resultado(r) for r in resultados]
+
+
+def criar_rastreador(config="botsort.yaml"):
+    """
+    Cria um rastreador da Ultralytics independente do modelo.
+
+    Usa por padrão a mesma configuração do model.track (botsort.yaml) e o
+    mesmo frame_rate fixo (FPS_RASTREADOR), para que os IDs se comportem como
+    no modo com janela. As detecções passadas a ele devem ser filtradas com
+    CONF_RASTREAMENTO, como o model.track faz.
+
+    Args:
+        config (str): "botsort.yaml" ou "bytetrack.yaml"
+
+    Returns:
+        Rastreador com o método update(deteccoes, frame)
+    """
+    from ultralytics.trackers.bot_sort import BOTSORT
+    from ultralytics.trackers.byte_tracker import BYTETracker
+    from ultralytics.utils import IterableSimpleNamespace
+    from ultralytics.utils.checks import check_yaml
+    try:
+        from ultralytics.utils import yaml_load
+    except ImportError:  # Versões mais novas da Ultralytics
+        from ultralytics.utils import YAML
+        yaml_load = YAML.load
+
+    args = IterableSimpleNamespace(**yaml_load(check_yaml(config)))
+    classes = {"bytetrack": BYTETracker, "botsort": BOTSORT}
+    if args.tracker_type not in classes:
+        raise ValueError(f"Rastreador não suportado: {args.tracker_type}")
+    return classes[args.tracker_type](args=args, frame_rate=FPS_RASTREADOR)
+
+
+def rastros_para_xywh(rastros):
+    """
+    Converte a saída de rastreador.update() para o formato usado pelo contador.
+
+    Args:
+        rastros: Array (N, 7+) com x1, y1, x2, y2, track_id, conf, cls, ...
+
+    Returns:
+        tuple: (xywh (N, 4) float32, track_ids (N,) int, confs (N,) float32)
+    """
+    rastros = np.asarray(rastros, dtype=np.float32)
+    if rastros.size == 0:
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.int64), np.zeros(0, np.float32)
+    xyxy = rastros[:, :4]
+    xywh = Deteccoes(xyxy, rastros[:, 5], rastros[:, 6]).xywh
+    return xywh, rastros[:, 4].astype(np.int64), rastros[:, 5]
@@ -0,0 +1,212 @@
+# ========================================
+# DETECTOR COM ONNX RUNTIME (CPU)
+# ========================================
+# Alternativa ao PyTorch para máquinas só com CPU:
+# 1. Exporta best.pt / yolov8n.pt para ONNX uma única vez (fica ao lado do .pt)
+# 2. Roda o grafo exportado no ONNX Runtime, mais leve em RAM e mais rápido na CPU
+# 3. Pré-processamento (letterbox) e pós-processamento (NMS) feitos aqui,
+#    com as mesmas regras da Ultralytics, para que caixas, rastreamento e
+#    contagem fiquem iguais aos do caminho PyTorch
+#
+# Uso:
+#   contador = ContadorPessoas("runs/detect/train/weights/best.pt", backend="onnx")
+
+import os  # Caminhos e datas dos arquivos
+
+import cv2  # Redimensionamento e bordas
+import numpy as np  # Tensores de entrada e saída
+
+from deteccao import Deteccoes, nms  # Formato comum das detecções
+from preprocessamento import PreProcessador  # Letterbox em buffers reaproveitados
+
+COR_BORDA = (114, 114, 114)  # Mesma cor de preenchimento da Ultralytics
+
+
+def exportar_onnx(modelo_path, imgsz=640, forcar=False):
+    """
+    Exporta um modelo .pt para ONNX, só se ainda não existir um atualizado.
+
+    Args:
+        modelo_path (str): Modelo .pt (ou um .onnx, devolvido sem mudanças)
+        imgsz (int): Tamanho de entrada usado na exportação
+        forcar (bool): Exporta de novo mesmo se o .onnx já existir
+
+    Returns:
+        str: Caminho do arquivo .onnx
+    """
+    if modelo_path.endswith(".onnx"):
+        return modelo_path
+
+    caminho_onnx = os.path.splitext(modelo_path)[0] + ".onnx"
+    atualizado = (os.path.exists(caminho_onnx) and
+                  (not os.path.exists(modelo_path) or
+                   os.path.getmtime(caminho_onnx) >= os.path.getmtime(modelo_path)))
+    if atualizado and not forcar:
+        return caminho_onnx
+
+    from ultralytics import YOLO
+    print(f"📦 Exportando {modelo_path} para ONNX (só na primeira vez)...")
+    # dynamic=True: aceita lotes de qualquer tamanho e entrada retangular
+    exportado = YOLO(modelo_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    print(f"✅ Modelo ONNX salvo em: {exportado}")
+    return str(exportado)
+
+
+def letterbox(frame, tamanho, stride=32, retangular=True):
+    """
+    Redimensiona mantendo a proporção e completa com bordas cinza.
+
+    Mesma regra do LetterBox da Ultralytics: com retangular=True a borda só
+    vai até o próximo múltiplo de 'stride' (como no model.predict de um .pt).
+
+    Args:
+        frame: Frame BGR
+        tamanho (int): Lado maior da entrada do modelo
+        stride (int): Múltiplo exigido pelo modelo
+        retangular (bool): Borda mínima (True) ou imagem quadrada tamanho x tamanho
+
+    Returns:
+        tuple: (imagem, ganho, (borda_esquerda, borda_superior))
+    """
+    altura, largura = frame.shape[:2]
+    ganho = min(tamanho / altura, tamanho / largura)
+    nova_largura, nova_altura = int(round(largura * ganho)), int(round(altura * ganho))
+
+    dw, dh = tamanho - nova_largura, tamanho - nova_altura
+    if retangular:
+        dw, dh = dw % stride, dh % stride
+    dw, dh = dw / 2, dh / 2
+
+    if (largura, altura) != (nova_largura, nova_altura):
+        frame = cv2.resize(frame, (nova_largura, nova_altura), interpolation=cv2.INTER_LINEAR)
+    topo, base = int(round(dh - 0.1)), int(round(dh + 0.1))
+    esquerda, direita = int(round(dw - 0.1)), int(round(dw + 0.1))
+    imagem = cv2.copyMakeBorder(frame, topo, base, esquerda, direita,
+                                cv2.BORDER_CONSTANT, value=COR_BORDA)
+    return imagem, ganho, (esquerda, topo)
+
+
+class DetectorOnnx:
+    """
+    Detector YOLOv8 exportado para ONNX, rodando no ONNX Runtime (CPU).
+
+    Tem a mesma interface de DetectorYOLO (detectar_lote), então pode ser
+    passado como detector para ContadorPessoas(detector=...).
+    """
+
+    def __init__(self, caminho_onnx, imgsz=640, conf=0.25, iou=0.7, max_deteccoes=300,
+                 threads=None):
+        """
+        Args:
+            caminho_onnx (str): Modelo exportado (veja exportar_onnx)
+            imgsz (int): Lado maior da entrada (o mesmo usado na exportação)
+            conf (float): Confiança mínima (padrão da Ultralytics: 0.25)
+            iou (float): Limiar de IoU do NMS (padrão da Ultralytics: 0.7)
+            max_deteccoes (int): Máximo de caixas por frame
+            threads (int): Threads do ONNX Runtime (padrão: todas)
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("Backend ONNX requer: pip install onnxruntime") from None
+
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opcoes.intra_op_num_threads = threads
+        self.sessao = ort.InferenceSession(caminho_onnx, sess_options=opcoes,
+                                           providers=["CPUExecutionProvider"])
+        self.caminho_onnx = caminho_onnx
+        self.conf = conf
+        self.iou = iou
+        self.max_deteccoes = max_deteccoes
+
+        entrada = self.sessao.get_inputs()[0]
+        self.nome_entrada = entrada.name
+        altura, largura = entrada.shape[2:4]
+        # Entrada com dimensões fixas (export sem dynamic): só aceita a imagem quadrada
+        self.dinamico = not (isinstance(altura, int) and isinstance(largura, int))
+        self.imgsz = imgsz if self.dinamico else int(max(altura, largura))
+        self.lote_fixo = entrada.shape[0] if isinstance(entrada.shape[0], int) else None
+        # Letterbox e tensor de entrada reaproveitados entre frames
+        self.preprocessador = PreProcessador(self.imgsz, retangular=self.dinamico)
+
+    def definir_resolucao(self, imgsz):
+        """Muda a resolução de entrada (só em modelos exportados com dynamic=True)"""
+        if self.dinamico:
+            self.imgsz = imgsz
+            self.preprocessador.imgsz = imgsz  # Buffers recriados no próximo lote
+
+    def preprocessar(self, frames):
+        """
+        Letterbox + BGR->RGB + HWC->CHW + escala 0..1, em um único tensor.
+
+        O tensor é um buffer reaproveitado (veja preprocessamento.PreProcessador):
+        só é válido até a próxima chamada.
+
+        Returns:
+            tuple: (tensor (B, 3, H, W) float32, [(ganho, borda), ...])
+        """
+        return self.preprocessador.processar(frames)
+
+    def posprocessar(self, saida, escala, formato):
+        """
+        Converte a saída (4 + nc, ancoras) de um frame em Deteccoes.
+
+        Args:
+            saida: Array (4 + nc, A) com cx, cy, w, h e a pontuação de cada classe
+            escala: (ganho, (borda_esquerda, borda_superior)) do letterbox
+            formato: (altura, largura) do frame original
+        """
+        pontuacoes = saida[4:]
+        classes = pontuacoes.argmax(axis=0)
+        confiancas = pontuacoes[classes, np.arange(pontuacoes.shape[1])]
+        mantidas = confiancas > self.conf
+        if not mantidas.any():
+            return Deteccoes.vazias()
+
+        cxcywh = saida[:4, mantidas].T
+        confiancas = confiancas[mantidas]
+        classes = classes[mantidas]
+        xyxy = np.empty_like(cxcywh)
+        xyxy[:, :2] = cxcywh[:, :2] - cxcywh[:, 2:] / 2
+        xyxy[:, 2:] = cxcywh[:, :2] + cxcywh[:, 2:] / 2
+
+        indices = nms(xyxy, confiancas, classes, self.iou, self.max_deteccoes)
+        xyxy = xyxy[indices]
+
+        # Volta para as coordenadas do frame original
+        ganho, (esquerda, topo) = escala
+        xyxy[:, [0, 2]] -= esquerda
+        xyxy[:, [1, 3]] -= topo
+        xyxy /= ganho
+        altura, largura = formato
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, largura)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, altura)
+        return Deteccoes(xyxy, confiancas[indices], classes[indices])
+
+    def detectar_lote(self, frames):
+        """
+        Roda o modelo ONNX em um lote de frames.
+
+        Args:
+            frames (list): Lista de frames BGR (do mesmo tamanho, como num vídeo)
+
+        Returns:
+            list: Uma instância de Deteccoes por frame, na mesma ordem
+        """
+        if not frames:
+            return []
+        # Modelo exportado com lote fixo: roda um frame por vez
+        if self.lote_fixo == 1 and len(frames) > 1:
+            return [d for frame in frames for d in self.detectar_lote([frame])]
+
+        tensor, escalas = self.preprocessar(frames)
+        saida = self.sessao.run(None, {self.nome_entrada: tensor})[0]
+        return [self.posprocessar(saida[i], escalas[i], frame.shape[:2])
+                for i, frame in enumerate(frames)]
+
+
+def criar_detector_onnx(modelo_path, imgsz=640, threads=None, **opcoes):
+    """Exporta (se preciso) e carrega o modelo no ONNX Runtime"""
+    return DetectorOnnx(exportar_onnx(modelo_path, imgsz), imgsz=imgsz, threads=threads, **opcoes)
@@ -0,0 +1,193 @@
+# ========================================
+# EXIBIÇÃO EM THREAD PRÓPRIA, COM TAXA LIMITADA
+# ========================================
+# Antes, cada volta do laço de processamento chamava namedWindow,
+# resizeWindow, imshow e waitKey (em contador_final.py, waitKey(30), que
+# limita tudo a ~33 FPS). Aqui a janela é criada uma vez e uma thread de
+# exibição:
+# - mostra sempre o frame MAIS NOVO entregue (os intermediários são pulados)
+# - redesenha a janela no máximo fps_max vezes por segundo
+# - devolve as teclas de interesse ('q', 'g', ...) por uma fila
+# O laço de processamento só copia o frame para um buffer livre e segue:
+# nunca espera pelo imshow/waitKey.
+#
+# Uso:
+#   with ExibidorAssincrono("Contador", tamanho=(1200, 800)) as janela:
+#       while ...:
+#           janela.mostrar(frame)
+#           if janela.tecla() == "q":
+#               break
+
+import queue  # Teclas para o laço de processamento
+import sys  # Plataforma (macOS exige a GUI na thread principal)
+import threading  # Thread de exibição
+import time  # Limite de taxa
+
+import cv2  # HighGUI
+import numpy as np  # Buffers dos frames
+
+# No macOS o HighGUI só funciona na thread principal: lá a exibição é feita
+# dentro de mostrar(), com o mesmo limite de taxa
+THREAD_DISPONIVEL = sys.platform != "darwin"
+
+
+class ExibidorAssincrono:
+    """Janela do OpenCV atualizada por uma thread própria, com FPS máximo"""
+
+    def __init__(self, nome_janela, tamanho=None, tela_cheia=False, fps_max=30.0,
+                 teclas="q", preparar=None, em_thread=None, perfil_estagios=None):
+        """
+        Args:
+            nome_janela (str): Título da janela
+            tamanho (tuple): (largura, altura) inicial da janela; None = tamanho do frame
+            tela_cheia (bool): Abre a janela em tela cheia
+            fps_max (float): Máximo de redesenhos por segundo
+            teclas (str): Teclas repassadas ao laço de processamento
+            preparar: Função aplicada ao frame na thread de exibição antes do
+                      imshow (ex.: contador.preparar_exibicao para redimensionar)
+            em_thread (bool): Exibe numa thread própria (padrão: sim, exceto no macOS)
+            perfil_estagios (PerfilEstagios): Se definido, mede o estágio "exibicao"
+                                              (preparar + imshow, veja perfil.py)
+        """
+        self.nome_janela = nome_janela
+        self.tamanho = tamanho
+        self.tela_cheia = tela_cheia
+        self.intervalo = 1.0 / fps_max if fps_max else 0.0
+        self.teclas = set(teclas)
+        self.preparar = preparar
+        self.em_thread = THREAD_DISPONIVEL if em_thread is None else em_thread
+        self.perfil_estagios = perfil_estagios
+
+        # Três buffers: um sendo escrito pelo processamento, um pronto
+        # esperando a exibição e um sendo exibido. Nenhum lado espera o outro.
+        self._livre = None
+        self._pronto = None
+        self._exibindo = None
+        self._novo = False
+        self._trava = threading.Lock()
+
+        self._teclas = queue.Queue()
+        self._parar = threading.Event()
+        self._thread = None
+        self._janela_criada = False
+        self._proxima_exibicao = 0.0
+
+        # Estatísticas
+        self.frames_recebidos = 0
+        self.frames_exibidos = 0
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *_):
+        self.parar()
+
+    def iniciar(self):
+        """Inicia a thread de exibição (a janela é criada nela)"""
+        if self.em_thread and self._thread is None:
+            self._thread = threading.Thread(target=self._laco, name="exibicao", daemon=True)
+            self._thread.start()
+        return self
+
+    def mostrar(self, frame):
+        """
+        Entrega um frame para exibição (copiado; o chamador pode reaproveitá-lo).
+
+        Nunca bloqueia: se a janela ainda não exibiu o frame anterior, ele é
+        substituído por este.
+        """
+        self.frames_recebidos += 1
+        if self._livre is None or self._livre.shape != frame.shape:
+            self._livre = np.empty_like(frame)
+        np.copyto(self._livre, frame)
+        with self._trava:
+            self._livre, self._pronto = self._pronto, self._livre
+            self._novo = True
+
+        if not self.em_thread:
+            self._passo(espera_ms=1)
+
+    def tecla(self):
+        """Próxima tecla pressionada na janela (str), ou None se não houver"""
+        try:
+            return self._teclas.get_nowait()
+        except queue.Empty:
+            return None
+
+    def parar(self):
+        """Encerra a thread e fecha a janela"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        elif self._janela_criada:
+            self._fechar_janela()
+
+    @property
+    def frames_pulados(self):
+        """Frames entregues que não chegaram a ser exibidos (limite de taxa)"""
+        return max(0, self.frames_recebidos - self.frames_exibidos)
+
+    def _criar_janela(self):
+        """Cria e dimensiona a janela uma única vez"""
+        cv2.namedWindow(self.nome_janela, cv2.WINDOW_NORMAL)
+        if self.tela_cheia:
+            cv2.setWindowProperty(self.nome_janela, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+        elif self.tamanho:
+            cv2.resizeWindow(self.nome_janela, *self.tamanho)
+        self._janela_criada = True
+
+    def _fechar_janela(self):
+        try:
+            cv2.destroyWindow(self.nome_janela)
+            cv2.waitKey(1)  # Deixa o HighGUI processar o fechamento
+        except cv2.error:
+            pass
+        self._janela_criada = False
+
+    def _passo(self, espera_ms):
+        """Exibe o frame mais novo (se já deu o tempo) e lê o teclado"""
+        agora = time.monotonic()
+        if agora >= self._proxima_exibicao:
+            with self._trava:
+                novo = self._novo
+                if novo:
+                    self._pronto, self._exibindo = self._exibindo, self._pronto
+                    self._novo = False
+            if novo:
+                if not self._janela_criada:
+                    self._criar_janela()
+                inicio = time.perf_counter()
+                imagem = self._exibindo
+                if self.preparar is not None:
+                    imagem = self.preparar(imagem)
+                cv2.imshow(self.nome_janela, imagem)
+                # O waitKey fica de fora: ele é a espera que limita o FPS da tela
+                if self.perfil_estagios is not None:
+                    self.perfil_estagios.observar("exibicao", time.perf_counter() - inicio)
+                self.frames_exibidos += 1
+                self._proxima_exibicao = agora + self.intervalo
+
+        if not self._janela_criada:
+            time.sleep(espera_ms / 1000)
+            return
+        codigo = cv2.waitKey(espera_ms) & 0xFF
+        if codigo != 0xFF and chr(codigo) in self.teclas:
+            self._teclas.put(chr(codigo))
+        # Janela fechada no botão "X": mesmo efeito de 'q'
+        elif (self.frames_exibidos and not self._parar.is_set() and
+              cv2.getWindowProperty(self.nome_janela, cv2.WND_PROP_VISIBLE) < 1):
+            self._teclas.put("q")
+            self._parar.set()
+
+    def _laco(self):
+        """Thread de exibição: redesenha até fps_max vezes por segundo"""
+        try:
+            while not self._parar.is_set():
+                # Dorme até o próximo redesenho permitido (ou 5 ms, se já passou)
+                restante = self._proxima_exibicao - time.monotonic()
+                espera = restante if restante > 0 else 0.005
+                self._passo(espera_ms=max(1, min(int(espera * 1000), 50)))
+        finally:
+            if self._janela_criada:
+                self._fechar_janela()
@@ -0,0 +1,142 @@
+# ========================================
+# GATE DE MOVIMENTO ANTES DO DETECTOR
+# ========================================
+# Em entradas que passam horas vazias (corredor à noite), rodar o YOLO em
+# todo frame é desperdício. O gate compara uma versão pequena e em tons de
+# cinza do frame com um fundo aprendido e só libera o detector quando:
+# - há movimento (opcionalmente só numa faixa em volta da linha de contagem)
+# - ou houve movimento há poucos frames (as trilhas terminam de sair da cena)
+# - ou houve pessoas nos últimos TRACK_BUFFER frames detectados
+# Assim o detector só é pulado com a cena parada E vazia, depois que o
+# rastreador já descartou todas as trilhas perdidas. Como ele não é
+# chamado nos frames pulados, uma trilha perdida ainda guardada ficaria
+# "congelada" e poderia passar seu ID (já contado) para a próxima pessoa.
+#
+# Custo: um resize + absdiff em ~160x90 pixels por frame (frações de ms).
+
+import cv2  # Redução, tons de cinza e diferença de imagens
+import numpy as np  # Fundo em ponto flutuante
+
+from deteccao import TRACK_BUFFER  # Quanto tempo o rastreador guarda trilhas perdidas
+
+METODO_MEDIA = "media"  # Fundo = média móvel dos frames (barato, padrão)
+METODO_MOG2 = "mog2"    # Subtrator de fundo MOG2 do OpenCV (mais robusto a ruído)
+
+
+class GateMovimento:
+    """
+    Decide, frame a frame, se o detector precisa rodar.
+
+    Uso no contador:
+        if gate.precisa_detectar(frame, linha_y):
+            ...detecta e rastreia...
+            gate.informar_pessoas(numero_de_pessoas)
+    """
+
+    def __init__(self, largura=160, limiar_pixel=25, fracao_minima=0.002, banda_px=None,
+                 manter_frames=15, metodo=METODO_MEDIA, alfa_fundo=0.05):
+        """
+        Args:
+            largura (int): Largura da imagem reduzida usada na comparação
+            limiar_pixel (int): Diferença (0-255) para um pixel contar como "mudou"
+            fracao_minima (float): Fração de pixels mudados que indica movimento
+            banda_px (int): Se informado, só olha a faixa linha_y ± banda_px (pixels
+                            do frame original); None olha o frame inteiro
+            manter_frames (int): Frames em que o detector segue ligado depois do
+                                 último movimento
+            metodo (str): "media" (média móvel) ou "mog2" (cv2.createBackgroundSubtractorMOG2)
+            alfa_fundo (float): Velocidade de adaptação do fundo no método "media"
+        """
+        if metodo not in (METODO_MEDIA, METODO_MOG2):
+            raise ValueError(f"Método de gate desconhecido: {metodo}")
+        self.largura = largura
+        self.limiar_pixel = limiar_pixel
+        self.fracao_minima = fracao_minima
+        self.banda_px = banda_px
+        self.manter_frames = manter_frames
+        self.metodo = metodo
+        self.alfa_fundo = alfa_fundo
+
+        self.fundo = None  # Fundo em float32 (método "media")
+        self.subtrator = (cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+                          if metodo == METODO_MOG2 else None)
+        self.frames_sem_movimento = 0
+        self.pessoas_visiveis = 0
+        # Frames detectados seguidos sem ninguém (relógio do rastreador)
+        self.frames_sem_pessoas = TRACK_BUFFER + 1
+
+        # Estatísticas
+        self.frames_avaliados = 0
+        self.frames_pulados = 0
+
+    def _reduzir(self, frame):
+        """Frame reduzido, em tons de cinza e suavizado (menos ruído do sensor)"""
+        altura, largura = frame.shape[:2]
+        nova_altura = max(1, round(altura * self.largura / largura))
+        pequeno = cv2.resize(frame, (self.largura, nova_altura), interpolation=cv2.INTER_AREA)
+        cinza = cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY) if pequeno.ndim == 3 else pequeno
+        return cv2.GaussianBlur(cinza, (5, 5), 0)
+
+    def _faixa(self, altura_reduzida, altura_original, linha_y):
+        """Linhas da imagem reduzida que ficam dentro da banda da linha de contagem"""
+        if self.banda_px is None or linha_y is None:
+            return slice(None)
+        escala = altura_reduzida / altura_original
+        inicio = max(0, int((linha_y - self.banda_px) * escala))
+        fim = min(altura_reduzida, int(np.ceil((linha_y + self.banda_px) * escala)) + 1)
+        return slice(inicio, max(fim, inicio + 1))
+
+    def ha_movimento(self, frame, linha_y=None):
+        """
+        Compara o frame com o fundo aprendido e atualiza o fundo.
+
+        Returns:
+            bool: True se a fração de pixels mudados passou de fracao_minima
+        """
+        cinza = self._reduzir(frame)
+
+        if self.metodo == METODO_MOG2:
+            mascara = self.subtrator.apply(cinza) > 0
+        else:
+            if self.fundo is None:
+                self.fundo = cinza.astype(np.float32)
+                return True  # Sem fundo ainda: deixa o detector rodar
+            mascara = cv2.absdiff(cinza, cv2.convertScaleAbs(self.fundo)) > self.limiar_pixel
+            cv2.accumulateWeighted(cinza, self.fundo, self.alfa_fundo)
+
+        mascara = mascara[self._faixa(cinza.shape[0], frame.shape[0], linha_y)]
+        return np.count_nonzero(mascara) >= self.fracao_minima * mascara.size
+
+    def precisa_detectar(self, frame, linha_y=None):
+        """
+        Decide se o detector deve rodar neste frame.
+
+        Args:
+            frame: Frame BGR original
+            linha_y (int): Linha de contagem (usada só com banda_px)
+
+        Returns:
+            bool: False só com a cena parada, sem movimento recente e sem pessoas
+                  nos últimos TRACK_BUFFER frames detectados
+        """
+        self.frames_avaliados += 1
+        if self.ha_movimento(frame, linha_y):
+            self.frames_sem_movimento = 0
+        else:
+            self.frames_sem_movimento += 1
+
+        precisa = (self.frames_sem_movimento <= self.manter_frames or
+                   self.frames_sem_pessoas <= TRACK_BUFFER)
+        if not precisa:
+            self.frames_pulados += 1
+        return precisa
+
+    def informar_pessoas(self, quantidade):
+        """Informa quantas pessoas o último frame detectado tinha"""
+        self.pessoas_visiveis = int(quantidade)
+        self.frames_sem_pessoas = 0 if self.pessoas_visiveis else self.frames_sem_pessoas + 1
+
+    @property
+    def taxa_pulados(self):
+        """Fração dos frames avaliados em que o detector foi pulado"""
+        return self.frames_pulados / self.frames_avaliados if self.frames_avaliados else 0.0
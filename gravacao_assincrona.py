@@ -0,0 +1,193 @@
+# ========================================
+# GRAVAÇÃO DE VÍDEO EM SEGUNDO PLANO
+# ========================================
+# VideoWriter.write (mp4v) codifica o frame na hora e pode levar mais que
+# a própria detecção: gravando dentro do laço, o FPS da contagem caía.
+# Aqui o laço só copia o frame anotado para um buffer reaproveitado e o
+# coloca numa fila limitada; uma thread de gravação codifica em paralelo.
+#
+# Políticas com a fila cheia (codificador mais lento que o laço):
+# - "bloquear": o laço espera (nenhum frame se perde; o FPS cai)
+# - "descartar": o frame novo não é gravado, sem aviso
+# - "descartar_contando": o frame novo não é gravado e cada descarte é
+#   avisado no terminal (a cada 100) e no resumo final
+# Nas três, as estatísticas (profundidade da fila, descartes, tempo de
+# codificação) ficam disponíveis em resumo().
+#
+# Uso (mesma interface do cv2.VideoWriter):
+#   gravador = GravadorAssincrono("saida.mp4", 30, (1280, 720))
+#   gravador.write(frame)
+#   gravador.release()  # Espera a fila esvaziar e fecha o arquivo
+#   gravador.imprimir_resumo()
+
+import queue  # Fila limitada entre o laço e a thread de gravação
+import threading  # Thread de gravação
+import time  # Tempo de codificação
+from collections import deque  # Buffers livres
+
+import cv2  # VideoWriter
+import numpy as np  # Cópia dos frames
+
+POLITICA_BLOQUEAR = "bloquear"
+POLITICA_DESCARTAR = "descartar"
+POLITICA_DESCARTAR_CONTANDO = "descartar_contando"
+
+POLITICAS_GRAVACAO = (POLITICA_BLOQUEAR, POLITICA_DESCARTAR, POLITICA_DESCARTAR_CONTANDO)
+
+_FIM = None  # Marcador de fim da gravação
+
+
+class GravadorAssincrono:
+    """Grava frames numa thread separada, com a interface do cv2.VideoWriter"""
+
+    def __init__(self, caminho, fps, tamanho, fourcc="mp4v", capacidade=32,
+                 politica=POLITICA_BLOQUEAR, escritor=None, perfil_estagios=None):
+        """
+        Args:
+            caminho (str): Arquivo de saída
+            fps (float): FPS do vídeo gravado
+            tamanho (tuple): (largura, altura) dos frames
+            fourcc (str): Codec do cv2.VideoWriter
+            capacidade (int): Frames que podem esperar na fila
+            politica (str): "bloquear", "descartar" ou "descartar_contando"
+            escritor: Objeto com write(frame)/release() já aberto (ex.:
+                      codificadores.criar_escritor(...) com ffmpeg);
+                      padrão: cv2.VideoWriter(caminho, fourcc, ...)
+            perfil_estagios (PerfilEstagios): Se definido, mede o estágio
+                                              "codificacao" (veja perfil.py)
+        """
+        if politica not in POLITICAS_GRAVACAO:
+            raise ValueError(f"Política de gravação inválida: {politica}")
+        if capacidade < 1:
+            raise ValueError("A capacidade da fila deve ser pelo menos 1")
+
+        self.caminho = caminho
+        self.politica = politica
+        self.capacidade = capacidade
+        self.perfil_estagios = perfil_estagios
+        self.escritor = escritor if escritor is not None else cv2.VideoWriter(
+            caminho, cv2.VideoWriter_fourcc(*fourcc), fps, tuple(tamanho))
+
+        self._fila = queue.Queue(maxsize=capacidade)
+        self._livres = deque()  # Buffers já gravados, prontos para reuso
+        self._erro = None
+
+        # Estatísticas
+        self.frames_recebidos = 0
+        self.frames_gravados = 0
+        self.descartados = 0
+        self.profundidade_max = 0
+        self.tempo_codificacao = 0.0  # Segundos gastos dentro de write()
+
+        self._thread = threading.Thread(target=self._laco, name="gravacao", daemon=True)
+        self._thread.start()
+
+    def isOpened(self):
+        if self._erro is not None:
+            return False
+        return self.escritor.isOpened() if hasattr(self.escritor, "isOpened") else True
+
+    @property
+    def profundidade(self):
+        """Frames esperando na fila agora"""
+        return self._fila.qsize()
+
+    def write(self, frame, repeticoes=1):
+        """
+        Enfileira uma cópia do frame para gravação.
+
+        Args:
+            frame: Frame BGR
+            repeticoes (int): Quantas vezes o frame entra no vídeo (para
+                              manter o tempo certo quando a captura atrasou)
+
+        Returns:
+            bool: False se o frame foi descartado (fila cheia) ou a gravação falhou
+        """
+        if self._erro is not None or not self._thread.is_alive():
+            return False
+        self.frames_recebidos += 1
+
+        # Com descarte, nem copia o frame se ele não vai caber
+        if self.politica != POLITICA_BLOQUEAR and self._fila.full():
+            self.descartados += 1
+            if self.politica == POLITICA_DESCARTAR_CONTANDO and self.descartados % 100 == 1:
+                print(f"⚠️ Gravação atrasada: {self.descartados} frame(s) descartado(s) "
+                      f"(fila de {self.capacidade} cheia)")
+            return False
+
+        # Copia para um buffer reaproveitado: o laço pode desenhar/reusar o original
+        try:
+            buffer = self._livres.pop()
+            if buffer.shape != frame.shape:
+                buffer = np.empty_like(frame)
+        except IndexError:
+            buffer = np.empty_like(frame)
+        np.copyto(buffer, frame)
+
+        # Só espera na política "bloquear" (e desiste se a thread de gravação parou)
+        while True:
+            try:
+                self._fila.put((buffer, repeticoes), timeout=0.1)
+                break
+            except queue.Full:
+                if not self._thread.is_alive():
+                    return False
+        self.profundidade_max = max(self.profundidade_max, self._fila.qsize())
+        return True
+
+    def release(self):
+        """Grava o que ainda está na fila, fecha o arquivo e encerra a thread"""
+        # Mesma espera do write(): se a thread morrer com a fila cheia, desiste
+        while self._thread.is_alive():
+            try:
+                self._fila.put(_FIM, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        if self._erro is not None:
+            print(f"❌ Erro na gravação de {self.caminho}: {self._erro}")
+
+    def imprimir_resumo(self):
+        """Mostra no terminal como a gravação acompanhou o laço"""
+        r = self.resumo()
+        texto = (f"📼 Gravação: {r['frames_gravados']} frames gravados, "
+                 f"{r['descartados']} descartados, fila máx {r['profundidade_max']}/{self.capacidade}")
+        if r["ms_por_frame"] is not None:
+            texto += f", {r['ms_por_frame']} ms/frame na codificação"
+        print(texto)
+
+    def resumo(self):
+        """Estatísticas da gravação (para logs e relatórios)"""
+        return {
+            "frames_recebidos": self.frames_recebidos,
+            "frames_gravados": self.frames_gravados,
+            "descartados": self.descartados,
+            "profundidade": self.profundidade,
+            "profundidade_max": self.profundidade_max,
+            "ms_por_frame": round(self.tempo_codificacao / self.frames_gravados * 1000, 2)
+                            if self.frames_gravados else None,
+        }
+
+    def _laco(self):
+        """Thread de gravação: codifica os frames na ordem em que chegaram"""
+        try:
+            while True:
+                item = self._fila.get()
+                if item is _FIM:
+                    break
+                buffer, repeticoes = item
+                inicio = time.perf_counter()
+                for _ in range(repeticoes):
+                    self.escritor.write(buffer)
+                segundos = time.perf_counter() - inicio
+                self.tempo_codificacao += segundos
+                if self.perfil_estagios is not None:
+                    self.perfil_estagios.observar("codificacao", segundos / repeticoes)
+                self.frames_gravados += repeticoes
+                self._livres.append(buffer)
+        except Exception as e:
+            self._erro = e
+        finally:
+            self.escritor.release()
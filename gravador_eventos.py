@@ -0,0 +1,243 @@
+# ========================================
+# GRAVAÇÃO DE CLIPES SÓ QUANDO ALGUÉM PASSA PELA LINHA
+# ========================================
+# Gravar a sessão inteira (tecla 'g' ou contador_final.py) enche o disco de
+# horas de imagem vazia. Aqui só vão para o disco clipes em volta de cada
+# entrada/saída:
+# - os últimos N segundos ficam num buffer circular em memória, comprimidos
+#   em JPEG (pré-roll), para o clipe mostrar a pessoa chegando à linha
+# - a cada passagem (ouvintes_eventos do contador) abre-se um clipe com o
+#   pré-roll e ele continua por M segundos depois (pós-roll)
+# - eventos cujos intervalos [t - pré, t + pós] se sobrepõem viram UM clipe
+#   só, sem frames repetidos
+# A gravação de cada clipe usa o GravadorAssincrono (codificação fora do
+# laço) com o codificador escolhido em codificadores.py. O espaço em disco
+# passa a depender do movimento, não das horas ligadas.
+#
+# Uso:
+#   clipes = GravadorEventos("clipes", fps=30, pre_segundos=5, pos_segundos=5)
+#   clipes.conectar(contador)          # Ouve as entradas/saídas
+#   while ...:
+#       frame = contador.processar_frame(frame)
+#       clipes.adicionar_frame(frame)  # Depois do processamento do frame
+#   clipes.fechar()
+
+import os  # Pasta dos clipes
+from collections import deque  # Buffer circular do pré-roll
+from datetime import datetime  # Nome dos clipes
+
+import cv2  # Compressão JPEG do pré-roll
+
+from codificadores import criar_escritor
+from gravacao_assincrona import GravadorAssincrono, POLITICA_BLOQUEAR
+
+
+class _EscritorClipe:
+    """Repassa ao codificador frames crus ou JPEG (descomprimidos na thread de gravação)"""
+
+    def __init__(self, escritor):
+        self.escritor = escritor
+
+    def isOpened(self):
+        return self.escritor.isOpened()
+
+    def write(self, dado):
+        if dado.ndim == 1:  # Bytes JPEG do pré-roll
+            dado = cv2.imdecode(dado, cv2.IMREAD_COLOR)
+        self.escritor.write(dado)
+
+    def release(self):
+        self.escritor.release()
+
+
+class GravadorEventos:
+    """Grava clipes com pré-roll e pós-roll em volta de cada passagem pela linha"""
+
+    def __init__(self, pasta="clipes", fps=30.0, pre_segundos=5.0, pos_segundos=5.0,
+                 comprimir=True, qualidade_jpeg=85, perfil="opencv",
+                 politica=POLITICA_BLOQUEAR, prefixo="clipe"):
+        """
+        Args:
+            pasta (str): Onde os clipes são salvos
+            fps (float): FPS da fonte (ajustável depois com definir_fps)
+            pre_segundos (float): Segundos antes do evento incluídos no clipe
+            pos_segundos (float): Segundos gravados depois do último evento
+            comprimir (bool): Guarda o pré-roll em JPEG (~10-20x menos memória,
+                              custa uma compressão por frame fora dos clipes)
+            qualidade_jpeg (int): Qualidade do JPEG do pré-roll (0-100)
+            perfil (str): Codificador dos clipes (ver codificadores.py)
+            politica (str): Política da fila de gravação (ver gravacao_assincrona.py)
+            prefixo (str): Início do nome dos arquivos
+        """
+        self.pasta = pasta
+        self.pre_segundos = pre_segundos
+        self.pos_segundos = pos_segundos
+        self.comprimir = comprimir
+        self.parametros_jpeg = [cv2.IMWRITE_JPEG_QUALITY, int(qualidade_jpeg)]
+        self.perfil = perfil
+        self.politica = politica
+        self.prefixo = prefixo
+        self.perfil_estagios = None  # PerfilEstagios: mede a codificação dos clipes (perfil.py)
+        os.makedirs(pasta, exist_ok=True)
+
+        # Pré-roll: (índice do frame, JPEG ou cópia do frame), do mais antigo ao mais novo
+        self._anteriores = deque()
+        self.bytes_pre_roll = 0
+        self.definir_fps(fps)
+
+        self._frames = 0            # Índice do próximo frame entregue
+        self._gravador = None       # Clipe aberto (GravadorAssincrono)
+        self._fim_pos = None        # Último frame do pós-roll pedido pelos eventos
+        self._ultimo_gravado = -1   # Último frame já enviado a um clipe
+        self._primeiro_clipe = None
+        self._arquivo_clipe = None
+        self._eventos_clipe = []
+
+        # Estatísticas
+        self.clipes = []  # Um dict por clipe salvo
+        self.frames_gravados = 0
+
+    def definir_fps(self, fps):
+        """Ajusta o FPS da fonte (e com ele o tamanho do pré-roll e do pós-roll)"""
+        self.fps = float(fps) if fps and fps > 0 else 30.0
+        self.pre_frames = max(1, int(round(self.pre_segundos * self.fps)))
+        self.pos_frames = max(0, int(round(self.pos_segundos * self.fps)))
+        while len(self._anteriores) > self.pre_frames:
+            self._descartar_mais_antigo()
+
+    def conectar(self, contador):
+        """Passa a ouvir as entradas/saídas do contador (contador.ouvintes_eventos)"""
+        contador.ouvintes_eventos.append(self.ao_evento)
+        return self
+
+    def ao_evento(self, evento):
+        """
+        Ouvinte de passagens: pede (ou estende) o clipe até o pós-roll.
+
+        O evento vem durante o processamento do frame que ainda será
+        entregue a adicionar_frame, por isso o pós-roll conta a partir dele.
+        """
+        fim = self._frames + self.pos_frames
+        self._fim_pos = fim if self._fim_pos is None else max(self._fim_pos, fim)
+        self._eventos_clipe.append(evento)
+
+    def adicionar_frame(self, frame):
+        """
+        Entrega o próximo frame (anotado ou cru) ao gravador.
+
+        Dentro de um clipe, o frame vai para a fila de gravação; fora, só
+        para o pré-roll em memória.
+        """
+        indice = self._frames
+        self._frames += 1
+
+        if self._fim_pos is not None and indice <= self._fim_pos:
+            if self._gravador is None:
+                self._abrir_clipe(frame)
+            # Frames do pré-roll (ou do intervalo entre eventos) ainda não gravados
+            while self._anteriores:
+                indice_antigo, dado = self._anteriores.popleft()
+                self.bytes_pre_roll -= dado.nbytes
+                if indice_antigo > self._ultimo_gravado:
+                    self._gravar(indice_antigo, dado)
+            self._gravar(indice, frame)
+            return
+
+        self._guardar_pre_roll(indice, frame)
+
+        # Fecha o clipe só quando um novo evento já não poderia se sobrepor a
+        # ele: até lá, os frames esperam no pré-roll e um evento novo os grava
+        # no MESMO clipe
+        if self._gravador is not None and indice >= self._fim_pos + self.pre_frames:
+            self.fechar()
+
+    def fechar(self):
+        """Termina o clipe aberto (se houver), esperando a fila de gravação"""
+        if self._gravador is not None:
+            self._gravador.release()
+            info = {
+                "arquivo": self._arquivo_clipe,
+                "primeiro_frame": self._primeiro_clipe,
+                "ultimo_frame": self._ultimo_gravado,
+                "duracao_s": round((self._ultimo_gravado - self._primeiro_clipe + 1) / self.fps, 2),
+                "eventos": len(self._eventos_clipe),
+                "entradas": sum(e.get("direcao") == "entrada" for e in self._eventos_clipe),
+                "saidas": sum(e.get("direcao") == "saida" for e in self._eventos_clipe),
+                "descartados": self._gravador.descartados,
+            }
+            self.clipes.append(info)
+            print(f"🎞️ Clipe salvo: {info['arquivo']} ({info['duracao_s']} s, "
+                  f"{info['eventos']} evento(s))")
+        self._gravador = None
+        self._fim_pos = None
+        self._eventos_clipe = []
+
+    @property
+    def profundidade(self):
+        """Frames esperando na fila de gravação do clipe aberto"""
+        gravador = self._gravador
+        return gravador.profundidade if gravador is not None else 0
+
+    @property
+    def descartados(self):
+        """Frames descartados pelas filas de gravação de todos os clipes"""
+        gravador = self._gravador
+        return (sum(c["descartados"] for c in self.clipes)
+                + (gravador.descartados if gravador is not None else 0))
+
+    def resumo(self):
+        """Estatísticas da gravação por eventos"""
+        return {
+            "frames_vistos": self._frames,
+            "frames_gravados": self.frames_gravados,
+            "fracao_gravada": round(self.frames_gravados / self._frames, 4) if self._frames else None,
+            "clipes": len(self.clipes),
+            "pre_roll_kb": round(self.bytes_pre_roll / 1024, 1),
+        }
+
+    def _abrir_clipe(self, frame):
+        """Cria o arquivo do clipe com o codificador escolhido"""
+        altura, largura = frame.shape[:2]
+        primeiro = self._eventos_clipe[0] if self._eventos_clipe else {}
+        nome = (f"{self.prefixo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                f"_{primeiro.get('direcao', 'evento')}{primeiro.get('track_id', '')}.mp4")
+        self._arquivo_clipe = os.path.join(self.pasta, nome)
+        escritor = criar_escritor(self._arquivo_clipe, self.fps, (largura, altura), self.perfil)
+        # Fila com folga para o pré-roll inteiro entrar de uma vez sem travar o laço
+        self._gravador = GravadorAssincrono(
+            self._arquivo_clipe, self.fps, (largura, altura),
+            capacidade=self.pre_frames + int(self.fps) + 1,
+            politica=self.politica, escritor=_EscritorClipe(escritor),
+            perfil_estagios=self.perfil_estagios)
+        self._primeiro_clipe = min([i for i, _ in self._anteriores
+                                    if i > self._ultimo_gravado] + [self._frames - 1])
+
+    def _gravar(self, indice, dado):
+        self._gravador.write(dado)
+        self._ultimo_gravado = indice
+        self.frames_gravados += 1
+
+    def _guardar_pre_roll(self, indice, frame):
+        """Põe o frame no buffer circular, descartando o mais antigo se cheio"""
+        reaproveitado = None
+        if len(self._anteriores) >= self.pre_frames:
+            reaproveitado = self._descartar_mais_antigo()
+
+        if self.comprimir:
+            ok, dado = cv2.imencode(".jpg", frame, self.parametros_jpeg)
+            if not ok:
+                return
+        else:
+            # Sem compressão, reaproveita o buffer do frame que saiu do pré-roll
+            if reaproveitado is None or reaproveitado.shape != frame.shape:
+                reaproveitado = frame.copy()
+            else:
+                reaproveitado[...] = frame
+            dado = reaproveitado
+        self._anteriores.append((indice, dado))
+        self.bytes_pre_roll += dado.nbytes
+
+    def _descartar_mais_antigo(self):
+        _, dado = self._anteriores.popleft()
+        self.bytes_pre_roll -= dado.nbytes
+        return dado
@@ -2,14 +2,95 @@
 # GRAVADOR DE TELA PARA DEMONSTRAÇÕES
 # ========================================
 # Script para gravar a tela enquanto o contador roda
+#
+# Captura rápida e em ritmo fixo:
+# - mss (memória compartilhada do X11 / APIs nativas no Windows e macOS)
+#   captura direto para um array NumPy; o pyautogui (PIL, lento) fica só
+#   como alternativa
+# - cada frame tem um horário marcado (início + n/fps): o laço dorme só o
+#   que falta até o próximo horário, descontando o tempo da captura
+# - se a captura atrasar e perder horários, o frame capturado é repetido
+#   nos horários perdidos (e se a fila de gravação descartar um frame, o
+#   próximo ocupa o lugar dele): o vídeo sempre dura o tempo real gravado
+# - a codificação roda em outra thread (GravadorAssincrono)
+# - a cada segundo mostra o FPS realmente capturado
 
 import cv2
 import numpy as np
-import pyautogui
 import threading
 import time
 from datetime import datetime
 import os
+from codificadores import criar_escritor, escolher_perfil
+from gravacao_assincrona import GravadorAssincrono, POLITICA_DESCARTAR_CONTANDO
+
+
+class CapturaMSS:
+    """Captura com o mss: memória compartilhada do X11 (XShm), GDI ou CoreGraphics"""
+    
+    def __init__(self, area):
+        import mss
+        x, y, width, height = area
+        # O mss deve ser usado na thread que o criou (crie dentro do laço de captura)
+        self._sct = mss.mss()
+        self._regiao = {"left": x, "top": y, "width": width, "height": height}
+        self.frame = np.empty((height, width, 3), np.uint8)  # Reaproveitado a cada captura
+    
+    def capturar(self):
+        """Captura a área e devolve o frame BGR (sempre o mesmo buffer)"""
+        tela = self._sct.grab(self._regiao)
+        # BGRA crus do mss vistos como array, sem cópia; o cvtColor escreve no buffer fixo
+        bgra = np.frombuffer(tela.raw, np.uint8).reshape(tela.height, tela.width, 4)
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self.frame)
+        return self.frame
+    
+    def fechar(self):
+        self._sct.close()
+
+
+class CapturaPyAutoGUI:
+    """Captura com o pyautogui (mais lenta: passa por uma imagem PIL)"""
+    
+    def __init__(self, area):
+        import pyautogui
+        self._pyautogui = pyautogui
+        self._area = area
+        self.frame = np.empty((area[3], area[2], 3), np.uint8)
+    
+    def capturar(self):
+        rgb = np.asarray(self._pyautogui.screenshot(region=self._area))
+        cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=self.frame)
+        return self.frame
+    
+    def fechar(self):
+        pass
+
+
+CAPTURAS = {"mss": CapturaMSS, "pyautogui": CapturaPyAutoGUI}
+
+
+def backend_captura_disponivel():
+    """Nome do backend de captura instalado (mss de preferência), ou None"""
+    for nome in CAPTURAS:
+        try:
+            __import__(nome)
+            return nome
+        except ImportError:
+            continue
+    return None
+
+
+def tamanho_tela(backend):
+    """(largura, altura) do monitor principal"""
+    if backend == "mss":
+        import mss
+        with mss.mss() as sct:
+            monitor = sct.monitors[1]
+            return monitor["width"], monitor["height"]
+    import pyautogui
+    screen_size = pyautogui.size()
+    return screen_size.width, screen_size.height
+
 
 class GravadorTela:
     """
@@ -18,21 +99,34 @@ class GravadorTela:
     
     def __init__(self):
         self.gravando = False
-        self.video_writer = None
+        self.video_writer = None  # GravadorAssincrono: codifica em outra thread
         self.thread_gravacao = None
+        self.perfil_gravacao = "opencv"  # Codificador (ver codificadores.PERFIS_CODIFICACAO)
+        self.relatorio_por_segundo = True  # Mostra o FPS capturado a cada segundo
+        self._parar = threading.Event()
         
-    def iniciar_gravacao_tela(self, area=None, fps=20):
+        # Estatísticas da última gravação
+        self.frames_capturados = 0
+        self.frames_repetidos = 0  # Horários perdidos preenchidos com o frame seguinte
+        self.erro = None
+        
+    def iniciar_gravacao_tela(self, area=None, fps=20, backend=None):
         """
         Inicia gravação da tela
         
         Args:
             area: Tupla (x, y, width, height) para gravar área específica
             fps: Frames por segundo
+            backend: "mss" ou "pyautogui" (padrão: o primeiro instalado)
         """
+        backend = backend or backend_captura_disponivel()
+        if backend is None:
+            raise ImportError("Instale o mss (pip install mss) ou o pyautogui")
+        
         if area is None:
             # Grava tela inteira
-            screen_size = pyautogui.size()
-            area = (0, 0, screen_size.width, screen_size.height)
+            width, height = tamanho_tela(backend)
+            area = (0, 0, width, height)
         
         x, y, width, height = area
         
@@ -40,68 +134,109 @@ class GravadorTela:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         nome_arquivo = f"demo_contador_{timestamp}.mp4"
         
-        # Configurações do vídeo
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.video_writer = cv2.VideoWriter(
-            nome_arquivo, fourcc, fps, (width, height)
+        # Codificador escolhido, numa thread separada da captura
+        self.video_writer = GravadorAssincrono(
+            nome_arquivo, fps, (width, height),
+            escritor=criar_escritor(nome_arquivo, fps, (width, height), self.perfil_gravacao),
+            politica=POLITICA_DESCARTAR_CONTANDO
         )
         
         print(f"🎬 Iniciando gravação da tela: {nome_arquivo}")
-        print(f"📊 Área: {width}x{height} em ({x}, {y})")
+        print(f"📊 Área: {width}x{height} em ({x}, {y}) @ {fps} FPS (captura: {backend})")
         print("🛑 Pressione Ctrl+C para parar")
         
         self.gravando = True
         self.nome_arquivo = nome_arquivo
+        self._parar.clear()
+        self.frames_capturados = 0
+        self.frames_repetidos = 0
+        self.erro = None
         
-        # Inicia thread de gravação
+        # Inicia thread de captura
         self.thread_gravacao = threading.Thread(
             target=self._gravar_loop, 
-            args=(area, fps)
+            args=(area, fps, CAPTURAS[backend])
         )
         self.thread_gravacao.start()
         
         return nome_arquivo
     
-    def _gravar_loop(self, area, fps):
-        """Loop principal de gravação"""
-        x, y, width, height = area
-        delay = 1.0 / fps
+    def _gravar_loop(self, area, fps, classe_captura):
+        """Loop de captura com horários fixos (a codificação é em outra thread)"""
+        periodo = 1.0 / fps
+        try:
+            captura = classe_captura(area)
+        except Exception as e:
+            self.erro = e
+            print(f"❌ Erro ao iniciar a captura: {e}")
+            return
         
-        while self.gravando:
-            try:
-                # Captura screenshot
-                screenshot = pyautogui.screenshot(region=area)
-                
-                # Converte para array numpy
-                frame = np.array(screenshot)
+        inicio = time.perf_counter()
+        proximo = 0      # Índice do próximo horário (frame) do vídeo
+        pendentes = 0    # Horários cujo frame a fila de gravação descartou
+        segundo = inicio
+        capturados_segundo = repetidos_segundo = 0
+        
+        try:
+            while not self._parar.is_set():
+                # Dorme só o que falta até o horário do próximo frame
+                espera = inicio + proximo * periodo - time.perf_counter()
+                if espera > 0 and self._parar.wait(espera):
+                    break
                 
-                # Converte RGB para BGR (OpenCV usa BGR)
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                frame = captura.capturar()
                 
-                # Escreve frame
-                self.video_writer.write(frame)
+                # Horário a que esta captura corresponde; os perdidos desde o
+                # último frame (captura lenta) são preenchidos com este
+                agora = time.perf_counter()
+                atual = max(proximo, int((agora - inicio) / periodo))
+                repeticoes = atual - proximo + 1 + pendentes
+                if self.video_writer.write(frame, repeticoes):
+                    pendentes = 0
+                else:
+                    pendentes = repeticoes  # O próximo frame ocupa estes horários
                 
-                time.sleep(delay)
+                self.frames_capturados += 1
+                self.frames_repetidos += atual - proximo
+                capturados_segundo += 1
+                repetidos_segundo += atual - proximo
+                proximo = atual + 1
                 
-            except Exception as e:
-                print(f"❌ Erro na gravação: {e}")
-                break
+                # RELATÓRIO POR SEGUNDO
+                if self.relatorio_por_segundo and agora - segundo >= 1.0:
+                    print(f"⏱️ {capturados_segundo / (agora - segundo):.1f} FPS capturados "
+                          f"(alvo {fps}) | repetidos: {repetidos_segundo} | "
+                          f"fila: {self.video_writer.profundidade}")
+                    segundo = agora
+                    capturados_segundo = repetidos_segundo = 0
+        except Exception as e:
+            self.erro = e
+            print(f"❌ Erro na gravação: {e}")
+        finally:
+            captura.fechar()
+            # Fecha o vídeo no horário em que a gravação parou
+            if pendentes:
+                self.video_writer.write(frame, pendentes)
     
     def parar_gravacao(self):
         """Para a gravação"""
         if self.gravando:
             self.gravando = False
+            self._parar.set()
             
             # Aguarda thread terminar
             if self.thread_gravacao:
                 self.thread_gravacao.join()
             
-            # Libera video writer
+            # Espera a codificação do que ainda está na fila
             if self.video_writer:
                 self.video_writer.release()
             
             print(f"✅ Gravação finalizada!")
             print(f"📁 Salvo em: {os.path.abspath(self.nome_arquivo)}")
+            print(f"🎯 {self.frames_capturados} capturas, {self.frames_repetidos} frame(s) "
+                  f"repetido(s) para manter o tempo")
+            self.video_writer.imprimir_resumo()
 
 def gravar_demonstracao():
     """
@@ -127,6 +262,8 @@ def gravar_demonstracao():
     gravador = GravadorTela()
     
     try:
+        gravador.perfil_gravacao = escolher_perfil()
+        
         if opcao == "1":
             # Tela inteira
             nome_arquivo = gravador.iniciar_gravacao_tela()
@@ -167,11 +304,10 @@ def gravar_demonstracao():
         gravador.parar_gravacao()
 
 if __name__ == "__main__":
-    # Verifica se pyautogui está instalado
-    try:
-        import pyautogui
+    # Verifica se há como capturar a tela (mss de preferência)
+    if backend_captura_disponivel():
         gravar_demonstracao()
-    except ImportError:
-        print("❌ PyAutoGUI não instalado!")
-        print("💡 Execute: pip install pyautogui")
+    else:
+        print("❌ Nenhum backend de captura instalado!")
+        print("💡 Execute: pip install mss   (ou: pip install pyautogui)")
         print("Depois rode este script novamente.")
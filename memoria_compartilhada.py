@@ -0,0 +1,202 @@
+# ========================================
+# TRANSPORTE DE FRAMES POR MEMÓRIA COMPARTILHADA
+# ========================================
+# Em vez de serializar (pickle) frames BGR de ~6 MB por filas entre
+# processos, cada fonte tem um anel de slots pré-alocados em
+# multiprocessing.shared_memory:
+# - o cv2.VideoCapture decodifica direto dentro de um slot
+# - o outro processo enxerga o slot como um array NumPy (sem cópia)
+# - pelas filas só passam o nome do anel, o índice do slot e a geração
+#
+# Cada slot tem um contador de geração (seqlock): ímpar durante a escrita,
+# par quando o frame está completo. O leitor confere a geração antes e
+# depois de usar o frame, então nunca usa um frame "rasgado" sem perceber.
+
+import uuid  # Nomes únicos para os blocos de memória
+from multiprocessing import shared_memory
+
+import cv2  # Captura direto para o slot
+import numpy as np  # Visões dos slots
+
+ALINHAMENTO = 64  # Bytes; cada frame começa alinhado a uma linha de cache
+
+
+def _alinhar(valor):
+    return (valor + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+class AnelFrames:
+    """
+    Anel de N slots de frames do mesmo formato em memória compartilhada.
+
+    Layout do bloco: [gerações int64 x N][frame 0][frame 1]...[frame N-1]
+    O processo que cria o anel é o único que escreve; os demais só leem.
+    """
+
+    def __init__(self, formato, num_slots=4, nome=None, criar=True):
+        """
+        Args:
+            formato (tuple): Formato de cada frame, ex.: (1080, 1920, 3)
+            num_slots (int): Quantidade de slots no anel
+            nome (str): Nome do bloco (obrigatório ao anexar)
+            criar (bool): True cria o bloco; False anexa a um bloco existente
+        """
+        self.formato = tuple(int(v) for v in formato)
+        self.num_slots = int(num_slots)
+        self.bytes_frame = int(np.prod(self.formato))
+        self._passo = _alinhar(self.bytes_frame)
+        self._inicio_frames = _alinhar(8 * self.num_slots)
+        tamanho = self._inicio_frames + self._passo * self.num_slots
+
+        if criar:
+            nome = nome or f"contador_{uuid.uuid4().hex[:12]}"
+            self.shm = shared_memory.SharedMemory(name=nome, create=True, size=tamanho)
+        else:
+            # Quem anexa não é dono do bloco: no Python 3.13+ nem registra no
+            # resource_tracker. Antes disso, processos criados pelo mesmo pai
+            # (spawn) dividem um único tracker, e o registro repetido é inofensivo
+            try:
+                self.shm = shared_memory.SharedMemory(name=nome, track=False)
+            except TypeError:
+                self.shm = shared_memory.SharedMemory(name=nome)
+        self.dono = criar
+        self.nome = self.shm.name
+
+        self.geracoes = np.ndarray((self.num_slots,), np.int64, self.shm.buf, 0)
+        self._visoes = [np.ndarray(self.formato, np.uint8, self.shm.buf,
+                                   self._inicio_frames + i * self._passo)
+                        for i in range(self.num_slots)]
+        if criar:
+            self.geracoes[:] = 0
+        self._proximo = 0
+
+    @classmethod
+    def anexar(cls, descritor):
+        """Anexa a um anel criado por outro processo (veja descritor())"""
+        return cls(descritor["formato"], descritor["num_slots"], descritor["nome"], criar=False)
+
+    def descritor(self):
+        """Dados mínimos (picklable) para outro processo anexar a este anel"""
+        return {"nome": self.nome, "formato": self.formato, "num_slots": self.num_slots}
+
+    def visao(self, slot):
+        """Array NumPy que aponta direto para a memória do slot (sem cópia)"""
+        return self._visoes[slot]
+
+    def slot_de(self, frame):
+        """Índice do slot se 'frame' for a visão de um slot deste anel, senão None"""
+        if not isinstance(frame, np.ndarray) or frame.shape != self.formato:
+            return None
+        endereco = frame.__array_interface__["data"][0]
+        for slot, visao in enumerate(self._visoes):
+            if visao.__array_interface__["data"][0] == endereco:
+                return slot
+        return None
+
+    # ----- Lado do escritor -----
+
+    def proximo_slot(self):
+        """Próximo slot a ser escrito (round-robin)"""
+        slot = self._proximo
+        self._proximo = (self._proximo + 1) % self.num_slots
+        return slot
+
+    def iniciar_escrita(self, slot):
+        """Marca o slot como 'em escrita' (geração ímpar)"""
+        self.geracoes[slot] += 1
+
+    def concluir_escrita(self, slot):
+        """Marca o slot como completo (geração par) e devolve a geração"""
+        self.geracoes[slot] += 1
+        return int(self.geracoes[slot])
+
+    # ----- Lado do leitor -----
+
+    def ler(self, slot, geracao):
+        """
+        Visão do slot, só se ainda contiver o frame da geração informada.
+
+        Returns:
+            np.ndarray | None: None se o slot já foi reescrito ou está em escrita
+        """
+        if geracao % 2 or int(self.geracoes[slot]) != geracao:
+            return None
+        return self._visoes[slot]
+
+    def ainda_valido(self, slot, geracao):
+        """Confere, depois do uso, se o frame não foi reescrito no meio"""
+        return int(self.geracoes[slot]) == geracao
+
+    def fechar(self):
+        """Libera as visões e fecha o bloco neste processo"""
+        self._visoes = []
+        self.geracoes = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Ainda há frames do anel em uso; o mapeamento some com eles
+        if self.dono:
+            self.shm.unlink()
+
+
+class CapturaCompartilhada:
+    """
+    cv2.VideoCapture que decodifica cada frame direto num slot do anel.
+
+    Tem a mesma interface usada pelo contador (read, get, isOpened, release),
+    então pode ser passada no lugar do caminho do vídeo para
+    ContadorPessoas.contar_headless. O frame devolvido por read() é a visão
+    do slot e continua válido até num_slots leituras depois, por isso use
+    lotes menores que num_slots.
+    """
+
+    def __init__(self, fonte, num_slots=4):
+        self.fonte = fonte
+        self.cap = cv2.VideoCapture(fonte)
+        self.anel = None
+        self._primeiro = None
+        self.copias = 0  # Leituras que não couberam direto no slot (formato mudou)
+
+        if self.cap.isOpened():
+            # O primeiro frame define o formato dos slots
+            ret, frame = self.cap.read()
+            if ret:
+                self.anel = AnelFrames(frame.shape, num_slots)
+                self._primeiro = frame
+
+    def isOpened(self):
+        return self.anel is not None
+
+    def get(self, propriedade):
+        return self.cap.get(propriedade)
+
+    def read(self):
+        """Decodifica o próximo frame direto no próximo slot do anel"""
+        if self.anel is None:
+            return False, None
+
+        slot = self.anel.proximo_slot()
+        visao = self.anel.visao(slot)
+        self.anel.iniciar_escrita(slot)
+
+        if self._primeiro is not None:
+            visao[...] = self._primeiro
+            self._primeiro = None
+            ret = True
+        else:
+            ret, frame = self.cap.read(image=visao)
+            if ret and not np.shares_memory(frame, visao):
+                # O OpenCV alocou outro buffer (ex.: resolução mudou): copia
+                if frame.shape != visao.shape:
+                    frame = cv2.resize(frame, (visao.shape[1], visao.shape[0]))
+                visao[...] = frame
+                self.copias += 1
+
+        self.anel.concluir_escrita(slot)
+        return ret, (visao if ret else None)
+
+    def release(self):
+        self.cap.release()
+        if self.anel is not None:
+            self.anel.fechar()
+            self.anel = None
@@ -0,0 +1,270 @@
+# ========================================
+# MÉTRICAS AO VIVO NO FORMATO DO PROMETHEUS
+# ========================================
+# Expõe em http://HOST:PORTA/metrics (formato texto 0.0.4 do Prometheus):
+# - entradas, saídas e ocupação por fonte
+# - FPS de processamento
+# - histogramas de latência por estágio (perfil.py)
+# - profundidade das filas e frames descartados
+# - trilhas vivas
+#
+# O servidor roda em threads próprias e só LÊ o que o laço de contagem já
+# mantém (contadores inteiros, listas de baldes, tamanho das filas): nada
+# de trava compartilhada, então uma coleta nunca segura processar_frame.
+# Cada leitura é atômica sob o GIL; uma coleta pode pegar um frame "no
+# meio", o que não importa para métricas amostradas a cada poucos segundos.
+#
+# Uso:
+#   servidor = ServidorMetricas(9100)
+#   servidor.adicionar(ColetorContador(contador))
+#   servidor.iniciar()
+#   # prometheus.yml: scrape_configs -> targets: ["maquina:9100"]
+#
+# Teste rápido:
+#   curl http://localhost:9100/metrics
+
+import threading  # Servidor fora do laço de contagem
+import time  # FPS entre coletas
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escapar(valor):
+    """Escapa o valor de um rótulo (barra, aspas e quebra de linha)"""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    if isinstance(valor, float):
+        return repr(valor)
+    return str(valor)
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos.items()) + "}"
+
+
+def _ler_fila(objeto):
+    """
+    (profundidade, descartados) de qualquer fila do projeto: FilaLimitada
+    (tamanho()), GravadorAssincrono / GravadorEventos (profundidade) e
+    ExibidorAssincrono (frames_pulados = frames que não chegaram à tela).
+    """
+    profundidade = getattr(objeto, "profundidade", None)
+    if profundidade is None and callable(getattr(objeto, "tamanho", None)):
+        profundidade = objeto.tamanho()
+    descartados = getattr(objeto, "descartados", None)
+    if descartados is None:
+        descartados = getattr(objeto, "frames_pulados", 0)
+    return profundidade or 0, descartados
+
+
+class Familia:
+    """Uma métrica (nome, tipo, ajuda) e suas amostras"""
+
+    def __init__(self, nome, tipo, ajuda):
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self.amostras = []  # (nome da amostra, rótulos, valor)
+
+    def adicionar(self, rotulos, valor, sufixo=""):
+        self.amostras.append((self.nome + sufixo, rotulos, valor))
+        return self
+
+    def adicionar_histograma(self, rotulos, limites, contagens, soma):
+        """
+        Baldes cumulativos (le=...), +Inf, _sum e _count.
+
+        +Inf e _count saem da soma das mesmas contagens (a última é o balde
+        acima do maior limite), então nunca ficam abaixo do último balde.
+        """
+        acumulado = 0
+        for limite, contagem in zip(limites, contagens):
+            acumulado += contagem
+            self.adicionar({**rotulos, "le": _formatar_numero(float(limite))}, acumulado, "_bucket")
+        total = sum(contagens)
+        self.adicionar({**rotulos, "le": "+Inf"}, total, "_bucket")
+        self.adicionar(rotulos, soma, "_sum")
+        self.adicionar(rotulos, total, "_count")
+        return self
+
+
+class ColetorContador:
+    """Métricas de um ContadorPessoas rodando neste processo"""
+
+    def __init__(self, contador, fonte="0"):
+        """
+        Args:
+            contador (ContadorPessoas): Contador observado (contador.perfil dá o
+                                        FPS e as latências; sem ele, só contagens)
+            fonte (str): Valor do rótulo "fonte" (câmera, vídeo...)
+        """
+        self.contador = contador
+        self.fonte = str(fonte)
+        self._trava = threading.Lock()  # Só entre coletas simultâneas
+        self._ultima_coleta = None  # (instante, frames) da coleta anterior
+
+    def _fps(self, perfil):
+        """FPS desde a coleta anterior (na primeira, desde o início do perfil)"""
+        agora = time.monotonic()
+        frames = perfil.frames
+        with self._trava:
+            instante, anteriores = self._ultima_coleta or (perfil.inicio, 0)
+            if frames < anteriores or instante < perfil.inicio:  # Perfil reiniciado (nova execução)
+                instante, anteriores = perfil.inicio, 0
+            self._ultima_coleta = (agora, frames)
+        return (frames - anteriores) / (agora - instante) if agora > instante else 0.0
+
+    def coletar(self):
+        contador = self.contador
+        rotulo = {"fonte": self.fonte}
+        entradas = contador.contador_entrada
+        saidas = contador.contador_saida
+        familias = [
+            Familia("contador_entradas_total", "counter",
+                    "Pessoas que atravessaram a linha entrando").adicionar(rotulo, entradas),
+            Familia("contador_saidas_total", "counter",
+                    "Pessoas que atravessaram a linha saindo").adicionar(rotulo, saidas),
+            Familia("contador_ocupacao", "gauge",
+                    "Pessoas no ambiente (entradas - saídas)").adicionar(rotulo, entradas - saidas),
+            Familia("contador_trilhas_vivas", "gauge",
+                    "Pessoas rastreadas no momento").adicionar(rotulo, len(contador.trilhas)),
+        ]
+
+        perfil = getattr(contador, "perfil", None)
+        if perfil is not None:
+            familias.append(Familia("contador_frames_total", "counter",
+                                    "Frames processados").adicionar(rotulo, perfil.frames))
+            familias.append(Familia("contador_fps", "gauge",
+                                    "Frames processados por segundo desde a coleta anterior")
+                            .adicionar(rotulo, round(self._fps(perfil), 2)))
+            latencias = Familia("contador_latencia_estagio_segundos", "histogram",
+                                "Tempo gasto em cada estágio do laço por frame")
+            for estagio, (contagens, soma, _) in sorted(perfil.copia().items()):
+                latencias.adicionar_histograma({**rotulo, "estagio": estagio},
+                                               perfil.limites, contagens, soma)
+            familias.append(latencias)
+
+        filas = list(getattr(contador, "filas_metricas", {}).items())
+        if filas:
+            profundidade = Familia("contador_fila_profundidade", "gauge",
+                                   "Itens esperando em cada fila")
+            descartados = Familia("contador_fila_descartados_total", "counter",
+                                  "Frames descartados (ou não exibidos) em cada fila")
+            for nome, objeto in filas:
+                itens, perdidos = _ler_fila(objeto)
+                profundidade.adicionar({**rotulo, "fila": nome}, itens)
+                descartados.adicionar({**rotulo, "fila": nome}, perdidos)
+            familias += [profundidade, descartados]
+        return familias
+
+
+class ColetorSupervisor:
+    """Métricas por fonte de um SupervisorCameras (supervisor_cameras.py)"""
+
+    def __init__(self, supervisor):
+        self.supervisor = supervisor
+
+    def coletar(self):
+        entradas = Familia("contador_entradas_total", "counter",
+                           "Pessoas que atravessaram a linha entrando")
+        saidas = Familia("contador_saidas_total", "counter",
+                         "Pessoas que atravessaram a linha saindo")
+        ocupacao = Familia("contador_ocupacao", "gauge", "Pessoas no ambiente (entradas - saídas)")
+        fps = Familia("contador_fps", "gauge", "Frames processados por segundo (último progresso)")
+        ativa = Familia("contador_fonte_rodando", "gauge", "1 se o worker da fonte está rodando")
+        for indice, estado in list(self.supervisor.estado.items()):
+            estado = dict(estado)  # Cópia: o laço do supervisor continua atualizando
+            rotulo = {"fonte": str(indice), "origem": str(estado["fonte"])}
+            entradas.adicionar(rotulo, estado["entradas"])
+            saidas.adicionar(rotulo, estado["saidas"])
+            ocupacao.adicionar(rotulo, estado["entradas"] - estado["saidas"])
+            fps.adicionar(rotulo, float(estado["fps"]))
+            ativa.adicionar(rotulo, int(estado["status"] == "rodando"))
+        return [entradas, saidas, ocupacao, fps, ativa]
+
+
+def formatar_metricas(coletores):
+    """
+    Texto de exposição do Prometheus com as famílias de todos os coletores.
+
+    Famílias de mesmo nome (ex.: dois contadores no mesmo processo) são
+    juntadas sob um único HELP/TYPE, como o formato exige.
+    """
+    familias = {}
+    for coletor in coletores:
+        for familia in coletor.coletar():
+            existente = familias.setdefault(familia.nome, familia)
+            if existente is not familia:
+                existente.amostras.extend(familia.amostras)
+
+    linhas = []
+    for familia in familias.values():
+        linhas.append(f"# HELP {familia.nome} {familia.ajuda}")
+        linhas.append(f"# TYPE {familia.nome} {familia.tipo}")
+        for nome, rotulos, valor in familia.amostras:
+            linhas.append(f"{nome}{_rotulos(rotulos)} {_formatar_numero(valor)}")
+    return "\n".join(linhas) + "\n"
+
+
+class ServidorMetricas:
+    """Servidor HTTP do /metrics, em threads daemon"""
+
+    def __init__(self, porta=9100, endereco="0.0.0.0"):
+        """
+        Args:
+            porta (int): Porta do endpoint (0 = escolhida pelo sistema)
+            endereco (str): Interface ("127.0.0.1" para só a máquina local)
+        """
+        self.porta = porta
+        self.endereco = endereco
+        self.coletores = []
+        self.coletas = 0
+        self._servidor = None
+        self._thread = None
+
+    def adicionar(self, coletor):
+        """Inclui um coletor (objeto com coletar() -> lista de Familia)"""
+        self.coletores.append(coletor)
+        return self
+
+    def iniciar(self):
+        servidor_metricas = self
+
+        class _Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                corpo = formatar_metricas(servidor_metricas.coletores).encode("utf-8")
+                servidor_metricas.coletas += 1
+                self.send_response(200)
+                self.send_header("Content-Type", TIPO_CONTEUDO)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *_):
+                pass  # Uma linha por coleta poluiria o terminal
+
+        self._servidor = ThreadingHTTPServer((self.endereco, self.porta), _Manipulador)
+        self._servidor.daemon_threads = True
+        self.porta = self._servidor.server_address[1]
+        self._thread = threading.Thread(target=self._servidor.serve_forever,
+                                        name="metricas", daemon=True)
+        self._thread.start()
+        print(f"📈 Métricas em http://{self.endereco}:{self.porta}/metrics")
+        return self
+
+    def parar(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+            self._thread = None
@@ -0,0 +1,236 @@
+# ========================================
+# TEMPOS POR ESTÁGIO DO LAÇO DE CONTAGEM
+# ========================================
+# Quando dizem que o contador está "lento", estes histogramas mostram onde
+# o tempo vai: decodificação, inferência, pós-processamento, desenho,
+# exibição ou codificação. Cada estágio tem um histograma de baldes fixos:
+# medir custa um perf_counter() e um bisect, sem alocar nada. Desligado
+# (PERFIL_DESLIGADO), cada ponto de medição é uma chamada vazia.
+#
+# Estágios medidos:
+#   captura            cap.read() (decodificação)
+#   gate               gate de movimento (só com --gate-movimento)
+#   inferencia         detector + rastreador (model.track / detector externo)
+#   pos_processamento  trilhas, verificar_passagem e eventos
+#   desenho            caixas, linha e painel
+#   clipes             pré-roll / fila dos clipes por evento
+#   entrega_tela       cópia do frame para a thread da janela
+#   exibicao           redimensionar + imshow (thread da janela)
+#   codificacao        VideoWriter.write / ffmpeg (thread de gravação)
+#   frame              laço inteiro de um frame, sem a captura
+#
+# Regra de concorrência: cada histograma tem UM escritor (a thread do
+# estágio). Quem lê de outra thread (ex.: o endpoint de métricas) só copia
+# as listas, o que sob o GIL nunca trava nem corrompe o escritor; no máximo
+# a soma e as contagens de uma leitura diferem por uma observação.
+#
+# Uso:
+#   perfil = contador.perfil or PERFIL_DESLIGADO   # Desligado: não mede nada
+#   marca = perfil.agora()
+#   ret, frame = cap.read()
+#   marca = perfil.marcar("captura", marca)
+#   ...
+#   perfil.finalizar()
+#   perfil.imprimir_relatorio()
+#   perfil.salvar_json("perfil.json")   # Para comparar máquinas
+
+import json  # Histogramas salvos para comparação
+import os  # Núcleos da máquina
+import platform  # Identificação da máquina no JSON
+import time  # Relógio monotônico
+from bisect import bisect_left  # Balde de cada observação
+
+# Limites superiores dos baldes, em segundos (de 0,1 ms a 2 s, mais finos
+# na faixa de 1 a 100 ms, onde ficam quase todos os estágios)
+LIMITES_PADRAO_S = tuple(ms / 1000 for ms in (
+    0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 25, 30,
+    40, 50, 65, 80, 100, 125, 150, 200, 250, 300, 400, 500, 750, 1000, 2000))
+
+# Percentis do relatório
+PERCENTIS = (0.50, 0.95, 0.99)
+
+# Ordem dos estágios no relatório (os demais vêm depois, em ordem alfabética)
+ORDEM_ESTAGIOS = ("captura", "gate", "inferencia", "pos_processamento", "desenho",
+                  "clipes", "entrega_tela", "exibicao", "codificacao", "frame")
+
+
+class Histograma:
+    """Histograma de baldes fixos (contagens por limite superior, como no Prometheus)"""
+
+    __slots__ = ("limites", "contagens", "soma", "total", "maximo")
+
+    def __init__(self, limites=LIMITES_PADRAO_S):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)  # Último balde: acima do maior limite
+        self.soma = 0.0
+        self.total = 0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def copia(self):
+        """
+        (contagens, soma, total) para leitura em outra thread.
+
+        O total é a soma da própria cópia das contagens: lido à parte, poderia
+        ficar atrás dos baldes (observar incrementa o balde antes do total).
+        """
+        contagens = list(self.contagens)
+        return contagens, self.soma, sum(contagens)
+
+    def percentil(self, fracao):
+        """
+        Estimativa do percentil (0-1) por interpolação linear dentro do balde.
+
+        O erro é no máximo a largura do balde (ex.: entre 10 e 12 ms).
+
+        Returns:
+            float: Segundos, ou None sem observações
+        """
+        contagens = list(self.contagens)
+        total = sum(contagens)
+        if not total:
+            return None
+        alvo = fracao * total
+        acumulado = 0
+        for i, contagem in enumerate(contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = self.limites[i - 1] if i > 0 else 0.0
+                superior = self.limites[i] if i < len(self.limites) else max(inferior, self.maximo)
+                estimativa = inferior + (superior - inferior) * (alvo - acumulado) / contagem
+                return min(estimativa, self.maximo)
+            acumulado += contagem
+        return self.maximo
+
+
+class PerfilEstagios:
+    """Histogramas de latência por estágio e contagem de frames processados"""
+
+    def __init__(self, limites=LIMITES_PADRAO_S):
+        self.limites = tuple(limites)
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Zera os histogramas (início de uma nova execução)"""
+        self.estagios = {}  # nome -> Histograma
+        self.frames = 0
+        self.inicio = time.monotonic()
+        self.fim = None
+
+    def agora(self):
+        return time.perf_counter()
+
+    def observar(self, estagio, segundos):
+        """Registra quanto um estágio levou (chamado pela thread do estágio)"""
+        histograma = self.estagios.get(estagio)
+        if histograma is None:
+            histograma = self.estagios.setdefault(estagio, Histograma(self.limites))
+        histograma.observar(segundos)
+
+    def marcar(self, estagio, desde):
+        """Registra o tempo de 'desde' até agora e devolve o agora (início do próximo estágio)"""
+        agora = time.perf_counter()
+        self.observar(estagio, agora - desde)
+        return agora
+
+    def contar_frame(self):
+        """Mais um frame passou pelo laço inteiro"""
+        self.frames += 1
+
+    def finalizar(self):
+        """Fixa o fim da execução (base do FPS do relatório)"""
+        self.fim = time.monotonic()
+
+    def copia(self):
+        """{estagio: (contagens, soma, total)} para leitura em outra thread"""
+        return {nome: h.copia() for nome, h in list(self.estagios.items())}
+
+    @property
+    def duracao(self):
+        return (self.fim if self.fim is not None else time.monotonic()) - self.inicio
+
+    @property
+    def fps(self):
+        duracao = self.duracao
+        return self.frames / duracao if duracao > 0 else 0.0
+
+    def _estagios_ordenados(self):
+        estagios = dict(list(self.estagios.items()))
+        ordem = [e for e in ORDEM_ESTAGIOS if e in estagios]
+        ordem += sorted(e for e in estagios if e not in ORDEM_ESTAGIOS)
+        return [(nome, estagios[nome]) for nome in ordem]
+
+    def resumo(self):
+        """Percentis e histogramas completos em um dict serializável em JSON"""
+        estagios = {}
+        for nome, h in self._estagios_ordenados():
+            contagens, soma, total = h.copia()
+            estagios[nome] = {
+                "total": total,
+                "media_ms": round(soma / total * 1000, 3) if total else None,
+                **{f"p{int(p * 100)}_ms": round(h.percentil(p) * 1000, 3) if total else None
+                   for p in PERCENTIS},
+                "max_ms": round(h.maximo * 1000, 3),
+                "soma_s": round(soma, 6),
+                "contagens": contagens,
+            }
+        return {
+            "frames": self.frames,
+            "duracao_s": round(self.duracao, 3),
+            "fps": round(self.fps, 2),
+            "limites_s": list(self.limites),
+            "estagios": estagios,
+            "maquina": {
+                "sistema": platform.platform(),
+                "processador": platform.processor() or platform.machine(),
+                "nucleos": os.cpu_count(),
+                "python": platform.python_version(),
+            },
+        }
+
+    def imprimir_relatorio(self):
+        """Tabela de p50/p95/p99 por estágio e o FPS alcançado"""
+        resumo = self.resumo()
+        print("\n" + "=" * 70)
+        print(f"⏱️ TEMPOS POR ESTÁGIO ({resumo['frames']} frames em {resumo['duracao_s']:.1f}s "
+              f"= {resumo['fps']:.1f} FPS)")
+        print(f"{'estágio':<20}{'n':>8}{'média':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}")
+        print("-" * 70)
+        for nome, e in resumo["estagios"].items():
+            if not e["total"]:
+                continue
+            print(f"{nome:<20}{e['total']:>8}{e['media_ms']:>9.2f}{e['p50_ms']:>9.2f}"
+                  f"{e['p95_ms']:>9.2f}{e['p99_ms']:>9.2f}{e['max_ms']:>9.2f}")
+        print("=" * 70)
+        print("Tempos em ms; captura, exibicao e codificacao podem rodar em paralelo ao resto "
+              "(threads próprias)")
+
+    def salvar_json(self, caminho):
+        """Salva o resumo com os histogramas completos"""
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.resumo(), f, ensure_ascii=False, indent=2)
+        print(f"💾 Perfil salvo em: {caminho}")
+
+
+class _PerfilDesligado:
+    """Mesma interface de medição do PerfilEstagios, sem medir nada (perfil desligado)"""
+
+    def agora(self):
+        return 0.0
+
+    def marcar(self, estagio, desde):
+        return 0.0
+
+    def observar(self, estagio, segundos):
+        pass
+
+    def contar_frame(self):
+        pass
+
+
+PERFIL_DESLIGADO = _PerfilDesligado()
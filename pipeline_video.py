@@ -0,0 +1,265 @@
+# ========================================
+# PIPELINE DE VÍDEO EM ESTÁGIOS (THREADS)
+# ========================================
+# Separa o processamento de vídeo do ContadorPessoas em três estágios
+# ligados por filas limitadas:
+#   1. Captura     -> cap.read() (decodificação)
+#   2. Inferência  -> YOLO + rastreamento + contagem (sempre em ordem)
+#   3. Exibição    -> desenho; imshow/waitKey ficam com o ExibidorAssincrono
+#                     (exibicao.py), com FPS de tela limitado
+# Assim o tempo de decodificação e de desenho deixa de somar à latência
+# da inferência, e o FPS sustentado se aproxima do FPS da inferência pura.
+
+import queue  # Filas thread-safe
+import threading  # Threads dos estágios
+import time  # Medição de FPS
+
+import cv2  # OpenCV para captura e exibição
+
+from preprocessamento import CapturaReutilizavel  # Decodifica em buffers reaproveitados
+from exibicao import ExibidorAssincrono  # Janela em thread própria, com FPS limitado
+from perfil import PERFIL_DESLIGADO  # Tempos por estágio (quando o contador tem perfil)
+
+# Políticas de contrapressão (o que fazer quando a fila está cheia)
+POLITICA_BLOQUEAR = "bloquear"                  # Produtor espera o consumidor
+POLITICA_DESCARTAR_ANTIGO = "descartar_antigo"  # Descarta o item mais antigo da fila
+
+POLITICAS_FILA = (POLITICA_BLOQUEAR, POLITICA_DESCARTAR_ANTIGO)
+
+# Marcador de fim de fluxo (nunca é descartado)
+FIM = object()
+
+
+class FilaLimitada:
+    """
+    Fila de tamanho fixo com política de contrapressão configurável.
+
+    - "bloquear": o produtor espera até haver espaço (nenhum frame se perde)
+    - "descartar_antigo": o item mais antigo é descartado para dar lugar
+      ao novo (latência baixa, mas frames podem ser pulados)
+
+    A ordem dos itens que saem da fila é sempre a mesma ordem de entrada.
+    """
+
+    def __init__(self, capacidade=4, politica=POLITICA_BLOQUEAR):
+        if politica not in POLITICAS_FILA:
+            raise ValueError(f"Política de fila inválida: {politica}")
+        if capacidade < 1:
+            raise ValueError("A capacidade da fila deve ser pelo menos 1")
+
+        self.capacidade = capacidade
+        self.politica = politica
+        self.descartados = 0  # Itens descartados por falta de espaço
+        self._fila = queue.Queue(maxsize=capacidade)
+
+    def colocar(self, item, parar=None):
+        """
+        Coloca um item na fila respeitando a política escolhida.
+
+        Args:
+            item: Item a ser enfileirado
+            parar (threading.Event): Se definido, desiste de esperar quando sinalizado
+
+        Returns:
+            bool: True se o item entrou na fila, False se a espera foi interrompida
+        """
+        if self.politica == POLITICA_BLOQUEAR or item is FIM:
+            while True:
+                try:
+                    self._fila.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    if parar is not None and parar.is_set():
+                        return False
+
+        # POLITICA_DESCARTAR_ANTIGO: abre espaço removendo o item mais antigo
+        while True:
+            try:
+                self._fila.put_nowait(item)
+                return True
+            except queue.Full:
+                try:
+                    antigo = self._fila.get_nowait()
+                except queue.Empty:
+                    continue
+                if antigo is FIM:
+                    # O fim do fluxo nunca é descartado
+                    self._fila.put_nowait(antigo)
+                    return False
+                self.descartados += 1
+
+    def retirar(self, timeout=None):
+        """Retira o próximo item (lança queue.Empty se o timeout expirar)"""
+        return self._fila.get(timeout=timeout)
+
+    def finalizar(self, parar=None):
+        """Sinaliza ao consumidor que não haverá mais itens"""
+        self.colocar(FIM, parar)
+
+    def tamanho(self):
+        """Número aproximado de itens na fila"""
+        return self._fila.qsize()
+
+
+class PipelineVideo:
+    """
+    Executa a contagem de um ContadorPessoas em três threads encadeadas.
+
+    A thread de inferência é a única que toca no rastreador e nos
+    contadores, e consome os frames na ordem em que foram capturados,
+    então a contagem continua estritamente ordenada por frame.
+    O desenho fica na thread principal; a janela do OpenCV é atualizada
+    pelo ExibidorAssincrono (na thread principal só no macOS, onde o
+    HighGUI exige isso).
+    """
+
+    def __init__(self, contador, tamanho_fila=4, politica=POLITICA_BLOQUEAR):
+        """
+        Args:
+            contador (ContadorPessoas): Contador que fará detecção e contagem
+            tamanho_fila (int): Capacidade de cada fila entre estágios
+            politica (str): "bloquear" ou "descartar_antigo"
+        """
+        self.contador = contador
+        self.fila_captura = FilaLimitada(tamanho_fila, politica)
+        self.fila_exibicao = FilaLimitada(tamanho_fila, politica)
+        self.parar = threading.Event()
+        self.erros = []  # Exceções levantadas nas threads de trabalho
+
+        # Estatísticas
+        self.frames_capturados = 0
+        self.frames_processados = 0
+        self.frames_exibidos = 0
+
+    def _estagio_captura(self, cap):
+        """Estágio 1: decodifica frames e os envia em ordem para a inferência"""
+        perfil = getattr(self.contador, "perfil", None) or PERFIL_DESLIGADO
+        try:
+            indice = 0
+            while not self.parar.is_set():
+                marca = perfil.agora()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                perfil.marcar("captura", marca)
+                self.frames_capturados += 1
+                if not self.fila_captura.colocar((indice, frame), self.parar):
+                    break
+                indice += 1
+        except Exception as e:
+            self.erros.append(e)
+            self.parar.set()
+        finally:
+            self.fila_captura.finalizar(self.parar)
+
+    def _estagio_inferencia(self):
+        """Estágio 2: detecção + rastreamento + contagem, um frame por vez"""
+        perfil = getattr(self.contador, "perfil", None) or PERFIL_DESLIGADO
+        try:
+            while not self.parar.is_set():
+                try:
+                    item = self.fila_captura.retirar(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is FIM:
+                    break
+
+                indice, frame = item
+                deteccoes = self.contador.detectar_e_contar(frame)
+                perfil.contar_frame()
+                self.frames_processados += 1
+
+                # Leva junto uma "foto" dos contadores deste frame para o painel
+                pacote = (indice, frame, deteccoes,
+                          self.contador.contador_entrada, self.contador.contador_saida)
+                if not self.fila_exibicao.colocar(pacote, self.parar):
+                    break
+        except Exception as e:
+            self.erros.append(e)
+            self.parar.set()
+        finally:
+            self.fila_exibicao.finalizar(self.parar)
+
+    def executar(self, video_path, nome_janela='Contador de Pessoas'):
+        """
+        Processa o vídeo inteiro com os três estágios em paralelo.
+
+        Args:
+            video_path (str): Caminho do vídeo (ou índice/URL aceito pelo OpenCV)
+            nome_janela (str): Título da janela de exibição
+
+        Returns:
+            bool: False se a fonte não pôde ser aberta
+        """
+        if self.fila_captura.politica == POLITICA_BLOQUEAR:
+            # Frames em uso ao mesmo tempo: as duas filas + um em cada estágio +
+            # o que está sendo lido. A captura espera quando as filas enchem,
+            # então com um buffer para cada nenhum é sobrescrito em uso
+            buffers = self.fila_captura.capacidade + self.fila_exibicao.capacidade + 4
+            cap = CapturaReutilizavel(cv2.VideoCapture(video_path), buffers)
+        else:
+            # Descartando, a captura nunca espera e daria a volta no anel por
+            # cima de frames ainda na inferência ou no desenho: frame novo a cada leitura
+            cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print("❌ Erro ao abrir o vídeo!")
+            return False
+
+        print(f"▶️ Pipeline em threads (fila={self.fila_captura.capacidade}, "
+              f"política={self.fila_captura.politica})")
+        print("Pressione 'q' para sair")
+
+        thread_captura = threading.Thread(target=self._estagio_captura, args=(cap,),
+                                          name="pipeline-captura", daemon=True)
+        thread_inferencia = threading.Thread(target=self._estagio_inferencia,
+                                             name="pipeline-inferencia", daemon=True)
+
+        inicio = time.monotonic()
+        thread_captura.start()
+        thread_inferencia.start()
+
+        # Estágio 3: desenho na thread principal; a janela é atualizada pelo
+        # exibidor (criada uma vez, no máximo fps_exibicao redesenhos/s)
+        janela = ExibidorAssincrono(nome_janela, tamanho=(1200, 800),
+                                    fps_max=getattr(self.contador, "fps_exibicao", 30.0),
+                                    preparar=self.contador.preparar_exibicao,
+                                    perfil_estagios=getattr(self.contador, "perfil", None)).iniciar()
+        filas = getattr(self.contador, "filas_metricas", None)
+        if filas is not None:  # Profundidade e descartes visíveis em metricas.py
+            filas.update(captura=self.fila_captura, resultados=self.fila_exibicao,
+                         exibicao=janela)
+        perfil = getattr(self.contador, "perfil", None) or PERFIL_DESLIGADO
+        try:
+            while janela.tecla() != 'q':
+                try:
+                    item = self.fila_exibicao.retirar(timeout=0.1)
+                except queue.Empty:
+                    if self.parar.is_set():
+                        break
+                    continue
+                if item is FIM:
+                    break
+
+                _, frame, deteccoes, entrada, saida = item
+                self.contador.desenhar_anotacoes(frame, deteccoes, entrada, saida)
+                marca = perfil.agora()
+                janela.mostrar(frame)
+                perfil.marcar("entrega_tela", marca)
+                self.frames_exibidos += 1
+        finally:
+            self.parar.set()
+            thread_captura.join()
+            thread_inferencia.join()
+            cap.release()
+            janela.parar()
+
+        duracao = max(time.monotonic() - inicio, 1e-9)
+        print(f"⚡ Pipeline: {self.frames_processados} frames processados em {duracao:.1f}s "
+              f"({self.frames_processados / duracao:.1f} FPS)")
+        descartados = self.fila_captura.descartados + self.fila_exibicao.descartados
+        if descartados:
+            print(f"⚠️ Frames descartados pelas filas: {descartados}")
+
+        if self.erros:
+            raise self.erros[0]
+        return True
@@ -0,0 +1,193 @@
+# ========================================
+# PRÉ-PROCESSAMENTO SEM ALOCAÇÕES POR FRAME
+# ========================================
+# Em 30 FPS por várias câmeras, criar arrays novos a cada frame (frame
+# lido, imagem redimensionada, letterbox, tensor float32) pesa na CPU e
+# faz o RSS oscilar. Aqui todos os buffers são criados uma vez por
+# resolução de fonte e reaproveitados:
+# - CapturaReutilizavel: cap.read(image=buf) decodifica num anel fixo de frames
+# - PreProcessador: resize direto no miolo de uma imagem com borda cinza
+#   já pintada e conversão BGR->RGB/HWC->CHW/0..1 direto no tensor de entrada
+# O contador 'alocacoes' de cada um só sobe quando a resolução (ou o
+# tamanho do lote) muda; por frame ele fica parado.
+#
+# Verificação rápida (tracemalloc):
+#   python preprocessamento.py
+
+import cv2  # Leitura e redimensionamento com buffers de destino
+import numpy as np  # Buffers pré-alocados
+
+COR_BORDA = 114  # Mesma cor de borda do letterbox da Ultralytics
+
+
+class CapturaReutilizavel:
+    """
+    Envolve um cv2.VideoCapture para decodificar sempre nos mesmos buffers.
+
+    O frame devolvido por read() é um dos 'buffers' arrays do anel e é
+    reescrito 'buffers' leituras depois: use buffers maior que o número de
+    frames guardados ao mesmo tempo (ex.: tamanho do lote + 1).
+    """
+
+    def __init__(self, cap, buffers=2):
+        """
+        Args:
+            cap: cv2.VideoCapture já aberto (ou o caminho/índice da fonte)
+            buffers (int): Quantidade de frames no anel
+        """
+        self.cap = cap if hasattr(cap, "read") else cv2.VideoCapture(cap)
+        self.num_buffers = max(1, buffers)
+        self.buffers = []
+        self._proximo = 0
+        self.alocacoes = 0  # Quantas vezes o anel foi (re)criado
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, propriedade):
+        return self.cap.get(propriedade)
+
+    def release(self):
+        self.cap.release()
+
+    def read(self):
+        """Lê o próximo frame dentro do próximo buffer do anel"""
+        if not self.buffers:
+            ret, frame = self.cap.read()
+            if not ret:
+                return False, None
+            self._alocar(frame.shape)
+            self.buffers[0][...] = frame
+            self._proximo = 1 % self.num_buffers
+            return True, self.buffers[0]
+
+        buf = self.buffers[self._proximo]
+        ret, frame = self.cap.read(image=buf)
+        if not ret:
+            return False, None
+        if frame is not buf and not np.shares_memory(frame, buf):
+            # Resolução da fonte mudou: recria o anel no novo tamanho
+            self._alocar(frame.shape)
+            buf = self.buffers[0]
+            buf[...] = frame
+            self._proximo = 0
+        self._proximo = (self._proximo + 1) % self.num_buffers
+        return True, buf
+
+    def _alocar(self, formato):
+        self.buffers = [np.empty(formato, np.uint8) for _ in range(self.num_buffers)]
+        self.alocacoes += 1
+
+
+class PreProcessador:
+    """
+    Letterbox + tensor de entrada do modelo em buffers reaproveitados.
+
+    Mesma geometria do letterbox da Ultralytics (veja detector_onnx.letterbox).
+    """
+
+    def __init__(self, imgsz=640, stride=32, retangular=True):
+        """
+        Args:
+            imgsz (int): Lado maior da entrada do modelo
+            stride (int): Múltiplo exigido pelo modelo
+            retangular (bool): Borda mínima (True) ou entrada quadrada imgsz x imgsz
+        """
+        self.imgsz = imgsz
+        self.stride = stride
+        self.retangular = retangular
+
+        self._chave = None      # (formato do frame, imgsz) dos buffers atuais
+        self.imagens = []       # Letterbox uint8 (H, W, 3) por posição do lote
+        self.tensor = None      # Entrada float32 (lote, 3, H, W)
+        self.geometria = None   # (ganho, (esquerda, topo), (nova_largura, nova_altura))
+        self.alocacoes = 0
+
+    def _geometria(self, altura, largura):
+        """Mesmas contas do letterbox da Ultralytics"""
+        ganho = min(self.imgsz / altura, self.imgsz / largura)
+        nova_largura, nova_altura = int(round(largura * ganho)), int(round(altura * ganho))
+        dw, dh = self.imgsz - nova_largura, self.imgsz - nova_altura
+        if self.retangular:
+            dw, dh = dw % self.stride, dh % self.stride
+        dw, dh = dw / 2, dh / 2
+        topo, base = int(round(dh - 0.1)), int(round(dh + 0.1))
+        esquerda, direita = int(round(dw - 0.1)), int(round(dw + 0.1))
+        formato = (nova_altura + topo + base, nova_largura + esquerda + direita)
+        return ganho, (esquerda, topo), (nova_largura, nova_altura), formato
+
+    def _preparar(self, formato_frame, lote):
+        """Cria os buffers se a resolução ou o lote mudaram"""
+        chave = (formato_frame, self.imgsz)
+        if chave == self._chave and len(self.imagens) >= lote:
+            return
+        if chave != self._chave:
+            self.imagens = []
+        ganho, borda, novo, (altura, largura) = self._geometria(*formato_frame[:2])
+        # A borda cinza é pintada uma única vez: depois só o miolo é reescrito
+        while len(self.imagens) < lote:
+            self.imagens.append(np.full((altura, largura, 3), COR_BORDA, np.uint8))
+        self.tensor = np.empty((len(self.imagens), 3, altura, largura), np.float32)
+        self.geometria = (ganho, borda, novo)
+        self._chave = chave
+        self.alocacoes += 1
+
+    def processar(self, frames):
+        """
+        Preenche o tensor de entrada com os frames (todos do mesmo tamanho).
+
+        Returns:
+            tuple: (tensor (B, 3, H, W) float32 - visão do buffer interno,
+                    [(ganho, (esquerda, topo)), ...])
+        """
+        self._preparar(frames[0].shape, len(frames))
+        ganho, (esquerda, topo), (nova_largura, nova_altura) = self.geometria
+        escala = np.float32(1 / 255.0)
+
+        for i, frame in enumerate(frames):
+            imagem = self.imagens[i]
+            miolo = imagem[topo:topo + nova_altura, esquerda:esquerda + nova_largura]
+            if frame.shape[:2] == (nova_altura, nova_largura):
+                miolo[...] = frame
+            else:
+                cv2.resize(frame, (nova_largura, nova_altura), dst=miolo,
+                           interpolation=cv2.INTER_LINEAR)
+            # BGR -> RGB, HWC -> CHW e 0..1, escrevendo direto no tensor
+            for canal in range(3):
+                np.multiply(imagem[:, :, 2 - canal], escala, out=self.tensor[i, canal],
+                            dtype=np.float32)
+
+        return self.tensor[:len(frames)], [(ganho, (esquerda, topo))] * len(frames)
+
+
+def _verificar():
+    """Mede com tracemalloc o pico de memória temporária por frame (buffers x arrays novos)"""
+    import tracemalloc
+
+    from detector_onnx import letterbox
+
+    frames = [np.random.randint(0, 255, (1080, 1920, 3), np.uint8) for _ in range(2)]
+
+    def sem_buffers(frame):
+        imagem, _, _ = letterbox(frame, 640)
+        return np.ascontiguousarray(imagem[None, ..., ::-1].transpose(0, 3, 1, 2),
+                                    dtype=np.float32) / 255.0
+
+    preprocessador = PreProcessador(640)
+    com_buffers = lambda frame: preprocessador.processar([frame])
+    com_buffers(frames[0])  # Primeira chamada cria os buffers
+
+    tracemalloc.start()
+    for nome, funcao in (("Arrays novos por frame", sem_buffers), ("Buffers reaproveitados", com_buffers)):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        for i in range(100):
+            funcao(frames[i % 2])
+        pico = tracemalloc.get_traced_memory()[1] - base
+        print(f"📏 {nome:<24} pico temporário por frame: {pico / 1024:.0f} KB")
+    tracemalloc.stop()
+    print(f"♻️ Alocações de buffers do PreProcessador: {preprocessador.alocacoes} (esperado: 1)")
+
+
+if __name__ == "__main__":
+    _verificar()
@@ -0,0 +1,273 @@
+# ========================================
+# QUANTIZAÇÃO INT8 DO MODELO TREINADO
+# ========================================
+# Gera uma versão INT8 do best.pt para rodar mais rápido na CPU:
+# 1. Exporta o modelo para ONNX (FP32), se ainda não existir
+# 2. Calibra as ativações com imagens do próprio dataset (train/images)
+# 3. Quantiza pesos e ativações para INT8 (quantização estática, formato QDQ)
+#    mantendo em FP32 a decodificação das caixas na cabeça do detector
+# 4. Valida FP32 e INT8 em valid/ e mostra mAP50, mAP50-95 e ms por frame
+#
+# O modelo gerado (best_int8.onnx) pode ser usado direto nos contadores:
+#   python contador_pessoas.py --modelo runs/detect/train/weights/best_int8.onnx
+#
+# Uso:
+#   python quantizar_modelo.py --modelo runs/detect/train/weights/best.pt --calibracao 200
+
+import argparse
+import glob
+import json
+import os
+import re
+import tempfile
+
+import cv2
+import numpy as np
+import yaml
+
+from detector_onnx import exportar_onnx, letterbox
+
+try:
+    from onnxruntime.quantization import CalibrationDataReader
+except ImportError:  # onnxruntime é opcional; quantizar() avisa na hora de usar
+    CalibrationDataReader = object
+
+EXTENSOES_IMAGEM = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def pasta_do_conjunto(data_yaml, conjunto):
+    """
+    Caminho real da pasta de imagens de um conjunto (train, val, test).
+
+    O data.yaml do Roboflow usa caminhos como '../train/images'; aqui eles
+    são procurados relativos ao data.yaml e, se não existirem, na mesma
+    pasta do data.yaml (onde o dataset costuma ser extraído).
+    """
+    with open(data_yaml, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    base = os.path.dirname(os.path.abspath(data_yaml))
+    relativo = config[conjunto]
+    candidatos = [os.path.join(base, relativo),
+                  os.path.join(base, re.sub(r"^(\.\./)+", "", relativo))]
+    for candidato in candidatos:
+        if os.path.isdir(candidato):
+            return os.path.normpath(candidato)
+    raise FileNotFoundError(f"Pasta do conjunto '{conjunto}' não encontrada: {relativo}")
+
+
+def data_yaml_absoluto(data_yaml):
+    """Cópia temporária do data.yaml com caminhos absolutos (para o YOLO.val)"""
+    with open(data_yaml, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    for conjunto in ("train", "val", "test"):
+        try:
+            config[conjunto] = pasta_do_conjunto(data_yaml, conjunto)
+        except (KeyError, FileNotFoundError):
+            config.pop(conjunto, None)
+    arquivo = tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False, encoding="utf-8")
+    with arquivo:
+        yaml.safe_dump(config, arquivo, allow_unicode=True)
+    return arquivo.name
+
+
+def listar_imagens(pasta, limite=None, semente=0):
+    """Imagens da pasta, numa amostra aleatória (reprodutível) de até 'limite'"""
+    imagens = sorted(p for p in glob.glob(os.path.join(pasta, "*"))
+                     if p.lower().endswith(EXTENSOES_IMAGEM))
+    if limite is not None and len(imagens) > limite:
+        indices = np.random.default_rng(semente).choice(len(imagens), limite, replace=False)
+        imagens = [imagens[i] for i in sorted(indices)]
+    return imagens
+
+
+def nos_da_cabeca(caminho_onnx):
+    """
+    Nós do último módulo (cabeça Detect) que não são convoluções.
+
+    A decodificação das caixas (DFL, grade de âncoras, concatenações) é
+    muito sensível a INT8 e barata em FP32, então fica fora da quantização.
+    """
+    import onnx
+
+    modelo = onnx.load(caminho_onnx)
+    padrao = re.compile(r"/model\.(\d+)/")
+    indices = [int(m.group(1)) for no in modelo.graph.node if (m := padrao.search(no.name))]
+    if not indices:
+        return []
+    prefixo = f"/model.{max(indices)}/"
+    return [no.name for no in modelo.graph.node
+            if no.name.startswith(prefixo) and no.op_type != "Conv"]
+
+
+def copiar_metadados(origem, destino):
+    """
+    Copia os metadados da Ultralytics (classes, stride, imgsz) para o INT8.
+
+    A preparação para a quantização descarta esses metadados, e sem eles o
+    YOLO(...) não sabe os nomes das classes ao carregar o .onnx.
+    """
+    import onnx
+
+    modelo = onnx.load(destino)
+    existentes = {p.key for p in modelo.metadata_props}
+    for prop in onnx.load(origem).metadata_props:
+        if prop.key not in existentes:
+            modelo.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(modelo, destino)
+
+
+class LeitorCalibracao(CalibrationDataReader):
+    """
+    Fornece imagens do dataset ao calibrador do ONNX Runtime.
+
+    Usa o mesmo letterbox do DetectorOnnx, numa entrada quadrada imgsz x imgsz.
+    """
+
+    def __init__(self, imagens, nome_entrada, imgsz=640):
+        self.imagens = iter(imagens)
+        self.nome_entrada = nome_entrada
+        self.imgsz = imgsz
+
+    def get_next(self):
+        for caminho in self.imagens:
+            frame = cv2.imread(caminho)
+            if frame is None:
+                continue
+            imagem, _, _ = letterbox(frame, self.imgsz, retangular=False)
+            tensor = imagem[None, ..., ::-1].transpose(0, 3, 1, 2)
+            tensor = np.ascontiguousarray(tensor, dtype=np.float32) / 255.0
+            return {self.nome_entrada: tensor}
+        return None
+
+
+def quantizar(modelo_path, data_yaml="data.yaml", imagens_calibracao=200, imgsz=640,
+              saida=None, metodo="minmax"):
+    """
+    Gera o modelo INT8 calibrado com imagens de treino.
+
+    Args:
+        modelo_path (str): Modelo .pt (ou .onnx FP32)
+        data_yaml (str): Configuração do dataset (usa o conjunto 'train')
+        imagens_calibracao (int): Quantas imagens usar na calibração
+        imgsz (int): Tamanho de entrada
+        saida (str): Arquivo INT8 (padrão: <modelo>_int8.onnx)
+        metodo (str): "minmax" ou "percentil" (ignora valores extremos das ativações)
+
+    Returns:
+        tuple: (caminho FP32, caminho INT8)
+    """
+    try:
+        from onnxruntime.quantization import (CalibrationMethod, QuantFormat, QuantType,
+                                              quantize_static)
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+    except ImportError:
+        raise ImportError("Quantização requer: pip install onnxruntime onnx") from None
+    import onnxruntime as ort
+
+    caminho_fp32 = exportar_onnx(modelo_path, imgsz)
+    saida = saida or os.path.splitext(caminho_fp32)[0] + "_int8.onnx"
+
+    imagens = listar_imagens(pasta_do_conjunto(data_yaml, "train"), imagens_calibracao)
+    if not imagens:
+        raise FileNotFoundError("Nenhuma imagem de treino para calibrar")
+    print(f"🎯 Calibrando com {len(imagens)} imagens do dataset...")
+
+    # Otimização + inferência de formatos recomendada antes da quantização
+    caminho_preparado = os.path.splitext(caminho_fp32)[0] + "_preparado.onnx"
+    quant_pre_process(caminho_fp32, caminho_preparado)
+
+    nome_entrada = ort.InferenceSession(caminho_preparado, providers=["CPUExecutionProvider"]) \
+        .get_inputs()[0].name
+    leitor = LeitorCalibracao(imagens, nome_entrada, imgsz)
+
+    metodos = {"minmax": CalibrationMethod.MinMax, "percentil": CalibrationMethod.Percentile}
+    quantize_static(caminho_preparado, saida, leitor,
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=True,
+                    calibrate_method=metodos[metodo],
+                    nodes_to_exclude=nos_da_cabeca(caminho_preparado))
+    os.remove(caminho_preparado)
+    copiar_metadados(caminho_fp32, saida)
+    print(f"✅ Modelo INT8 salvo em: {saida}")
+    return caminho_fp32, saida
+
+
+def validar(caminho_modelo, data_yaml="data.yaml", imgsz=640):
+    """
+    Valida um modelo em valid/ (uma imagem por vez, na CPU, como nos contadores).
+
+    Returns:
+        dict: mAP50, mAP50-95 e ms por frame (pré, inferência, pós e total)
+    """
+    from ultralytics import YOLO
+
+    data = data_yaml_absoluto(data_yaml)
+    try:
+        metricas = YOLO(caminho_modelo, task="detect").val(
+            data=data, split="val", imgsz=imgsz, batch=1, device="cpu",
+            plots=False, verbose=False)
+    finally:
+        os.remove(data)
+    velocidade = metricas.speed
+    return {
+        "modelo": caminho_modelo,
+        "map50": round(float(metricas.box.map50), 4),
+        "map50_95": round(float(metricas.box.map), 4),
+        "ms_inferencia": round(velocidade["inference"], 2),
+        "ms_por_frame": round(velocidade["preprocess"] + velocidade["inference"] +
+                              velocidade["postprocess"], 2),
+    }
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Quantização INT8 do modelo de pessoas")
+    parser.add_argument("--modelo", default="runs/detect/train/weights/best.pt",
+                        help="Modelo treinado (.pt)")
+    parser.add_argument("--data", default="data.yaml", help="Configuração do dataset")
+    parser.add_argument("--calibracao", type=int, default=200,
+                        help="Imagens de treino usadas na calibração")
+    parser.add_argument("--imgsz", type=int, default=640, help="Tamanho de entrada")
+    parser.add_argument("--metodo", choices=["minmax", "percentil"], default="minmax",
+                        help="Método de calibração das ativações")
+    parser.add_argument("--saida", help="Arquivo do modelo INT8")
+    parser.add_argument("--sem-validacao", action="store_true",
+                        help="Só quantiza, sem comparar FP32 e INT8 em valid/")
+    parser.add_argument("--json", help="Salva a comparação neste arquivo")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.modelo):
+        print(f"❌ Modelo não encontrado em: {args.modelo}")
+        print("💡 Primeiro execute: python treinar_yolo.py")
+        return
+
+    caminho_fp32, caminho_int8 = quantizar(args.modelo, args.data, args.calibracao,
+                                           args.imgsz, args.saida, args.metodo)
+    if args.sem_validacao:
+        return
+
+    print("📏 Validando FP32 e INT8 em valid/...")
+    resultados = {"fp32": validar(caminho_fp32, args.data, args.imgsz),
+                  "int8": validar(caminho_int8, args.data, args.imgsz)}
+    fp32, int8 = resultados["fp32"], resultados["int8"]
+
+    print("\n" + "="*60)
+    print(f"{'':<16}{'mAP50':>10}{'mAP50-95':>12}{'ms/frame':>12}{'inferência':>12}")
+    for nome, r in resultados.items():
+        print(f"{nome.upper():<16}{r['map50']:>10}{r['map50_95']:>12}"
+              f"{r['ms_por_frame']:>12}{r['ms_inferencia']:>12}")
+    print("-"*60)
+    print(f"Perda de mAP50: {fp32['map50'] - int8['map50']:+.4f}   "
+          f"Aceleração da inferência: {fp32['ms_inferencia'] / int8['ms_inferencia']:.2f}x")
+    print("="*60)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultados salvos em: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
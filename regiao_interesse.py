@@ -0,0 +1,147 @@
+# ========================================
+# INFERÊNCIA SÓ NA FAIXA DA LINHA DE CONTAGEM (ROI)
+# ========================================
+# A contagem só depende de quem está perto da linha de contagem, mas o
+# frame inteiro (teto e chão incluídos) ia para o YOLO. Aqui o detector
+# recebe só uma faixa horizontal em volta da linha:
+# - altura da faixa = linha ± fator x altura típica de uma pessoa
+#   (aprendida das próprias detecções, ou informada)
+# - altura arredondada para múltiplo do stride do modelo (32), sem borda extra
+# - as caixas voltam para as coordenadas do frame inteiro ANTES do
+#   rastreador e da contagem, que continuam iguais
+# Também aceita um polígono fixo (ex.: só a porta), recortado pelo seu
+# retângulo envolvente e com o lado de fora pintado de cinza.
+
+import cv2  # Polígono
+import numpy as np  # Caixas e máscaras
+
+from deteccao import Deteccoes  # Formato comum das detecções
+
+COR_FORA = (114, 114, 114)  # Mesma cor de borda do letterbox da Ultralytics
+
+
+class RegiaoInteresse:
+    """Recorta a região da linha de contagem e devolve as caixas no frame inteiro"""
+
+    def __init__(self, altura_pessoa_px=None, fator=1.0, stride=32, poligono=None,
+                 fracao_inicial=0.2, suavizacao=0.05):
+        """
+        Args:
+            altura_pessoa_px (float): Altura típica de uma pessoa na imagem; None aprende
+                                      com as detecções (começando por fracao_inicial)
+            fator (float): Meia altura da faixa, em alturas de pessoa. Com 1.0 uma pessoa
+                           com o centro até meia altura da linha aparece inteira
+            stride (int): Múltiplo exigido pelo modelo na altura do recorte
+            poligono (list): Pontos [(x, y), ...] de uma região fixa (substitui a faixa)
+            fracao_inicial (float): Altura inicial de pessoa, em fração da altura do frame
+                                    (0.2: a faixa começa com ~40% do frame e se ajusta)
+            suavizacao (float): Peso de cada nova medida na altura aprendida
+        """
+        self.altura_pessoa = altura_pessoa_px
+        self.aprender = altura_pessoa_px is None
+        self.fator = fator
+        self.stride = stride
+        self.poligono = (np.asarray(poligono, np.int32).reshape(-1, 2)
+                         if poligono is not None else None)
+        self.fracao_inicial = fracao_inicial
+        self.suavizacao = suavizacao
+        self._mascara = None  # Máscara do polígono no recorte (criada uma vez)
+
+        # Estatísticas
+        self.pixels_frame = 0
+        self.pixels_detector = 0
+        self.fracao_atual = 1.0  # Fração do último frame enviada ao detector
+
+    def retangulo(self, formato, linha_y):
+        """
+        Retângulo (x0, y0, x1, y1) enviado ao detector.
+
+        Args:
+            formato: (altura, largura) do frame
+            linha_y (int): Linha de contagem
+        """
+        altura, largura = formato[:2]
+        if self.poligono is not None:
+            x, y, w, h = cv2.boundingRect(self.poligono)
+            return max(x, 0), max(y, 0), min(x + w, largura), min(y + h, altura)
+
+        if self.altura_pessoa is None:
+            self.altura_pessoa = self.fracao_inicial * altura
+        meia = self.fator * self.altura_pessoa
+        y0 = max(0, int(linha_y - meia))
+        y1 = min(altura, int(np.ceil(linha_y + meia)))
+
+        # Altura múltipla do stride: cresce a faixa (dentro do frame) em vez de
+        # deixar o letterbox completar com cinza
+        falta = -(y1 - y0) % self.stride
+        fim = min(altura, y1 + falta)          # Cresce para baixo...
+        y0 = max(0, y0 - (falta - (fim - y1)))  # ...e o que não coube, para cima
+        return 0, y0, largura, fim
+
+    def recortar(self, frame, linha_y):
+        """
+        Recorte do frame para o detector (visão, sem cópia, exceto com polígono).
+
+        Returns:
+            tuple: (recorte, (x0, y0))
+        """
+        x0, y0, x1, y1 = self.retangulo(frame.shape, linha_y)
+        recorte = frame[y0:y1, x0:x1]
+        if self.poligono is not None:
+            if self._mascara is None or self._mascara.shape != recorte.shape[:2]:
+                self._mascara = np.zeros(recorte.shape[:2], np.uint8)
+                cv2.fillPoly(self._mascara, [self.poligono - (x0, y0)], 255)
+            recorte = recorte.copy()
+            recorte[self._mascara == 0] = COR_FORA
+
+        self.pixels_frame += frame.shape[0] * frame.shape[1]
+        self.pixels_detector += recorte.shape[0] * recorte.shape[1]
+        self.fracao_atual = recorte.shape[0] * recorte.shape[1] / (frame.shape[0] * frame.shape[1])
+        return recorte, (x0, y0)
+
+    def _aprender_altura(self, deteccoes, altura_recorte):
+        """Atualiza a altura típica com caixas que não tocam a borda do recorte"""
+        if not self.aprender or not len(deteccoes):
+            return
+        inteiras = (deteccoes.xyxy[:, 1] > 2) & (deteccoes.xyxy[:, 3] < altura_recorte - 2)
+        if not inteiras.any():
+            return
+        alturas = deteccoes.xyxy[inteiras, 3] - deteccoes.xyxy[inteiras, 1]
+        self.altura_pessoa += self.suavizacao * (float(np.median(alturas)) - self.altura_pessoa)
+
+    def detectar(self, detector, frames, linha_y):
+        """
+        Roda o detector só na região de cada frame.
+
+        Args:
+            detector: Qualquer objeto com detectar_lote(frames)
+            frames (list): Frames BGR inteiros
+            linha_y (int): Linha de contagem
+
+        Returns:
+            list: Deteccoes por frame, já em coordenadas do frame inteiro
+        """
+        recortes, deslocamentos = zip(*(self.recortar(f, linha_y) for f in frames)) \
+            if frames else ((), ())
+        resultados = []
+        for recorte, (x0, y0), deteccoes in zip(recortes, deslocamentos,
+                                                detector.detectar_lote(list(recortes))):
+            self._aprender_altura(deteccoes, recorte.shape[0])
+            xyxy = deteccoes.xyxy + np.array([x0, y0, x0, y0], np.float32)
+            resultados.append(Deteccoes(xyxy, deteccoes.conf, deteccoes.cls))
+        return resultados
+
+    @property
+    def fracao_pixels(self):
+        """
+        Fração dos pixels de um frame que vai ao detector com a faixa atual.
+
+        É o valor em regime: a média desde o início (fracao_pixels_media)
+        ainda carrega os primeiros frames, antes da altura ser aprendida.
+        """
+        return self.fracao_atual
+
+    @property
+    def fracao_pixels_media(self):
+        """Fração dos pixels de todos os frames que foi enviada ao detector"""
+        return self.pixels_detector / self.pixels_frame if self.pixels_frame else 1.0
@@ -0,0 +1,393 @@
+# ========================================
+# REGISTRO DURÁVEL DAS PASSAGENS (ARQUIVOS MAPEADOS EM MEMÓRIA)
+# ========================================
+# Até aqui, uma entrada/saída só existia num print e no total final. Aqui
+# cada passagem vira um registro binário de largura fixa (24 bytes):
+#   tempo (µs desde 1970, UTC) | fonte | direção | track_id | frame
+# anexado a um segmento mapeado em memória (mmap). Os segmentos ficam numa
+# pasta e trocam por tamanho ou a cada dia (eventos_AAAAMMDD_NNN.bin).
+#
+# - Escrever é só copiar 24 bytes para o mapa (sem syscalls por evento)
+# - Uma thread chama flush() a cada intervalo_flush_s: uma queda da máquina
+#   perde no máximo esse intervalo (se só o processo morrer, nada se perde:
+#   as páginas já estão no cache do sistema)
+# - Os segmentos são pré-alocados com zeros; direção 0 marca espaço livre,
+#   então ao reabrir depois de uma queda o fim válido é achado por varredura
+# - As consultas (ler_eventos, agregar_eventos) abrem os segmentos como
+#   np.memmap e agregam por minuto/hora/dia com operações vetorizadas,
+#   sem criar um objeto Python por evento
+#
+# Uso:
+#   registro = RegistroEventos("eventos")
+#   contador.ouvintes_eventos.append(registro.ouvinte(fonte=0))
+#   ...
+#   agregar_eventos("eventos", "hora")  # {"inicio": [...], "entradas": [...], "saidas": [...]}
+#
+# Linha de comando (consulta):
+#   python registro_eventos.py eventos --por hora --desde 2025-01-24
+
+import atexit  # Flush final ao sair
+import glob  # Segmentos da pasta
+import mmap  # Segmentos mapeados em memória
+import os  # Pastas e tamanhos
+import struct  # Escrita de um registro numa única cópia
+import threading  # Flush periódico
+import time  # Carimbo dos eventos
+from datetime import datetime, timedelta  # Rotação diária e consultas
+
+import numpy as np  # Registros e agregações vetorizadas
+
+# Registro de largura fixa (little-endian, 24 bytes)
+REGISTRO = np.dtype([
+    ("tempo_us", "<i8"),   # Microssegundos desde 1970 (UTC)
+    ("fonte", "<u2"),      # Câmera/fonte que gerou o evento
+    ("direcao", "u1"),     # 1 = entrada, 2 = saída (0 = espaço livre)
+    ("reservado", "u1"),
+    ("track_id", "<i4"),
+    ("frame", "<i8"),      # Índice do frame na fonte (-1 = desconhecido)
+])
+
+# Mesmo layout, para escrever um registro com um único pack_into
+_FORMATO_REGISTRO = struct.Struct("<qHBBiq")
+assert _FORMATO_REGISTRO.size == REGISTRO.itemsize
+
+# Cabeçalho de 64 bytes no início de cada segmento
+CABECALHO = np.dtype({
+    "names": ["magica", "versao", "tamanho_registro", "criado_us", "registros"],
+    "formats": ["S4", "<u2", "<u2", "<i8", "<i8"],
+    "offsets": [0, 4, 6, 8, 16],
+    "itemsize": 64,
+})
+MAGICA = b"CPEV"
+VERSAO = 1
+
+ENTRADA = 1
+SAIDA = 2
+DIRECOES = {"entrada": ENTRADA, "saida": SAIDA}
+
+PERIODOS = {"minuto": 60, "hora": 3600, "dia": 86400}
+
+
+def _caminhos_segmentos(pasta):
+    """Segmentos da pasta em ordem cronológica (o nome começa pela data)"""
+    return sorted(glob.glob(os.path.join(pasta, "eventos_*.bin")))
+
+
+def _registros_validos(registros):
+    """Quantos registros do começo estão preenchidos (direção != 0)"""
+    livres = np.flatnonzero(registros["direcao"] == 0)
+    return int(livres[0]) if len(livres) else len(registros)
+
+
+class RegistroEventos:
+    """Anexa passagens a segmentos binários mapeados em memória, com rotação"""
+
+    def __init__(self, pasta="eventos", tamanho_segmento_mb=64, rotacao_diaria=True,
+                 intervalo_flush_s=1.0):
+        """
+        Args:
+            pasta (str): Onde ficam os segmentos
+            tamanho_segmento_mb (float): Tamanho de cada segmento (64 MB ≈ 2,8 milhões de eventos)
+            rotacao_diaria (bool): Começa um segmento novo a cada dia (horário local)
+            intervalo_flush_s (float): Máximo de tempo que um evento fica só na memória
+        """
+        self.pasta = pasta
+        self.capacidade = max(1, int(tamanho_segmento_mb * 1024 * 1024 - CABECALHO.itemsize)
+                              // REGISTRO.itemsize)
+        self.rotacao_diaria = rotacao_diaria
+        self.intervalo_flush_s = intervalo_flush_s
+        os.makedirs(pasta, exist_ok=True)
+
+        self._trava = threading.Lock()
+        self._arquivo = None
+        self._mapa = None
+        self._registros = None
+        self._cabecalho = None
+        self._usados = 0
+        self._capacidade_segmento = 0
+        self._fim_dia = None     # Início do próximo dia (epoch), para a rotação diária
+        self._pendente = False   # Há eventos ainda não enviados ao disco
+        self.caminho = None
+        self.total = 0           # Eventos registrados nesta execução
+
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._laco_flush, name="registro-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def registrar(self, direcao, track_id, fonte=0, frame=-1, tempo=None):
+        """
+        Anexa uma passagem.
+
+        Args:
+            direcao (str): "entrada" ou "saida"
+            track_id (int): ID da pessoa
+            fonte (int): Câmera/fonte (0-65535)
+            frame (int): Índice do frame na fonte
+            tempo (float): Epoch em segundos (padrão: agora)
+        """
+        tempo = time.time() if tempo is None else tempo
+        with self._trava:
+            if (self._mapa is None or self._usados >= self._capacidade_segmento or
+                    (self.rotacao_diaria and tempo >= self._fim_dia)):
+                self._abrir_segmento(tempo)
+            _FORMATO_REGISTRO.pack_into(
+                self._mapa, CABECALHO.itemsize + self._usados * REGISTRO.itemsize,
+                int(tempo * 1_000_000), fonte, DIRECOES[direcao], 0, track_id, frame)
+            self._usados += 1
+            self._cabecalho["registros"] = self._usados
+            self._pendente = True
+            self.total += 1
+
+    def ouvinte(self, fonte=0):
+        """Função para contador.ouvintes_eventos que registra os eventos desta fonte"""
+        def ao_evento(evento):
+            self.registrar(evento["direcao"], evento["track_id"], fonte, evento.get("frame", -1))
+        return ao_evento
+
+    def flush(self):
+        """Envia ao disco os eventos ainda só na memória"""
+        with self._trava:
+            if self._mapa is not None and self._pendente:
+                self._mapa.flush()
+                self._pendente = False
+
+    def fechar(self):
+        """Flush final, fecha o segmento e encerra a thread de flush"""
+        self._parar.set()
+        with self._trava:
+            self._fechar_segmento()
+
+    def _abrir_segmento(self, tempo):
+        """Continua o último segmento do dia (se tiver espaço) ou cria o próximo"""
+        self._fechar_segmento()
+        dia = datetime.fromtimestamp(tempo)
+        prefixo = os.path.join(self.pasta, f"eventos_{dia:%Y%m%d}_")
+        inicio_dia = datetime(dia.year, dia.month, dia.day)
+        self._fim_dia = (inicio_dia + timedelta(days=1)).timestamp()
+
+        existentes = sorted(glob.glob(prefixo + "*.bin"))
+        numero = int(existentes[-1][len(prefixo):-4]) if existentes else 0
+        caminho = existentes[-1] if existentes else f"{prefixo}{numero:03d}.bin"
+        if existentes and self._abrir_mapa(caminho, criar=False) < self._capacidade_segmento:
+            return
+        if existentes:
+            self._fechar_segmento()
+            caminho = f"{prefixo}{numero + 1:03d}.bin"
+        self._abrir_mapa(caminho, criar=True)
+
+    def _abrir_mapa(self, caminho, criar):
+        """Mapeia o segmento; devolve quantos registros válidos ele já tem"""
+        tamanho = CABECALHO.itemsize + self.capacidade * REGISTRO.itemsize
+        if criar:
+            with open(caminho, "wb") as f:
+                f.truncate(tamanho)  # Pré-alocado com zeros (esparso onde o sistema permite)
+        self._arquivo = open(caminho, "r+b")
+        # Segmento criado com outro tamanho: usa o maior dos dois
+        tamanho = max(tamanho, os.path.getsize(caminho))
+        self._arquivo.truncate(tamanho)
+        self._mapa = mmap.mmap(self._arquivo.fileno(), tamanho)
+        self._cabecalho = np.ndarray((), CABECALHO, self._mapa, 0)
+        self._capacidade_segmento = (tamanho - CABECALHO.itemsize) // REGISTRO.itemsize
+        self._registros = np.ndarray((self._capacidade_segmento,), REGISTRO, self._mapa,
+                                     CABECALHO.itemsize)
+        self.caminho = caminho
+
+        if criar:
+            self._cabecalho["magica"] = MAGICA
+            self._cabecalho["versao"] = VERSAO
+            self._cabecalho["tamanho_registro"] = REGISTRO.itemsize
+            self._cabecalho["criado_us"] = int(time.time() * 1_000_000)
+            self._usados = 0
+        else:
+            if bytes(self._cabecalho["magica"]) != MAGICA:
+                raise ValueError(f"Arquivo não é um segmento de eventos: {caminho}")
+            # Depois de uma queda, o contador do cabeçalho pode estar atrasado:
+            # o fim válido é o primeiro registro vazio
+            self._usados = _registros_validos(self._registros)
+            self._cabecalho["registros"] = self._usados
+        return self._usados
+
+    def _fechar_segmento(self):
+        if self._mapa is None:
+            return
+        self._mapa.flush()
+        self._pendente = False
+        # Solta as visões NumPy antes de fechar o mapa
+        self._registros = self._cabecalho = None
+        self._mapa.close()
+        self._arquivo.close()
+        self._mapa = self._arquivo = None
+
+    def _laco_flush(self):
+        """Thread de flush: limita o que uma queda da máquina pode perder"""
+        while not self._parar.wait(self.intervalo_flush_s):
+            self.flush()
+
+
+# ========================================
+# CONSULTAS
+# ========================================
+
+def _abrir_leitura(caminho):
+    """Registros válidos de um segmento, como np.memmap somente leitura"""
+    if os.path.getsize(caminho) <= CABECALHO.itemsize:
+        return np.zeros(0, REGISTRO)
+    cabecalho = np.fromfile(caminho, CABECALHO, count=1)[0]
+    if bytes(cabecalho["magica"]) != MAGICA:
+        return np.zeros(0, REGISTRO)
+    registros = np.memmap(caminho, REGISTRO, "r", offset=CABECALHO.itemsize)
+    # O cabeçalho diz até onde o escritor chegou (vale com o escritor ativo);
+    # se ele não bater com os registros (queda da máquina), confere pela varredura
+    usados = min(int(cabecalho["registros"]), len(registros))
+    if ((usados == 0 or registros["direcao"][usados - 1] == 0) or
+            (usados < len(registros) and registros["direcao"][usados] != 0)):
+        usados = _registros_validos(registros)
+    return registros[:usados]
+
+
+def _para_us(momento):
+    """datetime/str ISO/epoch em segundos -> µs desde 1970 (horário local para datetime/str)"""
+    if momento is None:
+        return None
+    if isinstance(momento, str):
+        momento = datetime.fromisoformat(momento)
+    if isinstance(momento, datetime):
+        momento = momento.timestamp()
+    return int(momento * 1_000_000)
+
+
+def _fatias(pasta, desde=None, ate=None, fonte=None):
+    """Gera, segmento a segmento, os registros no intervalo [desde, ate) (e da fonte)"""
+    desde_us, ate_us = _para_us(desde), _para_us(ate)
+    for caminho in _caminhos_segmentos(pasta):
+        registros = _abrir_leitura(caminho)
+        if not len(registros):
+            continue
+        # Os registros são anexados em ordem de tempo: busca binária nas pontas
+        tempos = registros["tempo_us"]
+        inicio = 0 if desde_us is None else int(np.searchsorted(tempos, desde_us, "left"))
+        fim = len(registros) if ate_us is None else int(np.searchsorted(tempos, ate_us, "left"))
+        if inicio >= fim:
+            continue
+        fatia = registros[inicio:fim]
+        if fonte is not None:
+            fatia = fatia[fatia["fonte"] == fonte]
+        if len(fatia):
+            yield fatia
+
+
+def ler_eventos(pasta, desde=None, ate=None, fonte=None):
+    """
+    Eventos registrados no intervalo, como um array estruturado (dtype REGISTRO).
+
+    Args:
+        pasta (str): Pasta dos segmentos
+        desde, ate: Limites (datetime, texto ISO ou epoch em segundos); None = sem limite
+        fonte (int): Só esta fonte (None = todas)
+    """
+    fatias = list(_fatias(pasta, desde, ate, fonte))
+    return np.concatenate(fatias) if fatias else np.zeros(0, REGISTRO)
+
+
+def agregar_eventos(pasta, periodo="hora", desde=None, ate=None, fonte=None, utc=False):
+    """
+    Entradas e saídas por minuto, hora ou dia, sem criar objetos por evento.
+
+    Args:
+        pasta (str): Pasta dos segmentos
+        periodo (str): "minuto", "hora" ou "dia"
+        desde, ate: Limites (datetime, texto ISO ou epoch em segundos)
+        fonte (int): Só esta fonte (None = todas)
+        utc (bool): Baldes em UTC (padrão: horário local)
+
+    Returns:
+        dict: "inicio" (datetime64 de cada balde com eventos), "entradas" e "saidas"
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo} (opções: {', '.join(PERIODOS)})")
+    largura_us = PERIODOS[periodo] * 1_000_000
+    deslocamento_us = 0 if utc else int(datetime.now().astimezone().utcoffset().total_seconds()
+                                         * 1_000_000)
+
+    baldes, direcoes = [], []
+    for fatia in _fatias(pasta, desde, ate, fonte):
+        baldes.append((fatia["tempo_us"] + deslocamento_us) // largura_us)
+        direcoes.append(np.asarray(fatia["direcao"]))
+    if not baldes:
+        return {"inicio": np.zeros(0, "datetime64[s]"),
+                "entradas": np.zeros(0, np.int64), "saidas": np.zeros(0, np.int64)}
+
+    chaves, indices = np.unique(np.concatenate(baldes), return_inverse=True)
+    direcoes = np.concatenate(direcoes)
+    return {
+        "inicio": (chaves * PERIODOS[periodo]).astype("datetime64[s]"),
+        "entradas": np.bincount(indices, weights=direcoes == ENTRADA,
+                                minlength=len(chaves)).astype(np.int64),
+        "saidas": np.bincount(indices, weights=direcoes == SAIDA,
+                              minlength=len(chaves)).astype(np.int64),
+    }
+
+
+def _medir(eventos=1_000_000, pasta=None):
+    """Grava N eventos sintéticos (uma semana, 4 fontes) e mede escrita e agregações"""
+    import tempfile
+
+    pasta = pasta or tempfile.mkdtemp(prefix="eventos_")
+    rng = np.random.default_rng(0)
+    inicio = time.time() - 7 * 86400
+    tempos = (inicio + np.cumsum(rng.exponential(7 * 86400 / eventos, eventos))).tolist()
+
+    t = time.perf_counter()
+    with RegistroEventos(pasta) as registro:
+        for i, tempo in enumerate(tempos):
+            registro.registrar("entrada" if i % 2 else "saida", i, i % 4, i, tempo)
+    print(f"✍️ registrar(): {(time.perf_counter() - t) / eventos * 1e6:.2f} µs por evento "
+          f"({len(_caminhos_segmentos(pasta))} segmentos em {pasta})")
+
+    for periodo in PERIODOS:
+        t = time.perf_counter()
+        resultado = agregar_eventos(pasta, periodo)
+        ms = (time.perf_counter() - t) * 1000
+        total = int(resultado["entradas"].sum() + resultado["saidas"].sum())
+        print(f"📊 por {periodo:<6}: {len(resultado['inicio']):>6} baldes, {total} eventos em {ms:.0f} ms")
+    return pasta
+
+
+def main():
+    """Consulta os eventos registrados"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consulta o registro de passagens")
+    parser.add_argument("pasta", nargs="?", default="eventos", help="Pasta dos segmentos")
+    parser.add_argument("--por", choices=list(PERIODOS), default="hora", help="Tamanho dos baldes")
+    parser.add_argument("--desde", help="Início (ISO, ex.: 2025-01-24 ou 2025-01-24T08:00)")
+    parser.add_argument("--ate", help="Fim, exclusivo (ISO)")
+    parser.add_argument("--fonte", type=int, help="Só esta fonte")
+    parser.add_argument("--medir", type=int, metavar="N",
+                        help="Gera N eventos sintéticos numa pasta temporária e mede as consultas")
+    args = parser.parse_args()
+
+    if args.medir:
+        _medir(args.medir)
+        return
+
+    resultado = agregar_eventos(args.pasta, args.por, args.desde, args.ate, args.fonte)
+    if not len(resultado["inicio"]):
+        print("📭 Nenhum evento no intervalo")
+        return
+    print(f"{'início':<22}{'entradas':>10}{'saídas':>10}{'saldo':>10}")
+    for inicio, entradas, saidas in zip(resultado["inicio"], resultado["entradas"],
+                                        resultado["saidas"]):
+        print(f"{str(inicio).replace('T', ' '):<22}{entradas:>10}{saidas:>10}{entradas - saidas:>10}")
+    print(f"{'TOTAL':<22}{resultado['entradas'].sum():>10}{resultado['saidas'].sum():>10}")
+
+
+if __name__ == "__main__":
+    main()
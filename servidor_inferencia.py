@@ -0,0 +1,180 @@
+# ========================================
+# SERVIDOR DE INFERÊNCIA COM LOTES DINÂMICOS
+# ========================================
+# Um único processo carrega o modelo YOLO e atende vários workers de
+# câmera. Pedidos de fontes diferentes são agrupados em lotes (até
+# max_lote frames ou até o prazo max_espera_ms vencer) e processados
+# numa só passada do modelo. Cada worker recebe de volta só as suas
+# detecções e mantém o próprio rastreador e as próprias contagens.
+#
+# Vantagens em relação a um YOLO por câmera:
+# - uma só cópia dos pesos na memória
+# - inferência em lote, bem mais eficiente na CPU que lote de 1
+#
+# Se o worker captura com CapturaCompartilhada (memoria_compartilhada.py),
+# o frame não passa pela fila: vai só {anel, slot, geração} e o servidor
+# lê o slot direto da memória compartilhada.
+
+import queue  # Exceção queue.Empty
+import time  # Prazo dos lotes e estatísticas
+
+from deteccao import CONF_RASTREAMENTO, Deteccoes, DetectorYOLO  # Inferência em lote
+from memoria_compartilhada import AnelFrames  # Frames sem cópia entre processos
+
+
+class ClienteInferencia:
+    """
+    Lado do worker: envia frames ao servidor e espera as detecções.
+
+    Tem a mesma interface de DetectorYOLO (detectar_lote), então pode ser
+    passado como detector para ContadorPessoas(detector=...).
+    """
+
+    def __init__(self, id_cliente, fila_pedidos, fila_respostas, timeout_s=30, anel=None):
+        """
+        Args:
+            id_cliente (int): Identificador único deste worker no servidor
+            fila_pedidos: Fila compartilhada de pedidos (todos os clientes)
+            fila_respostas: Fila exclusiva deste cliente
+            timeout_s (float): Tempo máximo de espera por uma resposta
+            anel (AnelFrames): Anel da captura deste worker; frames que estão
+                               nele são enviados só como referência ao slot
+        """
+        self.id_cliente = id_cliente
+        self.fila_pedidos = fila_pedidos
+        self.fila_respostas = fila_respostas
+        self.timeout_s = timeout_s
+        self.anel = anel
+        self._sequencia = 0
+
+    def _empacotar(self, frame):
+        """Referência ao slot se o frame estiver no anel; senão o próprio frame"""
+        slot = self.anel.slot_de(frame) if self.anel is not None else None
+        if slot is None:
+            return frame
+        return {"anel": self.anel.descritor(), "slot": slot,
+                "geracao": int(self.anel.geracoes[slot])}
+
+    def detectar_lote(self, frames):
+        """
+        Envia os frames ao servidor e devolve as detecções na mesma ordem.
+
+        Args:
+            frames (list): Lista de frames BGR
+
+        Returns:
+            list: Uma instância de Deteccoes por frame
+        """
+        sequencias = []
+        for frame in frames:
+            self._sequencia += 1
+            self.fila_pedidos.put((self.id_cliente, self._sequencia, self._empacotar(frame)))
+            sequencias.append(self._sequencia)
+
+        esperadas = set(sequencias)
+        recebidas = {}
+        while len(recebidas) < len(sequencias):
+            try:
+                sequencia, deteccoes = self.fila_respostas.get(timeout=self.timeout_s)
+            except queue.Empty:
+                raise TimeoutError("Servidor de inferência não respondeu") from None
+            if sequencia not in esperadas:
+                continue  # Resposta atrasada de um pedido anterior que estourou o timeout
+            recebidas[sequencia] = deteccoes
+        return [recebidas[s] for s in sequencias]
+
+
+def executar_servidor(modelo_path, fila_pedidos, filas_respostas, parar,
+                      max_lote=8, max_espera_ms=10, threads=None, intervalo_status_s=30):
+    """
+    Laço principal do servidor (roda no seu próprio processo).
+
+    Args:
+        modelo_path (str): Modelo YOLO a carregar (uma única vez)
+        fila_pedidos: Fila de tuplas (id_cliente, sequencia, frame ou referência ao slot)
+        filas_respostas (dict): id_cliente -> fila de respostas (sequencia, Deteccoes)
+        parar: Evento que encerra o servidor
+        max_lote (int): Máximo de frames por passada do modelo
+        max_espera_ms (float): Quanto esperar por mais pedidos depois do primeiro
+        threads (int): Threads do PyTorch (padrão: todas)
+        intervalo_status_s (float): Intervalo entre as linhas de estatística
+    """
+    import signal
+    import torch
+    from ultralytics import YOLO
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Quem encerra é o supervisor
+    if threads:
+        torch.set_num_threads(threads)
+
+    # As respostas alimentam o rastreador de cada worker: mesmo limiar do model.track
+    detector = DetectorYOLO(YOLO(modelo_path), conf=CONF_RASTREAMENTO)
+    max_espera = max_espera_ms / 1000.0
+    print(f"🧠 Servidor de inferência pronto (lote até {max_lote}, espera {max_espera_ms} ms)")
+
+    lotes = 0
+    frames = 0
+    rasgados = 0  # Frames de slot reescritos antes/durante a inferência
+    aneis = {}  # nome -> AnelFrames anexado (um por worker com captura compartilhada)
+    ultimo_status = time.monotonic()
+
+    def resolver(pedido):
+        """Frame do pedido: o próprio array ou a visão do slot (None se inválido)"""
+        if not isinstance(pedido, dict):
+            return pedido
+        descritor = pedido["anel"]
+        anel = aneis.get(descritor["nome"])
+        if anel is None:
+            anel = aneis[descritor["nome"]] = AnelFrames.anexar(descritor)
+        return anel.ler(pedido["slot"], pedido["geracao"])
+
+    while not parar.is_set():
+        # Espera o primeiro pedido do próximo lote
+        try:
+            primeiro = fila_pedidos.get(timeout=0.1)
+        except queue.Empty:
+            continue
+
+        # Junta mais pedidos até encher o lote ou vencer o prazo
+        lote = [primeiro]
+        prazo = time.monotonic() + max_espera
+        while len(lote) < max_lote:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(fila_pedidos.get(timeout=restante))
+            except queue.Empty:
+                break
+
+        # Frames do lote (visões dos slots, sem cópia); slots já reescritos ficam None
+        frames_lote = [resolver(pedido) for _, _, pedido in lote]
+        validos = [i for i, frame in enumerate(frames_lote) if frame is not None]
+        respostas = [Deteccoes.vazias() for _ in lote]
+        rasgados += len(lote) - len(validos)
+
+        # Uma passada do modelo para todo o lote
+        if validos:
+            resultados = detector.detectar_lote([frames_lote[i] for i in validos])
+            for i, deteccoes in zip(validos, resultados):
+                pedido = lote[i][2]
+                # Confere se o slot não foi reescrito durante a inferência
+                if isinstance(pedido, dict) and not aneis[pedido["anel"]["nome"]].ainda_valido(
+                        pedido["slot"], pedido["geracao"]):
+                    rasgados += 1
+                    continue
+                respostas[i] = deteccoes
+        for (id_cliente, sequencia, _), deteccoes in zip(lote, respostas):
+            filas_respostas[id_cliente].put((sequencia, deteccoes))
+
+        lotes += 1
+        frames += len(lote)
+        agora = time.monotonic()
+        if agora - ultimo_status >= intervalo_status_s:
+            print(f"🧠 Servidor: {frames / (agora - ultimo_status):.1f} frames/s, "
+                  f"lote médio {frames / lotes:.1f}, frames descartados (slot reescrito) {rasgados}")
+            lotes = frames = 0
+            ultimo_status = agora
+
+    for anel in aneis.values():
+        anel.fechar()
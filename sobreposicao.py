@@ -0,0 +1,286 @@
+# ========================================
+# SOBREPOSIÇÕES (PAINEL, LINHA E RÓTULOS) EM CACHE
+# ========================================
+# O painel de informações, a linha de contagem e os textos fixos (ex.:
+# "GRAVANDO") eram redesenhados com cv2.rectangle/cv2.putText a cada frame,
+# mesmo sem nada mudar. Aqui cada parte é desenhada UMA vez numa imagem pequena
+# (sprite) com máscara e, a cada frame, só é colada com uma cópia mascarada
+# (cv2.copyTo direto na região do frame; só o retângulo com as bordas
+# suavizadas dos textos é misturado com o fundo):
+# - camada fixa (ex.: linha de contagem): desenhada por resolução/posição
+# - painel: fundo desenhado uma vez; textos só quando um valor muda
+# - rótulos: um sprite por texto, num cache LRU
+# O custo de desenho por frame fica praticamente constante.
+#
+# Textos que mudam a cada frame (ex.: "ID: n (0.87)", com a confiança da
+# detecção) NÃO passam pelo cache: quase toda busca seria um sprite novo,
+# e desenhar o sprite + misturar as bordas custa bem mais que um putText.
+#
+# Medição rápida:
+#   python sobreposicao.py
+
+from collections import OrderedDict  # Cache LRU dos rótulos
+
+import cv2  # Desenho e cópia mascarada
+import numpy as np  # Telas de desenho e máscaras
+
+FONTE = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class Sprite:
+    """
+    Desenho pronto para colar: pixels opacos + bordas semitransparentes.
+
+    Os pixels opacos (a maioria) vão para o frame com uma cópia mascarada;
+    só o retângulo que contém as bordas com antialiasing dos textos é
+    misturado com o fundo (cv2.multiply + cv2.add, direto no frame).
+    """
+
+    def __init__(self, imagem, mascara, bordas=None, x=0, y=0):
+        """
+        Args:
+            imagem: Pixels BGR (h, w, 3)
+            mascara: uint8 (h, w), 255 nos pixels opacos
+            bordas: (retangulo (x0, y0, x1, y1) no sprite, cor pré-multiplicada,
+                     transparência 0-255 por canal) ou None se não há bordas
+            x, y (int): Posição do canto superior esquerdo no frame (antes do deslocamento)
+        """
+        self.imagem = imagem
+        self.mascara = mascara
+        self.bordas = bordas
+        self.x, self.y = x, y
+
+    @classmethod
+    def renderizar(cls, formato, desenhar, origem=(0, 0)):
+        """
+        Desenha com funções do OpenCV e guarda só a parte desenhada.
+
+        A função é chamada em duas telas (fundo 0 e fundo 255): a diferença
+        entre elas dá a transparência de cada pixel, sem precisar repetir
+        cada desenho numa máscara.
+
+        Args:
+            formato: (altura, largura) da tela de desenho
+            desenhar: Função desenhar(tela) que usa coordenadas da tela
+            origem: Posição (x, y) da tela de desenho no frame
+        """
+        telas = [np.full((*formato[:2], 3), fundo, np.uint8) for fundo in (0, 255)]
+        for tela in telas:
+            desenhar(tela)
+        return cls.de_telas(*telas, origem)
+
+    @classmethod
+    def de_telas(cls, tela_preta, tela_branca, origem=(0, 0)):
+        """Monta o sprite a partir das duas telas desenhadas (veja renderizar)"""
+        # 0 = opaco, 255 = não desenhado; no meio, borda com antialiasing
+        transparencia = cv2.subtract(tela_branca, tela_preta).max(axis=2)
+        x, y, w, h = cv2.boundingRect((transparencia < 255).astype(np.uint8))
+        transparencia = transparencia[y:y + h, x:x + w]
+        imagem = tela_preta[y:y + h, x:x + w].copy()
+        mascara = (transparencia == 0).astype(np.uint8) * 255
+
+        bordas = None
+        parcial = ((transparencia > 0) & (transparencia < 255)).astype(np.uint8)
+        if parcial.any():
+            bx, by, bw, bh = cv2.boundingRect(parcial)
+            # Na tela preta a cor já vem multiplicada pela opacidade
+            trecho = transparencia[by:by + bh, bx:bx + bw]
+            bordas = ((bx, by, bx + bw, by + bh), imagem[by:by + bh, bx:bx + bw],
+                      cv2.merge([trecho] * 3))
+        return cls(imagem, mascara, bordas, origem[0] + x, origem[1] + y)
+
+    def colar(self, frame, dx=0, dy=0):
+        """Aplica o desenho no frame (cortando o que sair da borda)"""
+        x0, y0 = self.x + dx, self.y + dy
+        altura, largura = self.mascara.shape
+        # Parte do sprite que cai dentro do frame
+        sx0, sy0 = max(0, -x0), max(0, -y0)
+        sx1 = min(largura, frame.shape[1] - x0)
+        sy1 = min(altura, frame.shape[0] - y0)
+        if sx1 <= sx0 or sy1 <= sy0:
+            return
+        bordas = self.bordas
+        # Bordas espalhadas pelo sprite inteiro (ex.: rótulos): a mistura já
+        # cobre os opacos (transparência 0) e a cópia mascarada é dispensada
+        if bordas is None or bordas[0] != (0, 0, largura, altura):
+            destino = frame[y0 + sy0:y0 + sy1, x0 + sx0:x0 + sx1]
+            cv2.copyTo(self.imagem[sy0:sy1, sx0:sx1], self.mascara[sy0:sy1, sx0:sx1], destino)
+        if bordas is None:
+            return
+        (bx0, by0, bx1, by1), cor, transparencia = bordas
+        cx0, cy0 = max(bx0, sx0), max(by0, sy0)
+        cx1, cy1 = min(bx1, sx1), min(by1, sy1)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        # resultado = cor * opacidade + fundo * (1 - opacidade), no próprio frame
+        regiao = frame[y0 + cy0:y0 + cy1, x0 + cx0:x0 + cx1]
+        corte = (slice(cy0 - by0, cy1 - by0), slice(cx0 - bx0, cx1 - bx0))
+        cv2.multiply(regiao, transparencia[corte], dst=regiao, scale=1 / 255)
+        cv2.add(regiao, cor[corte], dst=regiao)
+
+
+class RenderizadorSobreposicao:
+    """
+    Guarda os sprites das sobreposições e os cola nos frames.
+
+    Uso no contador:
+        self.sobreposicao.camada(frame, ("linha", y), self._desenhar_linha)
+        self.sobreposicao.painel(frame, "painel", desenhar_fundo, desenhar_valores,
+                                 (entrada, saida), area=(560, 190))
+        self.sobreposicao.rotulo(frame, "GRAVANDO", (x, y), 0.7, (0, 0, 255), 2)
+    """
+
+    def __init__(self, max_rotulos=512):
+        """
+        Args:
+            max_rotulos (int): Sprites de texto guardados (os menos usados saem primeiro)
+        """
+        self.max_rotulos = max_rotulos
+        self._camadas = {}           # (chave, formato do frame) -> Sprite
+        self._paineis = {}           # chave -> estado do painel
+        self._rotulos = OrderedDict()  # (texto, escala, cor, espessura) -> Sprite
+
+        # Estatísticas: quantas vezes algo precisou ser desenhado de novo
+        self.renderizacoes = 0
+
+    def camada(self, frame, chave, desenhar):
+        """
+        Cola uma camada fixa, desenhada uma vez por chave e resolução.
+
+        Args:
+            frame: Frame de destino
+            chave: Tudo de que o desenho depende (ex.: ("linha", linha_y))
+            desenhar: Função desenhar(tela) em coordenadas do frame
+        """
+        indice = (chave, frame.shape)
+        sprite = self._camadas.get(indice)
+        if sprite is None:
+            if len(self._camadas) > 64:  # Chaves antigas (ex.: outra resolução)
+                self._camadas.clear()
+            sprite = self._camadas[indice] = Sprite.renderizar(frame.shape, desenhar)
+            self.renderizacoes += 1
+        sprite.colar(frame)
+
+    def painel(self, frame, chave, desenhar_fundo, desenhar_valores, valores, area=None):
+        """
+        Cola um painel com parte fixa e textos que dependem de 'valores'.
+
+        O fundo é desenhado uma vez por chave e resolução; os textos só são
+        desenhados de novo quando 'valores' muda.
+
+        Args:
+            frame: Frame de destino
+            chave: Identifica o layout (ex.: tamanho do painel escolhido)
+            desenhar_fundo: Função desenhar_fundo(tela) com a parte fixa
+            desenhar_valores: Função desenhar_valores(tela, valores) com os textos
+            valores (tuple): Valores exibidos (ex.: (entradas, saídas))
+            area: (largura, altura) a partir do canto (0, 0) do frame que contém o
+                  painel; limita o tamanho das telas de desenho (padrão: frame inteiro)
+        """
+        largura, altura = area if area else (frame.shape[1], frame.shape[0])
+        formato = (min(altura, frame.shape[0]), min(largura, frame.shape[1]))
+        estado = self._paineis.get(chave)
+        if estado is None or estado["formato"] != formato:
+            fundos = [np.full((*formato, 3), cor, np.uint8) for cor in (0, 255)]
+            for tela in fundos:
+                desenhar_fundo(tela)
+            estado = self._paineis[chave] = {"formato": formato, "fundos": fundos,
+                                             "valores": None, "sprite": None}
+        if estado["valores"] != valores:
+            telas = [fundo.copy() for fundo in estado["fundos"]]
+            for tela in telas:
+                desenhar_valores(tela, valores)
+            estado["sprite"] = Sprite.de_telas(*telas)
+            estado["valores"] = valores
+            self.renderizacoes += 1
+        estado["sprite"].colar(frame)
+
+    def rotulo(self, frame, texto, posicao, escala, cor, espessura=1):
+        """
+        Mesmo resultado de cv2.putText(frame, texto, posicao, FONTE, escala, cor,
+        espessura), mas com o texto desenhado só na primeira vez.
+
+        Só compensa para textos que se repetem entre frames; um texto novo
+        custa várias vezes um putText (veja _medir).
+        """
+        chave = (texto, escala, cor, espessura)
+        sprite = self._rotulos.get(chave)
+        if sprite is None:
+            (largura, altura), base = cv2.getTextSize(texto, FONTE, escala, espessura)
+            margem = espessura + 1
+            formato = (altura + base + 2 * margem, largura + 2 * margem)
+            sprite = Sprite.renderizar(
+                formato,
+                lambda tela: cv2.putText(tela, texto, (margem, altura + margem),
+                                         FONTE, escala, cor, espessura),
+                origem=(-margem, -altura - margem))
+            self._rotulos[chave] = sprite
+            if len(self._rotulos) > self.max_rotulos:
+                self._rotulos.popitem(last=False)
+            self.renderizacoes += 1
+        else:
+            self._rotulos.move_to_end(chave)
+        sprite.colar(frame, int(posicao[0]), int(posicao[1]))
+
+
+def _medir():
+    """Compara o desenho direto com os sprites em cache num frame 1080p"""
+    import time
+
+    frame = np.zeros((1080, 1920, 3), np.uint8)
+    caixas = [(100 + 150 * i, 300 + 20 * i) for i in range(8)]
+    # Confiança de cada pessoa em cada frame (muda como a de um detector de verdade)
+    rng = np.random.default_rng(0)
+    confiancas = rng.uniform(0.5, 0.95, (501, len(caixas)))
+
+    def fundo(tela):
+        cv2.rectangle(tela, (10, 10), (550, 180), (0, 0, 0), -1)
+        cv2.rectangle(tela, (10, 10), (550, 180), (255, 255, 255), 3)
+        cv2.putText(tela, "CONTADOR DE PESSOAS", (25, 50), FONTE, 1.0, (0, 255, 0), 3)
+
+    def valores(tela, v):
+        cv2.putText(tela, f"Entradas: {v[0]}", (25, 90), FONTE, 0.8, (0, 255, 0), 2)
+        cv2.putText(tela, f"Saidas: {v[1]}", (25, 125), FONTE, 0.8, (0, 255, 0), 2)
+        cv2.putText(tela, f"Total Atual: {v[0] - v[1]}", (25, 160), FONTE, 0.8, (0, 255, 255), 3)
+
+    def linha(tela):
+        cv2.line(tela, (0, 540), (1920, 540), (0, 255, 0), 3)
+        cv2.putText(tela, "LINHA DE CONTAGEM", (10, 530), FONTE, 0.7, (0, 255, 0), 2)
+
+    def rotulos_direto(n):
+        for i, (x, y) in enumerate(caixas):
+            cv2.putText(frame, f"ID: {i} ({confiancas[n, i]:.2f})", (x, y), FONTE, 0.5, (255, 0, 0), 2)
+
+    renderizador = RenderizadorSobreposicao()
+
+    def rotulos_em_cache(n):
+        for i, (x, y) in enumerate(caixas):
+            renderizador.rotulo(frame, f"ID: {i} ({confiancas[n, i]:.2f})", (x, y), 0.5, (255, 0, 0), 2)
+
+    def direto(n):
+        fundo(frame)
+        valores(frame, (12, 5))
+        linha(frame)
+        rotulos_direto(n)
+
+    def em_cache(n):
+        # Como nos contadores: painel e linha em cache, rótulos por frame direto
+        renderizador.painel(frame, "painel", fundo, valores, (12, 5), area=(560, 190))
+        renderizador.camada(frame, ("linha", 540), linha)
+        rotulos_direto(n)
+
+    for nome, funcao in (("Desenho direto", direto), ("Sprites em cache", em_cache),
+                         ("Rótulos putText", rotulos_direto),
+                         ("Rótulos em cache", rotulos_em_cache)):
+        funcao(0)  # Primeira chamada desenha os sprites
+        antes = renderizador.renderizacoes
+        inicio = time.perf_counter()
+        for n in range(1, 501):
+            funcao(n)
+        ms = (time.perf_counter() - inicio) / 500 * 1000
+        print(f"🎨 {nome:<18} {ms:.3f} ms/frame "
+              f"({renderizador.renderizacoes - antes} renderizações em 500 frames)")
+
+
+if __name__ == "__main__":
+    _medir()
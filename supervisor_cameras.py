@@ -0,0 +1,284 @@
+# ========================================
+# SUPERVISOR DE MÚLTIPLAS CÂMERAS
+# ========================================
+# Inicia um ContadorPessoas headless por fonte (câmera, arquivo ou URL),
+# cada um no seu próprio processo, e junta as contagens de todos em um
+# total ao vivo. Um processo por câmera evita disputa pelo GIL, e o
+# número de threads do PyTorch por processo é fixado para que N câmeras
+# dividam os núcleos da máquina sem brigar entre si.
+#
+# Uso:
+#   python supervisor_cameras.py 0 1 rtsp://camera3/stream video.mp4 --threads 2
+#   python supervisor_cameras.py 0 1 2 3 --servidor --max-lote 8   (um só modelo para todas)
+
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.managers import SyncManager
+
+from metricas import ColetorSupervisor, ServidorMetricas
+from registro_eventos import RegistroEventos
+from servidor_inferencia import ClienteInferencia, executar_servidor
+
+
+def interpretar_fonte(texto):
+    """Converte '0', '1'... em índice de câmera; o resto é arquivo/URL"""
+    return int(texto) if texto.isdigit() else texto
+
+
+def _ignorar_ctrl_c():
+    """Ctrl+C é tratado só pelo supervisor, que avisa os workers pelo evento 'parar'"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _inicializar_worker(threads):
+    """Roda uma vez em cada processo do pool: fixa as threads de cálculo"""
+    import cv2
+    import torch
+
+    _ignorar_ctrl_c()
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(1)  # A decodificação/redimensionamento não precisa de mais
+
+
+def _worker_contagem(indice, fonte, modelo_path, fila, parar, ttl_frames, max_trilhas,
+                     cliente=None):
+    """
+    Conta pessoas em uma fonte, sem janela, enviando as contagens para a fila.
+
+    Roda dentro de um processo do pool. Com 'cliente' (ClienteInferencia) a
+    detecção é feita pelo servidor de inferência e este processo só guarda
+    o rastreador e as contagens; os frames são decodificados direto em
+    memória compartilhada e o servidor os lê de lá, sem cópia. Mensagens enviadas:
+    - {"tipo": "inicio"}, {"tipo": "contagem"}, {"tipo": "progresso"},
+      {"tipo": "fim"} ou {"tipo": "erro"}, sempre com "fonte": indice
+    """
+    from contador_pessoas import ContadorPessoas
+    from memoria_compartilhada import CapturaCompartilhada
+
+    try:
+        contador = ContadorPessoas(modelo_path, detector=cliente)
+        if cliente is not None:
+            fonte = CapturaCompartilhada(fonte)
+            cliente.anel = fonte.anel
+        fila.put({"tipo": "inicio", "fonte": indice, "pid": os.getpid()})
+
+        def ao_evento(evento):
+            fila.put({"tipo": "contagem", "fonte": indice,
+                      "entradas": contador.contador_entrada,
+                      "saidas": contador.contador_saida,
+                      "evento": evento})
+
+        # Progresso limitado a uma mensagem a cada 5 segundos
+        ultimo_envio = [time.monotonic(), 0]
+
+        def ao_progresso(frames):
+            agora = time.monotonic()
+            if agora - ultimo_envio[0] >= 5:
+                fps = (frames - ultimo_envio[1]) / (agora - ultimo_envio[0])
+                fila.put({"tipo": "progresso", "fonte": indice, "frames": frames, "fps": fps})
+                ultimo_envio[:] = [agora, frames]
+
+        contador.ouvintes_eventos.append(ao_evento)
+        resumo = contador.contar_headless(fonte, tamanho_lote=1, parar=parar,
+                                          guardar_eventos=False, ttl_frames=ttl_frames,
+                                          max_trilhas=max_trilhas, ao_progresso=ao_progresso)
+        if resumo is None:
+            fila.put({"tipo": "erro", "fonte": indice,
+                      "mensagem": f"não abriu: {getattr(fonte, 'fonte', fonte)}"})
+        else:
+            fila.put({"tipo": "fim", "fonte": indice, "entradas": resumo["entradas"],
+                      "saidas": resumo["saidas"], "frames": resumo["frames"]})
+    except Exception as e:
+        fila.put({"tipo": "erro", "fonte": indice, "mensagem": repr(e)})
+
+
+class SupervisorCameras:
+    """Executa um worker de contagem por fonte e agrega os resultados ao vivo"""
+
+    def __init__(self, fontes, modelo_path="runs/detect/train/weights/best.pt",
+                 threads_por_worker=None, ttl_frames=9000, max_trilhas=2000,
+                 servidor=False, max_lote=8, max_espera_ms=10, registro=None):
+        """
+        Args:
+            fontes (list): Índices de câmera, arquivos ou URLs
+            modelo_path (str): Modelo YOLO usado por todos os workers
+            threads_por_worker (int): Threads do PyTorch por processo
+                                      (padrão: núcleos / número de fontes)
+            ttl_frames (int): Despejo de trilhas antigas em cada worker
+            max_trilhas (int): Limite de trilhas vivas em cada worker
+            servidor (bool): Usa um servidor de inferência único com lotes dinâmicos
+                             em vez de um modelo YOLO por worker
+            max_lote (int): Máximo de frames por passada no servidor
+            max_espera_ms (float): Prazo para completar um lote no servidor
+            registro (str): Pasta do registro binário de passagens (registro_eventos.py);
+                            o supervisor é o único escritor, a fonte vai em cada registro
+        """
+        if not fontes:
+            raise ValueError("Informe pelo menos uma fonte")
+        if not os.path.exists(modelo_path):
+            print(f"⚠️ Modelo não encontrado em: {modelo_path} - usando yolov8n.pt")
+            modelo_path = "yolov8n.pt"
+
+        self.fontes = list(fontes)
+        self.modelo_path = modelo_path
+        self.servidor = servidor
+        self.max_lote = max_lote
+        self.max_espera_ms = max_espera_ms
+        # Com servidor, os workers só rastreiam: a CPU fica para o servidor
+        padrao = 1 if servidor else max(1, (os.cpu_count() or 1) // len(self.fontes))
+        self.threads_por_worker = threads_por_worker or padrao
+        self.ttl_frames = ttl_frames
+        self.max_trilhas = max_trilhas
+
+        self.registro = RegistroEventos(registro) if registro else None
+
+        # Estado agregado por fonte
+        self.estado = {i: {"fonte": f, "status": "iniciando", "entradas": 0,
+                           "saidas": 0, "fps": 0.0}
+                       for i, f in enumerate(self.fontes)}
+
+    def totais(self):
+        """Soma de entradas e saídas de todas as fontes"""
+        entradas = sum(e["entradas"] for e in self.estado.values())
+        saidas = sum(e["saidas"] for e in self.estado.values())
+        return entradas, saidas
+
+    def _aplicar(self, msg):
+        """Atualiza o estado agregado com uma mensagem de um worker"""
+        estado = self.estado[msg["fonte"]]
+        tipo = msg["tipo"]
+        if tipo == "inicio":
+            estado["status"] = "rodando"
+        elif tipo == "contagem":
+            estado["entradas"] = msg["entradas"]
+            estado["saidas"] = msg["saidas"]
+            evento = msg["evento"]
+            if self.registro is not None:
+                self.registro.registrar(evento["direcao"], evento["track_id"], msg["fonte"],
+                                        evento.get("frame", -1))
+            seta = "⬇️" if evento["direcao"] == "entrada" else "⬆️"
+            print(f"{seta} [{estado['fonte']}] pessoa {evento['track_id']} {evento['direcao']}")
+        elif tipo == "progresso":
+            estado["fps"] = msg["fps"]
+        elif tipo == "fim":
+            estado.update(status="finalizado", entradas=msg["entradas"], saidas=msg["saidas"])
+        elif tipo == "erro":
+            estado["status"] = "erro"
+            print(f"❌ [{estado['fonte']}] {msg['mensagem']}")
+
+    def mostrar_painel(self):
+        """Imprime o total agregado e a situação de cada fonte"""
+        entradas, saidas = self.totais()
+        print("\n" + "="*60)
+        print(f"📊 TOTAL: entradas={entradas} saídas={saidas} no ambiente={entradas - saidas}")
+        for estado in self.estado.values():
+            print(f"   • {str(estado['fonte'])[:30]:<30} {estado['status']:<11} "
+                  f"E={estado['entradas']:<5} S={estado['saidas']:<5} {estado['fps']:.1f} FPS")
+        print("="*60)
+
+    def executar(self, intervalo_painel_s=10):
+        """
+        Inicia os workers e agrega as contagens até todos terminarem (ou Ctrl+C).
+
+        Args:
+            intervalo_painel_s (float): Intervalo entre impressões do painel agregado
+        """
+        contexto = mp.get_context("spawn")  # Processos limpos (sem herdar o estado do PyTorch)
+        gerenciador = SyncManager(ctx=contexto)
+        gerenciador.start(_ignorar_ctrl_c)
+        fila = gerenciador.Queue()
+        parar = gerenciador.Event()
+
+        print(f"🚀 Supervisor: {len(self.fontes)} fontes, "
+              f"{self.threads_por_worker} threads do PyTorch por worker")
+        print("Pressione Ctrl+C para encerrar todos")
+
+        # SERVIDOR DE INFERÊNCIA (opcional): um único modelo para todas as fontes
+        processo_servidor = None
+        clientes = [None] * len(self.fontes)
+        if self.servidor:
+            fila_pedidos = gerenciador.Queue()
+            filas_respostas = {i: gerenciador.Queue() for i in range(len(self.fontes))}
+            parar_servidor = gerenciador.Event()
+            processo_servidor = contexto.Process(
+                target=executar_servidor, name="servidor-inferencia",
+                args=(self.modelo_path, fila_pedidos, filas_respostas, parar_servidor,
+                      self.max_lote, self.max_espera_ms, os.cpu_count()))
+            processo_servidor.start()
+            clientes = [ClienteInferencia(i, fila_pedidos, filas_respostas[i])
+                        for i in range(len(self.fontes))]
+
+        with ProcessPoolExecutor(max_workers=len(self.fontes), mp_context=contexto,
+                                 initializer=_inicializar_worker,
+                                 initargs=(self.threads_por_worker,)) as pool:
+            tarefas = [pool.submit(_worker_contagem, i, fonte, self.modelo_path, fila,
+                                   parar, self.ttl_frames, self.max_trilhas, clientes[i])
+                       for i, fonte in enumerate(self.fontes)]
+            ultimo_painel = time.monotonic()
+            try:
+                while not all(t.done() for t in tarefas) or not fila.empty():
+                    try:
+                        self._aplicar(fila.get(timeout=0.5))
+                    except queue.Empty:
+                        pass
+                    if time.monotonic() - ultimo_painel >= intervalo_painel_s:
+                        self.mostrar_painel()
+                        ultimo_painel = time.monotonic()
+            except KeyboardInterrupt:
+                print("\n🛑 Encerrando workers...")
+                parar.set()
+                for tarefa in tarefas:
+                    tarefa.result()
+                while not fila.empty():
+                    self._aplicar(fila.get())
+
+        if processo_servidor is not None:
+            parar_servidor.set()
+            processo_servidor.join()
+        gerenciador.shutdown()
+        if self.registro is not None:
+            self.registro.fechar()
+            print(f"🗃️ {self.registro.total} passagens registradas em {self.registro.pasta}")
+        self.mostrar_painel()
+        return self.totais()
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Supervisor de múltiplas câmeras")
+    parser.add_argument("fontes", nargs="+",
+                        help="Índices de câmera (0, 1...), arquivos de vídeo ou URLs")
+    parser.add_argument("--modelo", default="runs/detect/train/weights/best.pt",
+                        help="Caminho do modelo YOLO")
+    parser.add_argument("--threads", type=int,
+                        help="Threads do PyTorch por worker (padrão: núcleos / fontes)")
+    parser.add_argument("--intervalo", type=float, default=10,
+                        help="Segundos entre impressões do painel agregado")
+    parser.add_argument("--servidor", action="store_true",
+                        help="Um servidor de inferência com lotes dinâmicos para todas as fontes")
+    parser.add_argument("--max-lote", type=int, default=8,
+                        help="Máximo de frames por lote no servidor")
+    parser.add_argument("--max-espera-ms", type=float, default=10,
+                        help="Prazo para completar um lote no servidor")
+    parser.add_argument("--registro", metavar="PASTA",
+                        help="Registra cada passagem (com a fonte) nos segmentos desta pasta")
+    parser.add_argument("--metricas", type=int, metavar="PORTA",
+                        help="Expõe contagens e FPS por fonte em http://0.0.0.0:PORTA/metrics")
+    args = parser.parse_args()
+
+    supervisor = SupervisorCameras([interpretar_fonte(f) for f in args.fontes],
+                                   args.modelo, args.threads, servidor=args.servidor,
+                                   max_lote=args.max_lote, max_espera_ms=args.max_espera_ms,
+                                   registro=args.registro)
+    if args.metricas is not None:
+        ServidorMetricas(args.metricas).adicionar(ColetorSupervisor(supervisor)).iniciar()
+    supervisor.executar(args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
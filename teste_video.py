@@ -7,6 +7,10 @@
 import cv2  # OpenCV para processamento de vídeo
 import os   # Para operações com arquivos e pastas
 from ultralytics import YOLO  # YOLOv8 para detecção
+from gate_movimento import GateMovimento  # Pula o YOLO quando a cena está parada
+from controle_taxa import ControladorPasso  # Passo de detecção adaptativo
+import time  # Mede o tempo de cada frame para o controle de taxa
+from exibicao import ExibidorAssincrono  # Janela em thread própria, com FPS limitado
 
 def testar_contador_video():
     """
@@ -119,11 +123,17 @@ def testar_contador_video():
     print(f"📊 Info do vídeo: {width}x{height}, {fps} FPS, {total_frames} frames")
     print("\n▶️ Iniciando teste... Pressione 'q' para sair")
     
+    # Janela inicial maior, criada uma vez e atualizada em outra thread
+    janela = ExibidorAssincrono('TESTE - Contador de Pessoas', tamanho=(1100, 750)).iniciar()
+    
     # ========================================
     # ETAPA 6: LOOP PRINCIPAL DE PROCESSAMENTO
     # ========================================
     pessoas_detectadas = 0  # Contador atual de pessoas no frame
     frame_count = 0         # Contador de frames processados
+    gate = GateMovimento()  # Só detecta com movimento ou com pessoas na tela
+    # Passo de detecção ajustado ao vivo para acompanhar o FPS do vídeo
+    controle = ControladorPasso(fps_alvo=fps or 25)
     
     while True:
         # Lê o próximo frame do vídeo
@@ -133,9 +143,14 @@ def testar_contador_video():
             break
         
         frame_count += 1
+        inicio_frame = time.perf_counter()
         
-        # OTIMIZAÇÃO: Processa apenas a cada 3 frames para melhor performance
-        if frame_count % 3 == 0:
+        # OTIMIZAÇÃO: Processa apenas a cada N frames para acompanhar o vídeo
+        # (N ajustado pelo controle de taxa; pula também esses se a cena
+        # estiver parada e vazia)
+        # (inferiu = o YOLO rodou de fato; só esses frames entram na média do controle)
+        inferiu = controle.deve_inferir() and gate.precisa_detectar(frame)
+        if inferiu:
             try:
                 # Executa detecção YOLO no frame atual
                 results = model(frame, verbose=False)  # verbose=False evita prints
@@ -165,6 +180,8 @@ def testar_contador_video():
                 
                 # Atualiza contador global
                 pessoas_detectadas = pessoas_no_frame
+                gate.informar_pessoas(pessoas_no_frame)
+                controle.registrar_inferencia(time.perf_counter() - inicio_frame)
                 
             except Exception as e:
                 print(f"⚠️ Erro no frame {frame_count}: {e}")
@@ -195,6 +212,11 @@ def testar_contador_video():
         cv2.putText(frame, f"Modelo: {os.path.basename(modelo_path)}", 
                    (25, 125), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
         
+        # Passo atual do controle de taxa (faixa logo abaixo do painel)
+        cv2.rectangle(frame, (10, 135), (450, 160), (0, 0, 0), -1)
+        cv2.putText(frame, controle.resumo(), 
+                   (25, 153), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1)
+        
         # ========================================
         # ETAPA 8: REDIMENSIONA E MOSTRA O FRAME (JANELA MAIOR)
         # ========================================
@@ -212,25 +234,29 @@ def testar_contador_video():
             new_height = int(height * scale)
             frame = cv2.resize(frame, (new_width, new_height))
         
-        # Mostra o frame processado com JANELA MAIOR
-        cv2.namedWindow('TESTE - Contador de Pessoas', cv2.WINDOW_NORMAL)
-        cv2.resizeWindow('TESTE - Contador de Pessoas', 1100, 750)  # Janela inicial maior
-        cv2.imshow('TESTE - Contador de Pessoas', frame)
+        # Mostra o frame processado com JANELA MAIOR (sem esperar o imshow)
+        janela.mostrar(frame)
         
         # Verifica se usuário pressionou 'q' para sair
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if janela.tecla() == 'q':
             break
+        
+        controle.registrar_frame(time.perf_counter() - inicio_frame, inferiu)
     
     # ========================================
     # ETAPA 9: FINALIZAÇÃO E LIMPEZA
     # ========================================
     cap.release()         # Libera o arquivo de vídeo
-    cv2.destroyAllWindows()  # Fecha janelas do OpenCV
+    janela.parar()        # Fecha a janela do OpenCV
     
     # Mostra resultado final
     print("\n" + "="*50)
     print("✅ TESTE CONCLUÍDO!")
     print(f"📊 Último frame: {pessoas_detectadas} pessoas detectadas")
+    print(f"🚦 Gate de movimento: YOLO pulado em {gate.frames_pulados} de "
+          f"{gate.frames_avaliados} frames avaliados")
+    print(f"🎚️ Controle de taxa: {controle.inferencias} de {controle.frames} frames "
+          f"passaram pelo detector ({controle.resumo()})")
     print("="*50)
 
 # ========================================
@@ -0,0 +1,225 @@
+# ========================================
+# HISTÓRICO DE TRILHAS EM ARRAYS (TrackStore)
+# ========================================
+# Substitui o antigo defaultdict(lambda: []) de tuplas por arrays NumPy
+# pré-alocados:
+# - cada track_id ganha um "slot" (linha) fixo enquanto estiver vivo
+# - os últimos N centros ficam num buffer circular (slots, N, 2)
+# - último frame visto e "já contado" ficam em arrays paralelos
+# Assim não há lista nem tupla nova por pessoa a cada frame, não há
+# pop(0) O(n), e a verificação de cruzamento roda em todos os slots de uma vez.
+
+import numpy as np  # Arrays pré-alocados
+
+from contagem import detectar_cruzamentos  # Regra de entrada/saída vetorizada
+
+
+class TrackStore:
+    """
+    Histórico compacto de posições das pessoas rastreadas.
+
+    API usada pelos contadores:
+    - atualizar(ids, centros, frame, linha_y): registra o frame e devolve quem cruzou
+    - marcar_contado(track_id) / foi_contado(track_id)
+    - historico(track_id): pontos do mais antigo ao mais recente
+    - remover(track_ids): libera os slots de trilhas que não existem mais
+    - remover_inativos(frame, ttl) / limitar(max_trilhas): despejo para uso 24/7
+    """
+
+    def __init__(self, tamanho_historico=30, slots_iniciais=64, dtype=np.int16):
+        """
+        Args:
+            tamanho_historico (int): Quantos centros guardar por pessoa
+            slots_iniciais (int): Capacidade inicial (cresce sozinha se precisar)
+            dtype: Tipo das coordenadas (int16 cobre frames de até 32767 px)
+        """
+        self.tamanho_historico = tamanho_historico
+        self.dtype = np.dtype(dtype)
+
+        self.slot_de = {}  # track_id -> slot
+        self.slots_livres = []  # Pilha de slots reaproveitáveis
+        self.removidas = 0  # Total de trilhas já liberadas (despejo)
+        self._alocar(slots_iniciais)
+
+    def _alocar(self, capacidade):
+        """Cria (ou aumenta) os arrays para comportar 'capacidade' slots"""
+        antigos = getattr(self, "pontos", None)
+        usados = 0 if antigos is None else len(antigos)
+
+        pontos = np.zeros((capacidade, self.tamanho_historico, 2), self.dtype)
+        posicao = np.zeros(capacidade, np.int32)        # Próxima posição de escrita no anel
+        quantidade = np.zeros(capacidade, np.int32)     # Pontos válidos no anel
+        ultimo_frame = np.full(capacidade, -1, np.int64)
+        contado = np.zeros(capacidade, bool)
+        track_id = np.full(capacidade, -1, np.int64)    # Slot -> track_id (-1 = livre)
+
+        if antigos is not None:
+            pontos[:usados] = self.pontos
+            posicao[:usados] = self.posicao
+            quantidade[:usados] = self.quantidade
+            ultimo_frame[:usados] = self.ultimo_frame
+            contado[:usados] = self.contado
+            track_id[:usados] = self.track_id
+
+        self.pontos = pontos
+        self.posicao = posicao
+        self.quantidade = quantidade
+        self.ultimo_frame = ultimo_frame
+        self.contado = contado
+        self.track_id = track_id
+
+        # Novos slots entram na pilha de livres (menores índices saem primeiro)
+        self.slots_livres.extend(range(capacidade - 1, usados - 1, -1))
+
+    def _slots_para(self, track_ids):
+        """Devolve o slot de cada track_id, criando slots para IDs novos"""
+        slots = np.empty(len(track_ids), np.int64)
+        for i, track_id in enumerate(track_ids):
+            slot = self.slot_de.get(track_id)
+            if slot is None:
+                if not self.slots_livres:
+                    self._alocar(len(self.pontos) * 2)
+                slot = self.slots_livres.pop()
+                self.slot_de[track_id] = slot
+                self.track_id[slot] = track_id
+            slots[i] = slot
+        return slots
+
+    def atualizar(self, track_ids, centros, frame, linha_y=None):
+        """
+        Registra os centros deste frame e verifica cruzamentos da linha.
+
+        O cruzamento compara o último ponto guardado (frame anterior em que a
+        pessoa apareceu) com o centro atual, exatamente como verificar_passagem.
+        Trilhas já contadas não aparecem nas máscaras.
+
+        Args:
+            track_ids: Sequência (N,) de IDs de rastreamento (sem repetição)
+            centros: Array (N, 2) de centros inteiros (x, y)
+            frame (int): Índice do frame atual
+            linha_y (int): Linha de contagem (None = só registra, sem contar)
+
+        Returns:
+            tuple: (slots, mascara_entrada, mascara_saida), arrays (N,)
+        """
+        ids = [int(t) for t in track_ids]
+        centros = np.asarray(centros).reshape(-1, 2)
+        slots = self._slots_para(ids)
+
+        # Último ponto conhecido de cada trilha
+        anteriores = self.pontos[slots, (self.posicao[slots] - 1) % self.tamanho_historico]
+        tem_anterior = self.quantidade[slots] > 0
+
+        if linha_y is not None and len(slots):
+            entrada, saida = detectar_cruzamentos(anteriores[:, 1], centros[:, 1],
+                                                  tem_anterior, linha_y)
+            pendentes = ~self.contado[slots]
+            entrada &= pendentes
+            saida &= pendentes
+        else:
+            entrada = saida = np.zeros(len(slots), bool)
+
+        # Escreve o novo ponto no buffer circular
+        self.pontos[slots, self.posicao[slots]] = centros
+        self.posicao[slots] = (self.posicao[slots] + 1) % self.tamanho_historico
+        self.quantidade[slots] = np.minimum(self.quantidade[slots] + 1, self.tamanho_historico)
+        self.ultimo_frame[slots] = frame
+
+        return slots, entrada, saida
+
+    def marcar_contado(self, track_id):
+        """Marca a trilha como já contada"""
+        self.contado[self.slot_de[int(track_id)]] = True
+
+    def foi_contado(self, track_id):
+        """True se a trilha já foi contada (False para IDs desconhecidos)"""
+        slot = self.slot_de.get(int(track_id))
+        return slot is not None and bool(self.contado[slot])
+
+    def historico(self, track_id):
+        """
+        Pontos guardados de uma trilha, do mais antigo ao mais recente.
+
+        Returns:
+            np.ndarray: Array (K, 2); vazio se o ID não existir
+        """
+        slot = self.slot_de.get(int(track_id))
+        if slot is None:
+            return np.zeros((0, 2), self.dtype)
+        n = self.quantidade[slot]
+        ordem = (self.posicao[slot] - n + np.arange(n)) % self.tamanho_historico
+        return self.pontos[slot, ordem]
+
+    def remover(self, track_ids):
+        """Libera os slots dos IDs informados para reaproveitamento"""
+        for track_id in track_ids:
+            slot = self.slot_de.pop(int(track_id), None)
+            if slot is None:
+                continue
+            self.posicao[slot] = 0
+            self.quantidade[slot] = 0
+            self.ultimo_frame[slot] = -1
+            self.contado[slot] = False
+            self.track_id[slot] = -1
+            self.slots_livres.append(slot)
+            self.removidas += 1
+
+    def remover_inativos(self, frame_atual, ttl_frames):
+        """
+        Libera as trilhas que não aparecem há mais de ttl_frames frames.
+
+        Args:
+            frame_atual (int): Índice do frame atual
+            ttl_frames (int): Tempo de vida sem ser visto, em frames
+
+        Returns:
+            int: Quantas trilhas foram removidas
+        """
+        vivos = self.track_id >= 0
+        inativos = vivos & (frame_atual - self.ultimo_frame > ttl_frames)
+        if not inativos.any():
+            return 0
+        ids = self.track_id[inativos].tolist()
+        self.remover(ids)
+        return len(ids)
+
+    def limitar(self, max_trilhas, frame_atual=None, margem_frames=0):
+        """
+        Mantém no máximo max_trilhas vivas, removendo as vistas há mais tempo.
+
+        Só trilhas não vistas há mais de margem_frames frames podem sair: com
+        a margem igual ao track_buffer do rastreador, uma pessoa que ainda
+        pode voltar com o mesmo ID não perde a marca de "já contada". Se não
+        houver trilhas assim suficientes, o limite fica excedido até haver.
+
+        Args:
+            max_trilhas (int): Limite de trilhas vivas
+            frame_atual (int): Índice do frame atual (None = sem margem)
+            margem_frames (int): Trilhas vistas há até isso não são removidas
+
+        Returns:
+            int: Quantas trilhas foram removidas
+        """
+        excesso = len(self.slot_de) - max_trilhas
+        if excesso <= 0:
+            return 0
+        candidatos = self.track_id >= 0
+        if frame_atual is not None:
+            candidatos &= frame_atual - self.ultimo_frame > margem_frames
+        candidatos = np.flatnonzero(candidatos)
+        mais_antigos = candidatos[np.argsort(self.ultimo_frame[candidatos], kind="stable")[:excesso]]
+        self.remover(self.track_id[mais_antigos].tolist())
+        return len(mais_antigos)
+
+    def __len__(self):
+        """Número de trilhas vivas"""
+        return len(self.slot_de)
+
+    def __contains__(self, track_id):
+        return int(track_id) in self.slot_de
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays (bytes)"""
+        return (self.pontos.nbytes + self.posicao.nbytes + self.quantidade.nbytes +
+                self.ultimo_frame.nbytes + self.contado.nbytes + self.track_id.nbytes)